@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import sys
+import time
+
+from camera import Camera
+from matrix import Matrix
+from point import Point
+from scene_file import load_scene
+from scenes import SCENES
+from vector import Vector
+
+# The jobs being rendered and the scenes a render worker process has loaded,
+# keyed by what was loaded, so that every frame of a scene rendered by the
+# worker after the first reuses the scene instead of loading it again.  The
+# jobs are sent to each worker once when it starts, so that the work handed
+# out for each frame is just the job's index and the frame.  Set up by
+# _initialize_worker.
+_worker_jobs = []
+_worker_scenes = {}
+_worker_compiled_directory = None
+_worker_binary = False
+
+# A {frame} replacement field, optionally with a format specification (e.g.,
+# {frame:04d}), in the output path of a job with frames.  Only these fields
+# are replaced, so any other braces in the path are left alone.
+_FRAME_FIELD = re.compile(r"\{frame(?::([^{}]*))?\}")
+
+
+def _initialize_worker(jobs, compiled_directory, binary):
+    global _worker_jobs
+    global _worker_compiled_directory
+    global _worker_binary
+
+    _worker_jobs = jobs
+    _worker_scenes.clear()
+    _worker_compiled_directory = compiled_directory
+    _worker_binary = binary
+
+
+class RenderJob:
+    """
+    A scene to render to one image, or to a sequence of images when it is
+    animated over a range of frames.
+    """
+    def __init__(self, scene, output, frames=None, keyframes=None, width=None,
+                 height=None):
+        """
+        Initialize a RenderJob object.
+
+        :param scene: The name of one of the scenes in scenes.SCENES or the
+            path of a scene file
+        :param output: The path of the PPM file to write.  For a job with
+            frames, every {frame} field in the path, which may include a format
+            specification, is replaced by the frame number, e.g.,
+            "out/frame_{frame:04d}.ppm".  Any other braces are left as they
+            are.
+        :param frames: A range of frame numbers, or None for a single image
+        :param keyframes: A list of camera keyframes, each a dictionary with
+            the frame number ("frame") and the camera's "from", "to", and
+            (optionally) "up" as lists of three numbers, in increasing order of
+            frame number with no frame repeated.  The camera for a frame
+            between two keyframes is placed by interpolating between them
+            linearly, and frames before the first or after the last keyframe
+            use that keyframe.  If None, every frame uses the scene's camera.
+        :param width: The width of the images in pixels, or None for the
+            scene's camera's width
+        :param height: The height of the images in pixels, or None for the
+            scene's camera's height
+        """
+        if keyframes is not None:
+            if not keyframes:
+                raise ValueError("Keyframes must not be empty")
+            if not all("frame" in keyframe and "from" in keyframe and "to" in keyframe
+                       for keyframe in keyframes):
+                raise ValueError("Every keyframe needs a frame, from, and to")
+            if any(earlier["frame"] >= later["frame"]
+                   for earlier, later in zip(keyframes, keyframes[1:])):
+                raise ValueError("Keyframes must be in increasing order of frame "
+                                 "with no frame repeated")
+            keyframes = list(keyframes)
+        if frames is not None and len(frames) == 0:
+            raise ValueError("Frame range must not be empty")
+        if frames is not None and not _FRAME_FIELD.search(output):
+            # Otherwise every frame would be written to the same file
+            raise ValueError("The output path of a job with frames needs a "
+                             "{frame} field")
+
+        self.scene = scene
+        self.output = output
+        self.frames = frames
+        self.keyframes = keyframes
+        self.width = width
+        self.height = height
+
+    @staticmethod
+    def from_dict(description):
+        """
+        Create a job from its description in a job file.
+
+        :param description: A dictionary with the scene and output and,
+            optionally, frames (a [start, stop) pair), keyframes, width, and
+            height
+        :return: RenderJob, the job
+        """
+        frames = description.get("frames")
+        if frames is not None:
+            if len(frames) != 2:
+                raise ValueError("Frames must be a [start, stop) pair")
+            frames = range(frames[0], frames[1])
+
+        return RenderJob(scene=description["scene"],
+                         output=description["output"],
+                         frames=frames,
+                         keyframes=description.get("keyframes"),
+                         width=description.get("width"),
+                         height=description.get("height"))
+
+    def outputs(self):
+        """
+        :return: A list of (frame, output path) tuples, one per image the job
+            renders.  The frame is None for a job without frames.
+        """
+        if self.frames is None:
+            return [(None, self.output)]
+
+        return [(frame,
+                 _FRAME_FIELD.sub(lambda field: format(frame, field.group(1) or ""),
+                                  self.output))
+                for frame in self.frames]
+
+    def camera_for(self, camera, frame):
+        """
+        Determine the camera for a frame of the job.
+
+        :param camera: Camera, the scene's camera
+        :param frame: The frame number, or None for a job without frames
+        :return: Camera, the camera to render the frame with
+        """
+        width = self.width if self.width is not None else camera.horizontal_size
+        height = self.height if self.height is not None else camera.vertical_size
+        if self.keyframes is None or frame is None:
+            if (width, height) == (camera.horizontal_size, camera.vertical_size):
+                return camera
+            return Camera(horizontal_size=width,
+                          vertical_size=height,
+                          field_of_view=camera.field_of_view,
+                          transform=camera.transform)
+
+        # Find the keyframes on either side of the frame and how far between
+        # them the frame is
+        before = self.keyframes[0]
+        after = self.keyframes[-1]
+        for keyframe in self.keyframes:
+            if keyframe["frame"] <= frame:
+                before = keyframe
+            if keyframe["frame"] >= frame:
+                after = keyframe
+                break
+        span = after["frame"] - before["frame"]
+        fraction = (frame - before["frame"]) / span if span > 0 else 0.0
+
+        def interpolate(name, default=None):
+            start = before.get(name, default)
+            end = after.get(name, default)
+            return [a + (b - a) * fraction for a, b in zip(start, end)]
+
+        eye = interpolate("from")
+        to = interpolate("to")
+        up = interpolate("up", default=[0, 1, 0])
+
+        return Camera(horizontal_size=width,
+                      vertical_size=height,
+                      field_of_view=camera.field_of_view,
+                      transform=Matrix.view_transform(eye=Point(*eye),
+                                                      to=Point(*to),
+                                                      up=Vector(*up)))
+
+
+def _load(scene):
+    # Load a scene, by name or from a scene file, reusing it if this process
+    # has already loaded it.  Returns the world, the camera, and the seconds
+    # spent loading, which is None if the scene was reused.
+    loaded = _worker_scenes.get(scene)
+    if loaded is not None:
+        return loaded[0], loaded[1], None
+
+    start = time.perf_counter()
+    if scene in SCENES:
+        world, camera = SCENES[scene]()
+    else:
+        world, camera = load_scene(path=scene,
+                                   compiled_directory=_worker_compiled_directory)
+    _worker_scenes[scene] = (world, camera)
+
+    return world, camera, time.perf_counter() - start
+
+
+def render_frame(task):
+    """
+    Render and write one image.  This runs in the render worker processes.
+
+    :param task: A (job index, frame, output path) tuple
+    :return: A dictionary with the job index, the frame, and the time spent
+        loading the scene, rendering, and writing the image
+    """
+    index, frame, output = task
+    job = _worker_jobs[index]
+    world, camera, load_seconds = _load(job.scene)
+    camera = job.camera_for(camera=camera, frame=frame)
+
+    start = time.perf_counter()
+    canvas = camera.render(world=world)
+    render_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, "wb" if _worker_binary else "w") as file:
+        canvas.write_ppm(file=file, binary=_worker_binary)
+    write_seconds = time.perf_counter() - start
+
+    return {"job": index,
+            "frame": frame,
+            "output": output,
+            "pixels": camera.horizontal_size * camera.vertical_size,
+            "loaded_scene": load_seconds is not None,
+            "load_seconds": load_seconds or 0.0,
+            "render_seconds": render_seconds,
+            "write_seconds": write_seconds,
+            "worker": os.getpid()}
+
+
+def run_batch(jobs, workers=None, binary=False, compiled_directory=None,
+              progress=None):
+    """
+    Render every image of a list of jobs across a pool of worker processes.
+
+    Each image is rendered serially by a single worker, as with many images
+    to render, spreading whole images over the workers keeps them all busy
+    without the cost of splitting images into tiles.  The images are handed
+    out in chunks of consecutive frames of the same job, so that a worker
+    loads each scene once and reuses it for the rest of the chunk (and for any
+    later chunk of the same scene), and so that the cost of sending work to
+    the workers is spread over several images.
+
+    :param jobs: A list of RenderJob objects
+    :param workers: Integer, the number of worker processes to use.  If 1,
+        the images are rendered in this process.  If None, one worker per CPU
+        is used.
+    :param binary: If True, write binary (P6) PPM files, otherwise plain (P3)
+    :param compiled_directory: If not None, the directory in which compiled
+        forms of scene files are kept (see scene_file.load_scene)
+    :param progress: If not None, a function that is called with each
+        frame's result as it completes.  A ValueError is raised, before
+        anything is rendered, if two images would be written to the same file.
+    :return: A dictionary, suitable for serializing to JSON, with the overall
+        throughput and the timing of each job
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("Number of workers must be at least 1")
+
+    tasks = [(index, frame, output)
+             for index, job in enumerate(jobs)
+             for frame, output in job.outputs()]
+
+    # Two images written to the same file would overwrite each other (and,
+    # with several workers, be written at the same time), e.g., scene files
+    # with the same name in different directories rendered to one directory.
+    paths = set()
+    for _, _, output in tasks:
+        path = os.path.normcase(os.path.abspath(output))
+        if path in paths:
+            raise ValueError("More than one image would be written to "
+                             "{}".format(output))
+        paths.add(path)
+
+    start = time.perf_counter()
+    results = []
+    if workers == 1 or len(tasks) <= 1:
+        _initialize_worker(jobs=jobs, compiled_directory=compiled_directory,
+                           binary=binary)
+        for task in tasks:
+            results.append(render_frame(task))
+            if progress:
+                progress(results[-1])
+    else:
+        # Several chunks per worker, so that workers that finish early can
+        # pick up more work, but otherwise as many frames per chunk as
+        # possible.
+        chunk_size = max(1, len(tasks) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_initialize_worker,
+                initargs=(jobs, compiled_directory, binary)) as executor:
+            for result in executor.map(render_frame, tasks, chunksize=chunk_size):
+                results.append(result)
+                if progress:
+                    progress(result)
+    wall_seconds = time.perf_counter() - start
+
+    job_reports = []
+    for index, job in enumerate(jobs):
+        job_results = [result for result in results if result["job"] == index]
+        render_seconds = [result["render_seconds"] for result in job_results]
+        job_reports.append({
+            "scene": job.scene,
+            "output": job.output,
+            "frames": len(job_results),
+            "scene_loads": sum(1 for result in job_results if result["loaded_scene"]),
+            "load_seconds": sum(result["load_seconds"] for result in job_results),
+            "render_seconds": sum(render_seconds),
+            "write_seconds": sum(result["write_seconds"] for result in job_results),
+            "fastest_frame_seconds": min(render_seconds) if render_seconds else None,
+            "slowest_frame_seconds": max(render_seconds) if render_seconds else None,
+        })
+
+    pixels = sum(result["pixels"] for result in results)
+
+    return {
+        "workers": workers,
+        "frames": len(results),
+        "wall_seconds": wall_seconds,
+        "frames_per_second": len(results) / wall_seconds if wall_seconds > 0 else None,
+        "pixels_per_second": pixels / wall_seconds if wall_seconds > 0 else None,
+        "workers_used": len({result["worker"] for result in results}),
+        "jobs": job_reports,
+    }
+
+
+def _frame_range(value):
+    start, separator, stop = value.partition(":")
+    if not separator:
+        raise argparse.ArgumentTypeError("Frames must be START:STOP")
+
+    try:
+        return range(int(start), int(stop))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Frames must be START:STOP")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Render scenes, or animations of scenes, across a pool of "
+                    "worker processes")
+    parser.add_argument("scene", nargs="*",
+                        help="Scene to render, the name of a built-in scene "
+                             "({}) or the path of a scene file".format(
+                                 ", ".join(sorted(SCENES))))
+    parser.add_argument("--jobs",
+                        help="JSON file with a list of jobs, each with a "
+                             "scene, an output path, and optionally frames, "
+                             "keyframes, width, and height")
+    parser.add_argument("--output-directory", default=".",
+                        help="Directory to write the images of the scenes "
+                             "given on the command line to")
+    parser.add_argument("--frames", type=_frame_range,
+                        help="Render the scenes given on the command line as "
+                             "frames START up to (but not including) STOP")
+    parser.add_argument("--width", type=int,
+                        help="Width of the images of the scenes given on the "
+                             "command line")
+    parser.add_argument("--height", type=int,
+                        help="Height of the images of the scenes given on the "
+                             "command line")
+    parser.add_argument("--workers", type=int,
+                        help="Number of render worker processes (default is "
+                             "one per CPU)")
+    parser.add_argument("--binary", action="store_true",
+                        help="Write binary (P6) rather than plain (P3) PPM")
+    parser.add_argument("--compiled-directory",
+                        help="Directory to keep compiled scene files in")
+    parser.add_argument("--report",
+                        help="File to write the JSON timing report to "
+                             "(default is standard output)")
+    options = parser.parse_args(arguments)
+
+    jobs = []
+    for scene in options.scene:
+        name = os.path.splitext(os.path.basename(scene))[0]
+        output = os.path.join(options.output_directory,
+                              name + ("_{frame:04d}.ppm" if options.frames else ".ppm"))
+        jobs.append(RenderJob(scene=scene,
+                              output=output,
+                              frames=options.frames,
+                              width=options.width,
+                              height=options.height))
+    if options.jobs:
+        with open(options.jobs) as file:
+            jobs.extend(RenderJob.from_dict(description)
+                        for description in json.load(file))
+    if not jobs:
+        parser.error("No scenes or jobs to render")
+
+    def progress(result):
+        print("{output}: {render_seconds:.3f}s".format(**result), file=sys.stderr)
+
+    report = run_batch(jobs=jobs,
+                       workers=options.workers,
+                       binary=options.binary,
+                       compiled_directory=options.compiled_directory,
+                       progress=progress)
+    print("{frames} frames in {wall_seconds:.2f}s ({frames_per_second:.2f} "
+          "frames/s) on {workers} workers".format(**report), file=sys.stderr)
+
+    if options.report:
+        with open(options.report, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak resident set size is simply not reported.
+    resource = None
+
+from packet_observer import PacketObserver
+from render_stats import RenderStatistics
+from scenes import SCENES
+
+
+class PhaseTimer(PacketObserver):
+    """
+    Accumulates the time a world spends in each phase of rendering by
+    observing the packets of rays it traces:
+
+    - intersect: finding the closest hit for primary rays and casting shadow
+      rays (hit_packet and is_shadowed_packet)
+    - shading: everything else color_at_packet does, i.e., preparing the
+      computations for each hit and evaluating the lighting model
+
+    It also counts the primary and shadow rays cast.  The timer is passed to
+    Camera.render as its observer, so the world is never changed.  Because an
+    observer cannot follow the render into its workers, the phases are only
+    measured for serial renders.
+    """
+    def __init__(self):
+        self.intersect_seconds = 0.0
+        self.color_seconds = 0.0
+        self.primary_rays = 0
+        self.shadow_rays = 0
+        self._intersect_start = None
+        self._color_start = None
+
+    @property
+    def shading_seconds(self):
+        return self.color_seconds - self.intersect_seconds
+
+    def hit_packet_started(self, origins, directions):
+        self._intersect_start = time.perf_counter()
+
+    def hit_packet_finished(self, origins, directions, hits):
+        self.intersect_seconds += time.perf_counter() - self._intersect_start
+        self.primary_rays += len(origins)
+
+    def shadow_packet_started(self, positions, light):
+        self._intersect_start = time.perf_counter()
+
+    def shadow_packet_finished(self, positions, light, shadowed):
+        self.intersect_seconds += time.perf_counter() - self._intersect_start
+        self.shadow_rays += len(positions)
+
+    def color_packet_started(self, origins, directions):
+        self._color_start = time.perf_counter()
+
+    def color_packet_finished(self, origins, directions, colors):
+        self.color_seconds += time.perf_counter() - self._color_start
+
+
+def run_workload(scene, horizontal_size, vertical_size, additional_spheres=0,
+                 workers=1, use_bvh=False, binary=False, repeat=1,
+                 measure_memory=True, collect_statistics=False, backend=None):
+    """
+    Render one workload and measure it.
+
+    :param scene: The name of the scene, one of the keys of scenes.SCENES
+    :param horizontal_size: The width of the image in pixels
+    :param vertical_size: The height of the image in pixels
+    :param additional_spheres: The number of extra spheres to add to the scene
+    :param workers: The number of render workers
+    :param use_bvh: If True, render with a bounding volume hierarchy
+    :param binary: If True, measure writing a binary (P6) PPM, otherwise a
+        plain (P3) PPM
+    :param repeat: The number of times to render the workload.  The fastest
+        render is reported, as it is the one least disturbed by whatever else
+        the machine was doing.
+    :param measure_memory: If True, render the workload one additional time
+        with tracemalloc enabled to find the peak memory allocated.  This is a
+        separate render because tracing slows rendering considerably.
+    :param collect_statistics: If True, render the workload one additional
+        time, serially, with render statistics enabled and include their
+        report in the results.
+    :param backend: The kind of render workers, Camera.BACKEND_THREADS or
+        Camera.BACKEND_PROCESSES, or None to let Camera.render choose
+    :return: A dictionary of the workload parameters and measurements
+    """
+    if scene not in SCENES:
+        raise ValueError("Unknown scene {}".format(scene))
+    if repeat < 1:
+        raise ValueError("Repeat must be at least 1")
+
+    world, camera = SCENES[scene](horizontal_size=horizontal_size,
+                                  vertical_size=vertical_size,
+                                  additional_spheres=additional_spheres)
+    if use_bvh:
+        world.build_bvh()
+
+    best = None
+    for _ in range(repeat):
+        timer = PhaseTimer()
+        start = time.perf_counter()
+        canvas = camera.render(world=world,
+                               workers=workers,
+                               backend=backend,
+                               observer=timer if workers == 1 else None)
+        render_seconds = time.perf_counter() - start
+
+        if best is None or render_seconds < best[0]:
+            best = (render_seconds, timer, canvas)
+
+    render_seconds, timer, canvas = best
+
+    start = time.perf_counter()
+    canvas.write_ppm(file=io.BytesIO() if binary else io.StringIO(),
+                     binary=binary)
+    output_seconds = time.perf_counter() - start
+
+    # Parallel renders are not observed by the timer, so the only ray count
+    # available is the number of primary rays.
+    primary_rays = horizontal_size * vertical_size
+    rays = primary_rays + timer.shadow_rays if workers == 1 else primary_rays
+
+    result = {
+        "scene": scene,
+        "horizontal_size": horizontal_size,
+        "vertical_size": vertical_size,
+        "objects": len(world.objects),
+        "workers": workers,
+        "backend": backend,
+        "use_bvh": use_bvh,
+        "binary": binary,
+        "repeat": repeat,
+        "render_seconds": render_seconds,
+        "intersect_seconds": timer.intersect_seconds if workers == 1 else None,
+        "shading_seconds": timer.shading_seconds if workers == 1 else None,
+        "output_seconds": output_seconds,
+        "primary_rays": primary_rays,
+        "shadow_rays": timer.shadow_rays if workers == 1 else None,
+        "rays_per_second": rays / render_seconds if render_seconds > 0 else None,
+        "peak_memory_bytes": None,
+    }
+
+    if measure_memory:
+        tracemalloc.start()
+        try:
+            camera.render(world=world, workers=workers, backend=backend).write_ppm(
+                file=io.BytesIO() if binary else io.StringIO(), binary=binary)
+            _, result["peak_memory_bytes"] = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    if collect_statistics:
+        with RenderStatistics() as statistics:
+            camera.render(world=world)
+        result["statistics"] = statistics.report()
+
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"],
+                              cwd=os.path.dirname(os.path.abspath(__file__)),
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              universal_newlines=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _workload_key(result):
+    # Results written before the backend was recorded have no backend, which
+    # is the same as letting Camera.render choose.
+    return (result["scene"], result["horizontal_size"], result["vertical_size"],
+            result["objects"], result["workers"], result.get("backend"),
+            result["use_bvh"])
+
+
+def compare(baseline, current):
+    """
+    Compare two sets of benchmark results.
+
+    :param baseline: The results document of the earlier run
+    :param current: The results document of the later run
+    :return: A list of (key, baseline rays/second, current rays/second, speedup)
+        tuples, one for every workload that appears in both documents
+    """
+    baseline_results = {_workload_key(result): result
+                        for result in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        key = _workload_key(result)
+        if key not in baseline_results:
+            continue
+
+        before = baseline_results[key]["rays_per_second"]
+        after = result["rays_per_second"]
+        comparisons.append((key, before, after,
+                            after / before if before and after else None))
+
+    return comparisons
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        description="Render the chapter scenes as benchmark workloads")
+    parser.add_argument("--scene", action="append", choices=sorted(SCENES),
+                        help="Scene to render (may be repeated, default is all)")
+    parser.add_argument("--width", type=int, default=200,
+                        help="Width of the image in pixels")
+    parser.add_argument("--height", type=int, default=100,
+                        help="Height of the image in pixels")
+    parser.add_argument("--spheres", type=int, action="append",
+                        help="Number of additional spheres (may be repeated, "
+                             "default is 0)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of render workers")
+    parser.add_argument("--backend", choices=("threads", "processes"),
+                        help="Kind of render workers (default is threads when "
+                             "the GIL is disabled and processes otherwise)")
+    parser.add_argument("--bvh", action="store_true",
+                        help="Render with a bounding volume hierarchy")
+    parser.add_argument("--binary", action="store_true",
+                        help="Measure writing binary (P6) rather than plain "
+                             "(P3) PPM")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of renders per workload; the fastest is "
+                             "reported")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not measure peak memory")
+    parser.add_argument("--statistics", action="store_true",
+                        help="Include render statistics (ray, intersection, "
+                             "and allocation counts) in the results")
+    parser.add_argument("--output", help="File to write the JSON results to "
+                                         "(default is standard output)")
+    parser.add_argument("--compare", help="JSON results of an earlier run to "
+                                          "compare against")
+    options = parser.parse_args(arguments)
+
+    results = []
+    for scene in options.scene or list(SCENES):
+        for additional_spheres in options.spheres or [0]:
+            result = run_workload(scene=scene,
+                                  horizontal_size=options.width,
+                                  vertical_size=options.height,
+                                  additional_spheres=additional_spheres,
+                                  workers=options.workers,
+                                  use_bvh=options.bvh,
+                                  binary=options.binary,
+                                  repeat=options.repeat,
+                                  measure_memory=not options.no_memory,
+                                  collect_statistics=options.statistics,
+                                  backend=options.backend)
+            results.append(result)
+            rays_per_second = result["rays_per_second"]
+            print("{}: {} objects, {} rays/s".format(
+                result["scene"], result["objects"],
+                "{:.0f}".format(rays_per_second)
+                if rays_per_second is not None else "n/a"),
+                file=sys.stderr)
+
+    document = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "peak_resident_kilobytes":
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None,
+        "results": results,
+    }
+
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(document, file, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
+
+    if options.compare:
+        with open(options.compare) as file:
+            baseline = json.load(file)
+        for key, before, after, speedup in compare(baseline=baseline,
+                                                   current=document):
+            print("{}: {:.0f} -> {:.0f} rays/s ({})".format(
+                key[0], before or 0, after or 0,
+                "{:.2f}x".format(speedup) if speedup else "n/a"),
+                file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
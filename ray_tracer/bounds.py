@@ -0,0 +1,149 @@
+import math
+
+from point import Point
+from util import Utilities
+
+
+class BoundingBox:
+    """
+    An axis-aligned bounding box.  Bounding boxes are used to quickly rule out
+    rays that cannot possibly intersect the shape(s) that the box encloses.
+    Boxes may extend infinitely in any direction (e.g., the bounds of a plane).
+    """
+    def __init__(self, minimum=None, maximum=None):
+        """
+        Initialize a BoundingBox object.
+
+        :param minimum: Point, the corner of the box with the smallest
+            coordinates.  If None, the box is empty.
+        :param maximum: Point, the corner of the box with the largest
+            coordinates.  If None, the box is empty.
+        """
+        # An empty box has its minimum at +infinity and its maximum at
+        # -infinity so that adding the first point makes the box just that
+        # point.
+        self._minimum = (minimum.x, minimum.y, minimum.z) \
+            if minimum else (math.inf, math.inf, math.inf)
+        self._maximum = (maximum.x, maximum.y, maximum.z) \
+            if maximum else (-math.inf, -math.inf, -math.inf)
+
+    @property
+    def minimum(self):
+        return Point(*self._minimum)
+
+    @property
+    def maximum(self):
+        return Point(*self._maximum)
+
+    @property
+    def is_empty(self):
+        return any(low > high for low, high in zip(self._minimum, self._maximum))
+
+    @property
+    def is_infinite(self):
+        return any(math.isinf(value) for value in self._minimum + self._maximum) \
+            and not self.is_empty
+
+    @property
+    def centroid(self):
+        return tuple((low + high) / 2
+                     for low, high in zip(self._minimum, self._maximum))
+
+    def add_point(self, x, y, z):
+        """
+        Grow the box, if necessary, so that it contains the point provided.
+
+        :param x: The x coordinate of the point
+        :param y: The y coordinate of the point
+        :param z: The z coordinate of the point
+        """
+        self._minimum = (min(self._minimum[0], x),
+                         min(self._minimum[1], y),
+                         min(self._minimum[2], z))
+        self._maximum = (max(self._maximum[0], x),
+                         max(self._maximum[1], y),
+                         max(self._maximum[2], z))
+
+    def merge(self, other):
+        """
+        Return a new box that contains both this box and the other box.
+
+        :param other: BoundingBox, the box to merge with this one
+        :return: BoundingBox, the box containing both boxes
+        """
+        merged = BoundingBox()
+        merged._minimum = tuple(map(min, self._minimum, other._minimum))
+        merged._maximum = tuple(map(max, self._maximum, other._maximum))
+
+        return merged
+
+    def transform(self, transformation):
+        """
+        Return the axis-aligned box that contains this box after the
+        transformation has been applied to it.
+
+        :param transformation: Matrix, the transformation to apply
+        :return: BoundingBox, the box containing the transformed box.  A box
+            that extends infinitely in any direction transforms to a box that
+            extends infinitely in every direction.
+        """
+        if self.is_empty:
+            return BoundingBox()
+
+        if self.is_infinite:
+            return BoundingBox(minimum=Point(x=-math.inf, y=-math.inf, z=-math.inf),
+                               maximum=Point(x=math.inf, y=math.inf, z=math.inf))
+
+        # Transform all eight corners of the box and find the box that
+        # contains all of them.
+        transformed = BoundingBox()
+        for x in (self._minimum[0], self._maximum[0]):
+            for y in (self._minimum[1], self._maximum[1]):
+                for z in (self._minimum[2], self._maximum[2]):
+                    corner = transformation * Point(x=x, y=y, z=z)
+                    transformed.add_point(corner.x, corner.y, corner.z)
+
+        return transformed
+
+    def intersects(self, origin, direction, minimum_time=-math.inf,
+                   maximum_time=math.inf):
+        """
+        Determine if a ray passes through the box between two times.
+
+        :param origin: The (x, y, z) origin of the ray
+        :param direction: The (x, y, z) direction of the ray
+        :param minimum_time: The earliest time along the ray of interest
+        :param maximum_time: The latest time along the ray of interest
+        :return: Boolean, True if the ray passes through the box, False
+            otherwise
+        """
+        # This is the "slab" method.  For each axis, compute the times at
+        # which the ray enters and exits the slab between the box's minimum
+        # and maximum on that axis.  The ray passes through the box if the
+        # latest entry is no later than the earliest exit.  The box is padded
+        # by EPSILON so that rays grazing a shape are not culled because of
+        # floating point inaccuracies.
+        for axis in range(3):
+            axis_origin = origin[axis]
+            axis_direction = direction[axis]
+            low = self._minimum[axis] - Utilities.EPSILON
+            high = self._maximum[axis] + Utilities.EPSILON
+
+            # A ray parallel to the slab passes through the box only if its
+            # origin is already between the slab's sides.
+            if axis_direction == 0:
+                if axis_origin < low or axis_origin > high:
+                    return False
+                continue
+
+            entry_time = (low - axis_origin) / axis_direction
+            exit_time = (high - axis_origin) / axis_direction
+            if entry_time > exit_time:
+                entry_time, exit_time = exit_time, entry_time
+
+            minimum_time = max(minimum_time, entry_time)
+            maximum_time = min(maximum_time, exit_time)
+            if minimum_time > maximum_time:
+                return False
+
+        return True
@@ -0,0 +1,221 @@
+import math
+
+
+class BoundingVolumeHierarchyNode:
+    """
+    A node in a bounding volume hierarchy.  Interior nodes have two children
+    and leaf nodes have a short list of shapes.  Every node has the bounding
+    box that encloses everything below it.
+    """
+    def __init__(self, bounds=None, children=None, shapes=None):
+        self.bounds = bounds
+        self.children = children if children else []
+        self.shapes = shapes if shapes else []
+
+    @property
+    def is_leaf(self):
+        return not self.children
+
+
+class BoundingVolumeHierarchy:
+    """
+    A binary tree of bounding boxes built over the world space bounds of a
+    list of shapes.  Rays are only tested against the shapes whose leaf boxes
+    they pass through, which turns testing a ray against every shape into
+    (roughly) logarithmic work in the number of shapes.
+
+    Shapes with infinite bounds (e.g., planes) would make every box they are
+    in infinite and must not be placed in the hierarchy.
+    """
+    def __init__(self, shapes=None, leaf_size=2):
+        """
+        Initialize a BoundingVolumeHierarchy object and build the tree.
+
+        :param shapes: The list of shapes, all with finite bounds, to build the
+            hierarchy over.
+        :param leaf_size: The maximum number of shapes in a leaf node
+        """
+        if leaf_size < 1:
+            raise ValueError("Leaf size must be at least 1")
+
+        self._shapes = list(shapes) if shapes else []
+        self._leaf_size = leaf_size
+        self._root = None
+        self.build()
+
+    @property
+    def shapes(self):
+        return self._shapes
+
+    @property
+    def root(self):
+        return self._root
+
+    def build(self):
+        """
+        (Re)build the tree from scratch.  This should be used when shapes have
+        been added or removed or when shapes have moved so much that refitting
+        would leave a poor tree.
+        """
+        entries = []
+        for shape in self._shapes:
+            bounds = shape.world_bounds()
+            if bounds.is_infinite:
+                raise ValueError("Shapes with infinite bounds cannot be placed "
+                                 "in a bounding volume hierarchy")
+            entries.append((shape, bounds, bounds.centroid))
+
+        self._root = self._build_node(entries) if entries else None
+
+    def _build_node(self, entries):
+        bounds = entries[0][1]
+        for _, shape_bounds, _ in entries[1:]:
+            bounds = bounds.merge(shape_bounds)
+
+        if len(entries) <= self._leaf_size:
+            return BoundingVolumeHierarchyNode(bounds=bounds,
+                                               shapes=[shape for shape, _, _ in entries])
+
+        # Split the shapes in half along the axis on which their centroids are
+        # the most spread out.
+        spreads = [max(entry[2][axis] for entry in entries) -
+                   min(entry[2][axis] for entry in entries)
+                   for axis in range(3)]
+        axis = spreads.index(max(spreads))
+        entries = sorted(entries, key=lambda entry: entry[2][axis])
+        middle = len(entries) // 2
+
+        return BoundingVolumeHierarchyNode(
+            bounds=bounds,
+            children=[self._build_node(entries[:middle]),
+                      self._build_node(entries[middle:])])
+
+    def refit(self):
+        """
+        Recompute the bounding boxes of every node from the current world space
+        bounds of the shapes, without changing the shape of the tree.  This is
+        cheaper than rebuilding and should be used when shapes' transforms have
+        changed.
+        """
+        if self._root:
+            self._refit_node(self._root)
+
+    def _refit_node(self, node):
+        if node.is_leaf:
+            bounds = node.shapes[0].world_bounds()
+            for shape in node.shapes[1:]:
+                bounds = bounds.merge(shape.world_bounds())
+        else:
+            bounds = self._refit_node(node.children[0])
+            for child in node.children[1:]:
+                bounds = bounds.merge(self._refit_node(child))
+
+        node.bounds = bounds
+
+        return bounds
+
+    def candidates(self, origin, direction, minimum_time=-math.inf,
+                   maximum_time=math.inf):
+        """
+        Find the shapes that a ray might intersect between two times.
+
+        :param origin: The (x, y, z) origin of the ray
+        :param direction: The (x, y, z) direction of the ray
+        :param minimum_time: The earliest time along the ray of interest
+        :param maximum_time: The latest time along the ray of interest
+        :return: A generator of the shapes whose leaf boxes the ray passes
+            through.  Since it is a generator, callers can stop traversing as
+            soon as they have found what they are looking for.
+        """
+        if self._root is None:
+            return
+
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if not node.bounds.intersects(origin, direction,
+                                          minimum_time, maximum_time):
+                continue
+
+            if node.is_leaf:
+                yield from node.shapes
+            else:
+                nodes.extend(reversed(node.children))
+
+    def nearest_hit(self, origin, direction, maximum_time=math.inf):
+        """
+        Find the nearest non-negative intersection of a ray with the shapes in
+        the hierarchy.  The nearest hit found so far is kept as the ray's
+        maximum time while the tree is walked, so any box that the ray only
+        enters beyond it is skipped along with everything in it.
+
+        :param origin: The (x, y, z) origin of the ray
+        :param direction: The (x, y, z) direction of the ray
+        :param maximum_time: The time at or beyond which intersections are
+            ignored, e.g., the time of a hit already found outside the
+            hierarchy
+        :return: A (time, shape) tuple for the nearest intersection before the
+            maximum time, or None if there is none
+        """
+        nearest = None
+        if self._root is None:
+            return nearest
+
+        nodes = [self._root]
+        while nodes:
+            node = nodes.pop()
+            if not node.bounds.intersects(origin, direction, 0, maximum_time):
+                continue
+
+            if node.is_leaf:
+                for shape in node.shapes:
+                    time = shape.hit_time(origin=origin,
+                                          direction=direction,
+                                          maximum_time=maximum_time)
+                    if time is not None:
+                        nearest = (time, shape)
+                        maximum_time = time
+            else:
+                nodes.extend(reversed(node.children))
+
+        return nearest
+
+    def packet_candidates(self, origins, directions, minimum_time=-math.inf,
+                          maximum_times=None):
+        """
+        Find, for a packet of rays, the shapes that each ray might intersect.
+
+        :param origins: A sequence of (x, y, z) tuples, the origins of the rays
+        :param directions: A sequence of (x, y, z) tuples, the directions of
+            the rays
+        :param minimum_time: The earliest time along the rays of interest
+        :param maximum_times: A sequence, parallel to origins, of the latest
+            time of interest along each ray.  If None, the rays are infinite.
+        :return: A generator of (shape, indices) tuples where indices is the
+            list of the indices of the rays in the packet that pass through
+            the shape's leaf box.
+        """
+        if self._root is None:
+            return
+
+        if maximum_times is None:
+            maximum_times = [math.inf] * len(origins)
+
+        # Walk the tree with the subset of the packet that reaches each node,
+        # dropping rays from the packet as soon as they miss a box.
+        nodes = [(self._root, range(len(origins)))]
+        while nodes:
+            node, indices = nodes.pop()
+            indices = [index for index in indices
+                       if node.bounds.intersects(origins[index],
+                                                 directions[index],
+                                                 minimum_time,
+                                                 maximum_times[index])]
+            if not indices:
+                continue
+
+            if node.is_leaf:
+                for shape in node.shapes:
+                    yield shape, indices
+            else:
+                nodes.extend((child, indices) for child in reversed(node.children))
@@ -1,12 +1,68 @@
 import math
+import os
+import sys
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 from canvas import Canvas
+from color import Color
 from matrix import Matrix
 from point import Point
 from ray import Ray
+from transformable import Transformable
 
+# The camera and world that a render worker process uses for every tile it is
+# asked to render.  These are set exactly once per worker process by the pool
+# initializer so that the scene is only shipped to each worker a single time
+# instead of once per tile.
+_worker_camera = None
+_worker_world = None
+
+
+def _initialize_worker(camera, world):
+    global _worker_camera
+    global _worker_world
+
+    _worker_camera = camera
+    _worker_world = world
+
+
+def _gil_enabled():
+    # sys._is_gil_enabled only exists in Python 3.13 and later.  Earlier
+    # versions always have the GIL.
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def _render_worker_tile(tile):
+    # Send the tile back as raw color components, which are much cheaper to
+    # pickle than Color objects.
+    values = array('d')
+    for color in _worker_camera.render_tile(world=_worker_world, tile=tile):
+        values.append(color.red)
+        values.append(color.green)
+        values.append(color.blue)
+
+    return tile, values
+
+
+class Camera(Transformable):
+    DEFAULT_TILE_SIZE = 32
+
+    # The ways a render can be spread over several workers.  Threads share
+    # the scene and the canvas, but only run in parallel on free-threaded
+    # builds of Python (i.e., with the GIL disabled).  Processes run in
+    # parallel on any build, but each gets its own copy of the scene and
+    # sends its tiles back to be copied into the canvas.
+    BACKEND_THREADS = "threads"
+    BACKEND_PROCESSES = "processes"
+
+    # The number of pixels whose sub-pixel samples are traced as one packet
+    # when rendering adaptively.
+    ADAPTIVE_PACKET_PIXELS = 64
 
-class Camera:
     def __init__(self,
                  horizontal_size=100,
                  vertical_size=100,
@@ -17,12 +73,6 @@ class Camera:
         self._field_of_view = field_of_view
         self.transform = transform if transform else Matrix.identity(dimensions=4)
 
-        # Sine we are likely to perform multiple calculations with this camera,
-        # go ahead and cache the inverse of the transform as well as the
-        # transformed origin.
-        self._inverse_transform = self._transform.inverse()
-        self._origin = self._inverse_transform * Point(x=0, y=0, z=0)
-
         half_view = math.tan(self._field_of_view / 2)
         aspect = self._horizontal_size / self._vertical_size
 
@@ -47,39 +97,40 @@ class Camera:
     def field_of_view(self):
         return self._field_of_view
 
-    @property
-    def transform(self):
-        return self._transform
-
-    @transform.setter
-    def transform(self, value):
-        self._transform = value
+    def _set_transform_cache(self, transform, inverse_transform,
+                             inverse_transform_transpose=None):
+        super()._set_transform_cache(
+            transform=transform,
+            inverse_transform=inverse_transform,
+            inverse_transform_transpose=inverse_transform_transpose)
 
         # Sine we are likely to perform multiple calculations with this camera,
-        # go ahead and cache the inverse of the transform as well as the
-        # transformed origin.
-        self._inverse_transform = self._transform.inverse()
+        # go ahead and cache the transformed origin as well.
         self._origin = self._inverse_transform * Point(x=0, y=0, z=0)
 
     @property
     def pixel_size(self):
         return self._pixel_size
 
-    def ray_for_pixel(self, x=0, y=0):
+    def ray_for_pixel(self, x=0, y=0, sub_pixel_x=0.5, sub_pixel_y=0.5):
         """
         Given the coordinates (x,y) of a pixel on a canvas, compute the ray that
         goes from the camera through the pixel on the canvas.
 
         :param x: Integer, the x coordinate of the pixel on the canvas
         :param y: Integer, the y coordinate of the pixel on the canvas
+        :param sub_pixel_x: Float in [0, 1), where within the pixel, from its
+            left edge, the ray passes.  The default is the center of the pixel.
+        :param sub_pixel_y: Float in [0, 1), where within the pixel, from its
+            top edge, the ray passes.  The default is the center of the pixel.
         :return: Ray, the ray that starts at the camera and goes through the
                       pixel on the canvas.  The direction component of the ray
                       will be normalized.
         """
-        # Compute the offset, from the edge of the canvas, to the center of the
-        # pixel
-        x_offset = (x + 0.5) * self._pixel_size
-        y_offset = (y + 0.5) * self._pixel_size
+        # Compute the offset, from the edge of the canvas, to the point within
+        # the pixel (by default, its center)
+        x_offset = (x + sub_pixel_x) * self._pixel_size
+        y_offset = (y + sub_pixel_y) * self._pixel_size
 
         # Compute the untransformed coordinates of the pixel in world space.
         # Since the camera looks toward -z in untransformed world, +x is to the
@@ -90,28 +141,397 @@ class Camera:
         # Using the camera's matrix, transform the canvas point (remember that
         # canvas is at z=-1).  Then compute the ray's  direction (i.e., from
         # origin to pixel, and normalize it.
-        pixel = self._inverse_transform * Point(x=world_x, y=world_y, z=-1)
+        pixel = self.inverse_transform * Point(x=world_x, y=world_y, z=-1)
         direction = (pixel - self._origin).normalize()
 
         return Ray(origin=self._origin, direction=direction)
 
-    def render(self, world):
+    def rays_for_pixels(self, pixels):
+        """
+        Given the coordinates of a number of pixels on a canvas, compute the
+        packet of rays that go from the camera through the pixels on the
+        canvas.  Each ray is the same as the one that ray_for_pixel returns,
+        but is described by raw components instead of a Ray object.
+
+        :param pixels: A sequence of (x, y) pixel coordinates
+        :return: A tuple of two lists, parallel to pixels, of (x, y, z)
+            tuples.  The first is the origin of each ray and the second is the
+            normalized direction of each ray.
+        """
+        return self.rays_for_samples(samples=[(x + 0.5, y + 0.5)
+                                              for x, y in pixels])
+
+    def rays_for_samples(self, samples):
+        """
+        Given a number of points on a canvas, compute the packet of rays that
+        go from the camera through those points.  Unlike rays_for_pixels, the
+        points are not restricted to pixel centers: canvas coordinates are
+        continuous, with pixel (x, y) covering [x, x + 1) x [y, y + 1).
+
+        :param samples: A sequence of (x, y) canvas coordinates
+        :return: A tuple of two lists, parallel to samples, of (x, y, z)
+            tuples.  The first is the origin of each ray and the second is the
+            normalized direction of each ray.
+        """
+        m00, m01, m02, m03, \
+            m10, m11, m12, m13, \
+            m20, m21, m22, m23 = self.inverse_transform_values
+        origin = (self._origin.x, self._origin.y, self._origin.z)
+        origin_x, origin_y, origin_z = origin
+
+        origins = []
+        directions = []
+        for x, y in samples:
+            # This mirrors ray_for_pixel: find the point in untransformed world
+            # space, transform it with the camera's matrix (remember that the
+            # canvas is at z=-1) and normalize the vector from the origin to it.
+            world_x = self._half_width - x * self._pixel_size
+            world_y = self._half_height - y * self._pixel_size
+
+            direction_x = (m00 * world_x + m01 * world_y - m02 + m03) - origin_x
+            direction_y = (m10 * world_x + m11 * world_y - m12 + m13) - origin_y
+            direction_z = (m20 * world_x + m21 * world_y - m22 + m23) - origin_z
+            magnitude = math.sqrt(direction_x * direction_x +
+                                  direction_y * direction_y +
+                                  direction_z * direction_z)
+
+            origins.append(origin)
+            directions.append((direction_x / magnitude,
+                               direction_y / magnitude,
+                               direction_z / magnitude))
+
+        return origins, directions
+
+    def tiles(self, tile_size=DEFAULT_TILE_SIZE):
+        """
+        Split the camera's canvas into rectangular tiles.  Tiles along the right
+        and bottom edges are clipped to the canvas and may be smaller than the
+        requested tile size.
+
+        :param tile_size: Integer, the width and height, in pixels, of a tile
+        :return: A generator of (x, y, width, height) tuples, in row-major
+            order, where (x, y) is the upper left pixel of the tile.
+        """
+        if tile_size <= 0:
+            raise ValueError("Tile size must be greater than 0")
+
+        for y in range(0, self._vertical_size, tile_size):
+            for x in range(0, self._horizontal_size, tile_size):
+                yield (x,
+                       y,
+                       min(tile_size, self._horizontal_size - x),
+                       min(tile_size, self._vertical_size - y))
+
+    def render_tile(self, world, tile, observer=None):
+        """
+        Render a single tile of the camera's view of the world.
+
+        :param world: World, the world to render
+        :param tile: The (x, y, width, height) tuple describing the tile, as
+            produced by the tiles method
+        :param observer: PacketObserver, if not None, told about the packets
+            of rays traced for the tile
+        :return: A list of Color objects, one for each pixel in the tile, in
+            row-major order.
+        """
+        x_start, y_start, width, height = tile
+
+        origins, directions = \
+            self.rays_for_pixels(pixels=[(x, y)
+                                         for y in range(y_start, y_start + height)
+                                         for x in range(x_start, x_start + width)])
+
+        return world.color_at_packet(origins=origins,
+                                     directions=directions,
+                                     observer=observer)
+
+    def render(self, world, workers=1, tile_size=DEFAULT_TILE_SIZE, backend=None,
+               observer=None):
         """
         Given a world, render it using the camera's view of the world onto a
         canvas.
 
         :param world: World, the world to render
+        :param workers: Integer, the number of workers to use.  If 1, the world
+            is rendered serially in this thread.  If None, one worker per CPU
+            is used.
+        :param tile_size: Integer, the width and height, in pixels, of the
+            tiles that are handed out to workers.  Ignored when rendering
+            serially.
+        :param backend: The kind of workers to use, BACKEND_THREADS or
+            BACKEND_PROCESSES.  If None, threads are used when the GIL is
+            disabled and processes otherwise.  Ignored when rendering
+            serially.
+        :param observer: PacketObserver, if not None, told about every packet
+            of rays traced.  Observers are not shared between workers, so one
+            can only be given when rendering serially.
         :return: Canvas, a canvas representing the pixels for the image that
                          represents rendering the world from the camera's view.
         """
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers < 1:
+            raise ValueError("Number of workers must be at least 1")
+
+        if workers > 1 and observer is not None:
+            raise ValueError("An observer can only be used when rendering serially")
+
+        if backend is None:
+            backend = self.BACKEND_PROCESSES if _gil_enabled() else self.BACKEND_THREADS
+        elif backend not in (self.BACKEND_THREADS, self.BACKEND_PROCESSES):
+            raise ValueError("Unknown render backend {}".format(backend))
+
+        if workers > 1:
+            if backend == self.BACKEND_THREADS:
+                return self._render_threaded(world=world,
+                                             workers=workers,
+                                             tile_size=tile_size)
+
+            return self._render_parallel(world=world,
+                                         workers=workers,
+                                         tile_size=tile_size)
+
         image = Canvas(width=self._horizontal_size, height=self._vertical_size)
-        # For every pixel in the canvas, compute the ray from the camera to the
-        # pixel on the canvas and then figure out the color of the pixel as the
-        # ray passes through the world
+        # For every row of pixels in the canvas, compute the packet of rays
+        # from the camera to the pixels on the row and then figure out the
+        # colors of the pixels as the rays pass through the world
         for y in range(self._vertical_size):
-            for x in range(self._horizontal_size):
-                ray = self.ray_for_pixel(x=x, y=y)
-                color = world.color_at(ray=ray)
-                image.set_pixel(x=x, y=y, color=color)
+            origins, directions = \
+                self.rays_for_pixels(pixels=[(x, y)
+                                             for x in range(self._horizontal_size)])
+            image.set_row(y=y,
+                          colors=world.color_at_packet(origins=origins,
+                                                       directions=directions,
+                                                       observer=observer))
+
+        return image
+
+    def render_progressive(self, world, initial_step=8):
+        """
+        Render the world in a series of coarse-to-fine passes so that a preview
+        of the image is available long before the render is complete.
+
+        The first pass renders every initial_step-th pixel in each direction
+        and fills the block of pixels to the right of and below each rendered
+        pixel with its color.  Every following pass halves the step, renders
+        only the pixels on the finer grid that have not been rendered yet, and
+        fills their (smaller) blocks.  The final pass has a step of 1, after
+        which every pixel has been rendered exactly once and the canvas is
+        identical to the one render would produce.
+
+        :param world: World, the world to render
+        :param initial_step: Integer, the spacing, in pixels, between the
+            pixels rendered in the first pass
+        :return: A generator of (step, canvas) tuples, one for each pass.  The
+            same canvas object is updated in place by each pass, so it should
+            be written out (e.g., with Canvas.write_ppm) or copied (with
+            Canvas.copy) before advancing the generator if a preview of that
+            pass is wanted.
+        """
+        if initial_step < 1:
+            raise ValueError("Initial step must be at least 1")
+
+        width = self._horizontal_size
+        height = self._vertical_size
+        image = Canvas(width=width, height=height)
+        finished = bytearray(width * height)
+
+        step = initial_step
+        while True:
+            for y in range(0, height, step):
+                pixels = [(x, y) for x in range(0, width, step)
+                          if not finished[y * width + x]]
+                if not pixels:
+                    continue
+
+                origins, directions = self.rays_for_pixels(pixels=pixels)
+                colors = world.color_at_packet(origins=origins,
+                                               directions=directions)
+
+                for (x, _), color in zip(pixels, colors):
+                    image.set_pixel(x=x, y=y, color=color)
+                    finished[y * width + x] = 1
+
+                    # Fill in the rest of the pixel's block, skipping any
+                    # pixels that have already been rendered exactly
+                    for block_y in range(y, min(y + step, height)):
+                        for block_x in range(x, min(x + step, width)):
+                            if not finished[block_y * width + block_x]:
+                                image.set_pixel(x=block_x, y=block_y, color=color)
+
+            yield step, image
+
+            if step == 1:
+                break
+            step = max(1, step // 2)
+
+    def render_adaptive(self, world, threshold=0.1, max_samples=16):
+        """
+        Render the world with adaptive supersampling anti-aliasing.  Every pixel
+        is first rendered with a single ray through its center, exactly as
+        render does.  Then only the pixels whose color differs from a
+        neighboring pixel's by more than the threshold, i.e., the pixels on
+        edges and pattern boundaries, are resampled with a 2x2 grid of rays
+        spread over the pixel.  Any of those whose samples still differ from
+        each other by more than the threshold are resampled with a 4x4 grid,
+        and so on, until the grid would have more than max_samples rays.  A
+        resampled pixel's color is the average of its finest grid of samples.
+
+        :param world: World, the world to render
+        :param threshold: Float, the largest difference in any color component
+            between samples that is not considered an edge
+        :param max_samples: Integer, the most rays that are cast through any one
+            pixel in a single grid.  Values below 4 turn off anti-aliasing.
+        :return: A tuple of the Canvas and a dictionary reporting the samples
+            spent, with the keys:
+            - pixels: the number of pixels in the image
+            - refined_pixels: the number of pixels that were resampled
+            - samples: the total number of rays cast from the camera
+            - samples_per_pixel: samples divided by pixels
+            - supersampling_samples: the number of rays that supersampling
+              every pixel with the finest grid allowed would have cast
+            - pixels_by_samples: a dictionary mapping the size of each pixel's
+              final grid of samples (1 for pixels that were not resampled) to
+              the number of pixels that ended up with that many samples
+        """
+        if threshold < 0:
+            raise ValueError("Threshold must not be negative")
+        if max_samples < 1:
+            raise ValueError("Maximum samples must be at least 1")
+
+        width = self._horizontal_size
+        height = self._vertical_size
+        image = self.render(world=world)
+        values = image.buffer
+
+        # Mark the pixels that differ from their right or bottom neighbor by
+        # more than the threshold, and that neighbor as well.  This has to be
+        # done before any pixel is resampled so that every comparison is made
+        # between center samples.
+        marked = bytearray(width * height)
+        for y in range(height):
+            for x in range(width):
+                pixel = y * width + x
+                for neighbor in ((pixel + 1) if x + 1 < width else None,
+                                 (pixel + width) if y + 1 < height else None):
+                    if neighbor is None:
+                        continue
+
+                    first = pixel * 3
+                    second = neighbor * 3
+                    if abs(values[first] - values[second]) > threshold or \
+                            abs(values[first + 1] - values[second + 1]) > threshold or \
+                            abs(values[first + 2] - values[second + 2]) > threshold:
+                        marked[pixel] = 1
+                        marked[neighbor] = 1
+
+        pending = [(x, y) for y in range(height) for x in range(width)
+                   if marked[y * width + x]]
+
+        samples = width * height
+        refined_pixels = len(pending) if max_samples >= 4 else 0
+        pixels_by_samples = {1: width * height}
+
+        side = 2
+        while pending and side * side <= max_samples:
+            count = side * side
+            offsets = [((column + 0.5) / side, (row + 0.5) / side)
+                       for row in range(side)
+                       for column in range(side)]
+
+            pixels_by_samples[count // 4] -= len(pending)
+            pixels_by_samples[count] = len(pending)
+            samples += len(pending) * count
+
+            still_pending = []
+            for start in range(0, len(pending), self.ADAPTIVE_PACKET_PIXELS):
+                pixels = pending[start:start + self.ADAPTIVE_PACKET_PIXELS]
+                origins, directions = self.rays_for_samples(
+                    samples=[(x + offset_x, y + offset_y)
+                             for x, y in pixels
+                             for offset_x, offset_y in offsets])
+                colors = world.color_at_packet(origins=origins,
+                                               directions=directions)
+
+                for index, (x, y) in enumerate(pixels):
+                    pixel_colors = colors[index * count:(index + 1) * count]
+                    reds = [color.red for color in pixel_colors]
+                    greens = [color.green for color in pixel_colors]
+                    blues = [color.blue for color in pixel_colors]
+                    image.set_pixel(x=x, y=y, color=Color(red=sum(reds) / count,
+                                                          green=sum(greens) / count,
+                                                          blue=sum(blues) / count))
+
+                    if max(reds) - min(reds) > threshold or \
+                            max(greens) - min(greens) > threshold or \
+                            max(blues) - min(blues) > threshold:
+                        still_pending.append((x, y))
+
+            pending = still_pending
+            side *= 2
+
+        finest = 1
+        while (finest * 2) ** 2 <= max_samples:
+            finest *= 2
+
+        return image, {
+            "pixels": width * height,
+            "refined_pixels": refined_pixels,
+            "samples": samples,
+            "samples_per_pixel": samples / (width * height),
+            "supersampling_samples": width * height * finest * finest,
+            "pixels_by_samples": pixels_by_samples,
+        }
+
+    def _render_parallel(self, world, workers, tile_size):
+        image = Canvas(width=self._horizontal_size, height=self._vertical_size)
+
+        # Hand the camera and world to each worker process once, when the
+        # worker starts, and then only send the (small) tile descriptions back
+        # and forth.  Each tile is rendered exactly as it would be serially, so
+        # the assembled image is identical to the serial render.
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_initialize_worker,
+                                 initargs=(self, world)) as executor:
+            for tile, values in executor.map(_render_worker_tile,
+                                             self.tiles(tile_size=tile_size)):
+                x_start, y_start, width, height = tile
+                image.set_tile_values(x=x_start,
+                                      y=y_start,
+                                      width=width,
+                                      height=height,
+                                      values=values)
+
+        return image
+
+    def _render_threaded(self, world, workers, tile_size):
+        image = Canvas(width=self._horizontal_size, height=self._vertical_size)
+
+        # The threads share the camera and world, which rendering only reads
+        # once every cached value in them is up to date, and each thread
+        # writes the tiles it renders straight into the one canvas.  The lock
+        # only covers copying a finished tile into the canvas.  Each tile is
+        # rendered exactly as it would be serially, so the image is identical
+        # to the serial render.
+        self.prepare()
+        world.prepare()
+        lock = threading.Lock()
+
+        def render_tile(tile):
+            colors = self.render_tile(world=world, tile=tile)
+            x_start, y_start, width, height = tile
+            with lock:
+                image.set_tile(x=x_start,
+                               y=y_start,
+                               width=width,
+                               height=height,
+                               colors=colors)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Consume the results so that an exception raised by any tile is
+            # raised here.
+            for _ in executor.map(render_tile, self.tiles(tile_size=tile_size)):
+                pass
 
         return image
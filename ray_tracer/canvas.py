@@ -1,7 +1,21 @@
+import io
+from array import array
+
 from color import Color
+from ppm import PPMWriter
 
 class Canvas:
-    def __init__(self, width=0, height=0):
+    def __init__(self, width=0, height=0, buffer=None):
+        """
+        Initialize a Canvas object.
+
+        :param width: The width of the canvas in pixels
+        :param height: The height of the canvas in pixels
+        :param buffer: An optional writable buffer (e.g., a bytearray or shared
+            memory) of width * height * 3 doubles to use as the canvas's
+            storage instead of allocating new storage.  The canvas reads and
+            writes the buffer in place.
+        """
         if width <= 0:
             raise ValueError("Width must be greater than 0")
         if height <= 0:
@@ -10,12 +24,16 @@ class Canvas:
         self._width = width
         self._height = height
 
-        # A canvas will be a list, with height lists, each with width Color
-        # objects to represent the color at a particular pixel.  So, later
-        # when accessing the lists, the y coordinate will represent the first
-        # dimension and the x coordinate the second dimension
-        self._canvas = [[Color(red=0, blue=0, green=0) for _ in range(width)]
-                        for _ in range(height)]
+        # A canvas is a single contiguous block of doubles, three (red, green,
+        # blue) for each pixel, one row after another.  So the color components
+        # of the pixel at (x, y) start at index (y * width + x) * 3.  This keeps
+        # a large canvas from being millions of individual Color objects.
+        if buffer is None:
+            buffer = array('d', bytes(width * height * 3 * array('d').itemsize))
+
+        self._pixels = memoryview(buffer).cast('B').cast('d')
+        if len(self._pixels) != width * height * 3:
+            raise ValueError("Buffer must hold {} values".format(width * height * 3))
 
     @property
     def width(self):
@@ -40,61 +58,157 @@ class Canvas:
         if y < 0 or y >= self._height:
             raise ValueError("Y coordinate is out of bounds")
 
+    def _validate_tile(self, x=0, y=0, width=0, height=0):
+        self._validate_coordinates(x=x, y=y)
+        self._validate_coordinates(x=x + width - 1, y=y + height - 1)
+
+    @property
+    def buffer(self):
+        """
+        A zero-copy view of the canvas's storage, width * height * 3 doubles
+        with the red, green, and blue components of each pixel, one row after
+        another.  Writing to the view changes the canvas.
+        """
+        return self._pixels
+
+    def copy(self):
+        """
+        Copy the canvas.  The copy has its own storage, even if this canvas
+        uses a buffer that was passed in, so changing either canvas does not
+        change the other.
+
+        :return: Canvas, the copy
+        """
+        return Canvas(width=self._width,
+                      height=self._height,
+                      buffer=array('d', self._pixels.tobytes()))
+
+    # A memoryview can be neither pickled nor copied, so the state of a canvas
+    # holds a copy of its pixels in an array instead.  Restoring it gives the
+    # canvas its own storage, which also keeps copy.copy from sharing the
+    # pixels of the original.
+
+    def __getstate__(self):
+        return {"width": self._width,
+                "height": self._height,
+                "pixels": array('d', self._pixels.tobytes())}
+
+    def __setstate__(self, state):
+        self._width = state["width"]
+        self._height = state["height"]
+        self._pixels = memoryview(state["pixels"]).cast('B').cast('d')
+
     def get_pixel(self, x=0, y=0):
         self._validate_coordinates(x=x, y=y)
 
-        return self._canvas[y][x]
+        index = (y * self._width + x) * 3
+        return Color(red=self._pixels[index],
+                     green=self._pixels[index + 1],
+                     blue=self._pixels[index + 2])
 
     def set_pixel(self, x=0, y=0, color=Color()):
         self._validate_coordinates(x=x, y=y)
 
-        # When inserting, we are going to create a new color object as storing
-        # the reference provided would be bad if the caller modifies the
-        # referenced color object
-        self._canvas[y][x] = Color(red=color.red,
-                                   blue=color.blue,
-                                   green=color.green)
+        # The color's components are copied into the canvas's storage, so the
+        # caller is free to modify the color object afterward.
+        index = (y * self._width + x) * 3
+        self._pixels[index] = color.red
+        self._pixels[index + 1] = color.green
+        self._pixels[index + 2] = color.blue
+
+    def set_row(self, y=0, colors=None):
+        """
+        Set every pixel in a row of the canvas.
+
+        :param y: The row to set
+        :param colors: A sequence of width Color objects, one for each pixel in
+            the row from left to right
+        """
+        self.set_tile(x=0, y=y, width=self._width, height=1, colors=colors)
+
+    def set_tile(self, x=0, y=0, width=0, height=0, colors=None):
+        """
+        Set every pixel in a rectangular tile of the canvas.
+
+        :param x: The x coordinate of the upper left pixel of the tile
+        :param y: The y coordinate of the upper left pixel of the tile
+        :param width: The width of the tile in pixels
+        :param height: The height of the tile in pixels
+        :param colors: A sequence of width * height Color objects, one for
+            each pixel in the tile in row-major order
+        """
+        values = array('d')
+        for color in colors:
+            values.append(color.red)
+            values.append(color.green)
+            values.append(color.blue)
+
+        self.set_tile_values(x=x, y=y, width=width, height=height, values=values)
+
+    def set_tile_values(self, x=0, y=0, width=0, height=0, values=None):
+        """
+        Set every pixel in a rectangular tile of the canvas from raw color
+        components.
+
+        :param x: The x coordinate of the upper left pixel of the tile
+        :param y: The y coordinate of the upper left pixel of the tile
+        :param width: The width of the tile in pixels
+        :param height: The height of the tile in pixels
+        :param values: A sequence of width * height * 3 floats, the red, green,
+            and blue components of each pixel in the tile in row-major order
+        """
+        self._validate_tile(x=x, y=y, width=width, height=height)
+        if len(values) != width * height * 3:
+            raise ValueError("Tile needs {} values".format(width * height * 3))
+
+        if not isinstance(values, array) or values.typecode != 'd':
+            values = array('d', values)
+
+        # Copy the tile into the canvas one row at a time.  Each row of the
+        # tile is contiguous in both the tile and the canvas.
+        row_length = width * 3
+        for row in range(height):
+            start = ((y + row) * self._width + x) * 3
+            self._pixels[start:start + row_length] = \
+                values[row * row_length:(row + 1) * row_length]
 
     def to_ppm(self):
-        header = "P3\n{} {}\n255".format(self._width, self._height)
-
-        # Walk through each row and convert the colors to a line of text of
-        # 3-tuples with spaces between values and a newline at the end of each
-        # row.  Limit line length, not including newline, to 70 characters
-        pixel_text = []
+        """
+        Convert the canvas to a plain (P3) PPM image.
+
+        :return: String, the text of the PPM image
+        """
+        text = io.StringIO()
+        self.write_ppm(file=text)
+
+        return text.getvalue()
+
+    def to_ppm_binary(self):
+        """
+        Convert the canvas to a binary (P6) PPM image.
+
+        :return: Bytes, the contents of the PPM image
+        """
+        data = io.BytesIO()
+        self.write_ppm(file=data, binary=True)
+
+        return data.getvalue()
+
+    def write_ppm(self, file, binary=False):
+        """
+        Write the canvas to a file as a PPM image, one row at a time, without
+        building the whole image in memory first.
+
+        :param file: The file object to write to.  It must be opened in text
+            mode for a plain image and binary mode for a binary image.
+        :param binary: If True, write a binary (P6) image.  Otherwise write a
+            plain (P3) image.
+        """
+        writer = PPMWriter(file=file,
+                           width=self._width,
+                           height=self._height,
+                           binary=binary)
+
+        row_length = self._width * 3
         for y in range(self._height):
-            y_text = []
-            for x in range(self._width):
-                y_text.append("{}".format(self._canvas[y][x]))
-            y_text = " ".join(y_text)
-
-            # If the line is 70 or fewer characters in length, then just append
-            # the line to the lines we have created.  Otherwise...break the
-            # lines...
-            if len(y_text) <= 70:
-                pixel_text.append(y_text)
-            else:
-                # Note we assume well-formed lines.  A line of all spaces
-                # would break this.
-
-                # While there are more than 70 characters left in the line,
-                # starting at character 71, walk backwards until we get to a
-                # space.  Slice the string so that the front part (from
-                # beginning to the last character before the space) is added
-                # to the list of lines we already have and the back part (from
-                # the first character after the space until the end is re-
-                # assigned to the line we are working on.
-                while len(y_text) > 70:
-                    index = 70
-                    while y_text[index] != ' ':
-                        index -= 1
-                    pixel_text.append(y_text[:index])
-                    y_text = y_text[index + 1:]
-
-                # Append anything left over to the list of lines we are
-                # accumulating.
-                pixel_text.append(y_text)
-
-        # Combine the header plus each of the accumulated lines joined by a
-        # newline to be the resulting PPM data.
-        return "{}\n{}\n".format(header, "\n".join(pixel_text))
\ No newline at end of file
+            writer.write_row(self._pixels[y * row_length:(y + 1) * row_length])
@@ -2,34 +2,15 @@ from util import Utilities
 
 
 class Color():
-    def __init__(self, red=0.0, green=0.0, blue=0.0):
-        self._red = red
-        self._green = green
-        self._blue = blue
-
-    @property
-    def red(self):
-        return self._red
-
-    @red.setter
-    def red(self, value):
-        self._red = value
-
-    @property
-    def green(self):
-        return self._green
+    # Colors are created for every ray that is shaded, so the components are
+    # stored in slots, rather than a per-instance dictionary, and are plain
+    # attributes rather than properties.
+    __slots__ = ('red', 'green', 'blue')
 
-    @green.setter
-    def green(self, value):
-        self._green = value
-
-    @property
-    def blue(self):
-        return self._blue
-
-    @blue.setter
-    def blue(self, value):
-        self._blue = value
+    def __init__(self, red=0.0, green=0.0, blue=0.0):
+        self.red = red
+        self.green = green
+        self.blue = blue
 
     @staticmethod
     def _clamp_color_value(value):
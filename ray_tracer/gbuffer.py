@@ -0,0 +1,261 @@
+from array import array
+
+from canvas import Canvas
+from intersections import Computations
+from tuple import Tuple
+
+
+class GBuffer:
+    """
+    A geometry buffer: for every pixel of a camera's view of a world, what the
+    pixel's primary ray hit, i.e., everything about the hit that does not
+    depend on the lights or on the materials.  Shading only needs the hit,
+    the lights, and the materials, so once the buffer has been captured, the
+    image can be lit again after the lights or the materials have been edited
+    without tracing a single primary ray.
+
+    Whether a pixel is in a light's shadow only depends on where the light is,
+    so the buffer also keeps a shadow mask for each light position, recording
+    for each pixel whether it is lit, in shadow, or not yet known.  The masks
+    are filled in for the world's lights when the buffer is captured, and
+    relighting reuses them, so editing materials or the color or intensity of
+    the lights casts no shadow rays at all.  Shadow rays are only cast for
+    lights that were moved or added, and only the masks for the lights being
+    relit are kept.
+
+    The buffer is kept as a structure of arrays: each attribute of the hits is
+    a flat array of doubles with the x, y, and z components of each pixel's
+    value next to each other, so that a large buffer takes little memory and
+    no objects are kept per pixel.  The shape hit by each pixel is kept as an
+    index into the list of shapes hit, with -1 for pixels whose ray hit
+    nothing.
+
+    The buffer records the shapes, not their materials, so relighting uses
+    each shape's material as it is when relighting.  Moving, adding, or
+    removing objects or moving the camera changes what the primary rays hit
+    (and which pixels are in shadow), so a new buffer has to be captured after
+    any of those.
+    """
+    # The number of pixels shaded as one packet when relighting
+    RELIGHT_PACKET_PIXELS = 256
+
+    # The state of a pixel in a shadow mask
+    _SHADOW_UNKNOWN = 0
+    _LIT = 1
+    _SHADOWED = 2
+
+    def __init__(self, width, height):
+        """
+        Initialize an empty GBuffer object, in which every pixel's ray hits
+        nothing.
+
+        :param width: Integer, the width of the buffer in pixels
+        :param height: Integer, the height of the buffer in pixels
+        """
+        if width <= 0 or height <= 0:
+            raise ValueError("Width and height must be greater than 0")
+
+        self._width = width
+        self._height = height
+        pixels = width * height
+        self._shape_indices = array('i', [-1]) * pixels
+        self._positions = array('d', bytes(8 * 3 * pixels))
+        self._normals = array('d', bytes(8 * 3 * pixels))
+        self._eyes = array('d', bytes(8 * 3 * pixels))
+        self._over_positions = array('d', bytes(8 * 3 * pixels))
+        self._inside = bytearray(pixels)
+        self._shapes = []
+        # The shadow masks, keyed by the (x, y, z) position of the light
+        self._shadow_masks = {}
+
+    @staticmethod
+    def capture(world, camera):
+        """
+        Trace the primary ray for every pixel of the camera's view of the world
+        and record what it hit.
+
+        :param world: World, the world to capture
+        :param camera: Camera, the camera to capture the world with
+        :return: GBuffer, the captured buffer
+        """
+        gbuffer = GBuffer(width=camera.horizontal_size, height=camera.vertical_size)
+        shape_indices = {}
+        for y in range(camera.vertical_size):
+            origins, directions = \
+                camera.rays_for_pixels(pixels=[(x, y)
+                                               for x in range(camera.horizontal_size)])
+            for x, hit in enumerate(world.hit_packet(origins=origins,
+                                                     directions=directions)):
+                if hit is None:
+                    continue
+
+                time, shape = hit
+                index = shape_indices.get(id(shape))
+                if index is None:
+                    index = shape_indices[id(shape)] = len(gbuffer._shapes)
+                    gbuffer._shapes.append(shape)
+
+                gbuffer._record(pixel=y * gbuffer._width + x,
+                                shape_index=index,
+                                computations=Computations.for_hit(
+                                    time=time,
+                                    shape=shape,
+                                    origin=origins[x],
+                                    direction=directions[x]))
+
+        gbuffer._shade(world=world, buffer=None)
+
+        return gbuffer
+
+    def _record(self, pixel, shape_index, computations):
+        self._shape_indices[pixel] = shape_index
+        offset = pixel * 3
+        for values, value in ((self._positions, computations.position),
+                              (self._normals, computations.normal),
+                              (self._eyes, computations.eye),
+                              (self._over_positions, computations.over_position)):
+            values[offset] = value.x
+            values[offset + 1] = value.y
+            values[offset + 2] = value.z
+        self._inside[pixel] = 1 if computations.inside else 0
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def shapes(self):
+        # The shapes hit by at least one pixel
+        return list(self._shapes)
+
+    @property
+    def hits(self):
+        # The number of pixels whose ray hit something
+        return sum(1 for index in self._shape_indices if index >= 0)
+
+    def shape_at(self, x, y):
+        """
+        :return: The shape hit by the pixel's ray, or None if it hit nothing
+        """
+        if not 0 <= x < self._width or not 0 <= y < self._height:
+            raise ValueError("Pixel ({}, {}) is outside the buffer".format(x, y))
+
+        index = self._shape_indices[y * self._width + x]
+
+        return self._shapes[index] if index >= 0 else None
+
+    def computations_at(self, pixel):
+        """
+        Rebuild the computations for a pixel's hit from the buffer.
+
+        :param pixel: Integer, the index of the pixel, i.e., y * width + x
+        :return: Computations, the same computations (apart from the time)
+            that shading the hit during a render uses, or None if the pixel's
+            ray hit nothing
+        """
+        index = self._shape_indices[pixel]
+        if index < 0:
+            return None
+
+        offset = pixel * 3
+        positions = self._positions
+        normals = self._normals
+        eyes = self._eyes
+        over_positions = self._over_positions
+
+        computations = Computations(
+            shape=self._shapes[index],
+            position=Tuple._make(positions[offset], positions[offset + 1],
+                                 positions[offset + 2], 1.0),
+            eye=Tuple._make(eyes[offset], eyes[offset + 1], eyes[offset + 2], -0.0),
+            normal=Tuple._make(normals[offset], normals[offset + 1],
+                               normals[offset + 2], 0.0))
+        computations.inside = bool(self._inside[pixel])
+        computations.over_position = Tuple._make(over_positions[offset],
+                                                 over_positions[offset + 1],
+                                                 over_positions[offset + 2],
+                                                 1.0)
+
+        return computations
+
+    def relight(self, world, canvas=None):
+        """
+        Shade every pixel again with the world's current lights and the shapes'
+        current materials.  The image is identical to rendering the world with
+        the camera the buffer was captured with.  Shadow rays are only cast for
+        lights at positions that the buffer has no shadow mask for.
+
+        :param world: World, the world the buffer was captured from, with its
+            lights and materials as they should be shaded now
+        :param canvas: Canvas, if not None, the canvas to draw on, which must
+            be the size of the buffer.  Otherwise a new canvas is created.
+        :return: Canvas, the shaded image
+        """
+        if canvas is None:
+            canvas = Canvas(width=self._width, height=self._height)
+        elif (canvas.width, canvas.height) != (self._width, self._height):
+            raise ValueError("Canvas must be the size of the buffer")
+
+        self._shade(world=world, buffer=canvas.buffer)
+
+        return canvas
+
+    def _shade(self, world, buffer):
+        # Shade every pixel, writing the colors to buffer unless it is None,
+        # which only fills in the shadow masks for the world's lights.
+        pixels = self._width * self._height
+        masks = {}
+        for light in world.lights:
+            position = light.position
+            key = (position.x, position.y, position.z)
+            if key not in masks:
+                mask = self._shadow_masks.get(key)
+                masks[key] = mask if mask is not None else bytearray(pixels)
+        # Masks for positions that no light is at any more are dropped
+        self._shadow_masks = masks
+
+        for start in range(0, pixels, self.RELIGHT_PACKET_PIXELS):
+            hit_pixels = []
+            hit_computations = []
+            for pixel in range(start, min(start + self.RELIGHT_PACKET_PIXELS, pixels)):
+                computations = self.computations_at(pixel=pixel)
+                if computations is None:
+                    if buffer is not None:
+                        buffer[pixel * 3:pixel * 3 + 3] = array('d', (0.0, 0.0, 0.0))
+                    continue
+
+                hit_pixels.append(pixel)
+                hit_computations.append(computations)
+
+            def shadows(light, hits):
+                # Look the hits up in the light's shadow mask, casting shadow
+                # rays only for the pixels whose shadow is not known yet.
+                position = light.position
+                mask = masks[(position.x, position.y, position.z)]
+                unknown = [hit for hit in hits
+                           if mask[hit_pixels[hit]] == self._SHADOW_UNKNOWN]
+                if unknown:
+                    shadowed = world.is_shadowed_packet(
+                        positions=[hit_computations[hit].over_position
+                                   for hit in unknown],
+                        light=light)
+                    for hit, is_shadowed in zip(unknown, shadowed):
+                        mask[hit_pixels[hit]] = \
+                            self._SHADOWED if is_shadowed else self._LIT
+
+                return [mask[hit_pixels[hit]] == self._SHADOWED for hit in hits]
+
+            colors = world.shade_packet(hit_computations=hit_computations,
+                                        shadows=shadows)
+            if buffer is None:
+                continue
+
+            for pixel, color in zip(hit_pixels, colors):
+                offset = pixel * 3
+                buffer[offset] = color.red
+                buffer[offset + 1] = color.green
+                buffer[offset + 2] = color.blue
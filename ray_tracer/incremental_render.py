@@ -0,0 +1,215 @@
+import math
+
+from camera import Camera
+from canvas import Canvas
+from packet_observer import PacketObserver
+from render_cache import content_hash
+
+
+class TileRecord(PacketObserver):
+    """
+    What rendering a single tile depended on: the objects that its primary
+    rays hit and the ray segments that it traced, i.e., each primary ray up to
+    its hit (or forever, if it missed) and each shadow ray from the point
+    being shaded up to the light.  A change to an object can only change the
+    tile's pixels if the tile's rays hit the object or if one of the segments
+    passes through the object's bounds before or after the change.
+
+    The record is filled in by observing the packets the tile's render traces.
+    """
+    def __init__(self, tile):
+        self.tile = tile
+        self.objects = set()
+        self.segments = []
+
+    def hit_packet_finished(self, origins, directions, hits):
+        self.record_hits(origins=origins, directions=directions, hits=hits)
+
+    def shadow_packet_started(self, positions, light):
+        self.record_shadow_rays(positions=positions, light=light)
+
+    def record_hits(self, origins, directions, hits):
+        for origin, direction, hit in zip(origins, directions, hits):
+            if hit is None:
+                self.segments.append((origin, direction, math.inf))
+            else:
+                self.segments.append((origin, direction, hit[0]))
+                self.objects.add(id(hit[1]))
+
+    def record_shadow_rays(self, positions, light):
+        # The same shadow rays that World.is_shadowed_packet casts
+        light_x = light.position.x
+        light_y = light.position.y
+        light_z = light.position.z
+        for position in positions:
+            vector_x = light_x - position.x
+            vector_y = light_y - position.y
+            vector_z = light_z - position.z
+            distance = math.sqrt(vector_x * vector_x +
+                                 vector_y * vector_y +
+                                 vector_z * vector_z)
+            self.segments.append(((position.x, position.y, position.z),
+                                  (vector_x / distance,
+                                   vector_y / distance,
+                                   vector_z / distance),
+                                  distance))
+
+    def is_affected(self, changed_objects, changed_bounds):
+        """
+        Determine if changes to objects might change the tile's pixels.
+
+        :param changed_objects: A set of the ids of the objects that changed
+        :param changed_bounds: A list of the world space bounding boxes of the
+            changed objects, both before and after they changed
+        :return: Boolean, True if the tile needs to be rendered again
+        """
+        if not self.objects.isdisjoint(changed_objects):
+            return True
+
+        for bounds in changed_bounds:
+            for origin, direction, maximum_time in self.segments:
+                if bounds.intersects(origin=origin,
+                                     direction=direction,
+                                     minimum_time=0,
+                                     maximum_time=maximum_time):
+                    return True
+
+        return False
+
+
+class IncrementalRenderer:
+    """
+    Renders a camera's view of a world over and over again as the world is
+    edited, re-rendering only the tiles that an edit might have changed and
+    keeping the rest of the previous canvas.
+
+    The first render renders every tile and records, for each tile, the
+    objects its rays hit and the ray segments it traced.  Every later render
+    compares each object with what it looked like at the previous render to
+    find the objects that were changed (e.g., moved or given a different
+    material), added, or removed, and then renders just the tiles whose
+    records show they might depend on one of them, using the objects' world
+    space bounds from both before and after the change.  Changing the lights
+    or the camera changes every pixel, so it re-renders the whole canvas.
+
+    The canvas produced is always identical to the one Camera.render would
+    produce for the world as it is now.  A world using a bounding volume
+    hierarchy must still be refit or rebuilt after its objects are edited.
+    """
+    def __init__(self, camera, tile_size=Camera.DEFAULT_TILE_SIZE):
+        """
+        Initialize an IncrementalRenderer object.
+
+        :param camera: Camera, the camera to render with
+        :param tile_size: Integer, the width and height, in pixels, of the
+            tiles that are re-rendered
+        """
+        if tile_size <= 0:
+            raise ValueError("Tile size must be greater than 0")
+
+        self._camera = camera
+        self._tile_size = tile_size
+        self.invalidate()
+
+    @property
+    def camera(self):
+        return self._camera
+
+    @property
+    def tile_size(self):
+        return self._tile_size
+
+    @property
+    def canvas(self):
+        return self._canvas
+
+    @property
+    def rendered_tiles(self):
+        # The tiles rendered by the most recent render
+        return list(self._rendered_tiles)
+
+    def invalidate(self):
+        """
+        Forget the previous render so that the next render renders every tile.
+        """
+        self._canvas = None
+        self._records = []
+        self._objects = {}
+        self._frame_hash = None
+        self._rendered_tiles = []
+
+    def _frame_digest(self, world):
+        # Everything other than the objects that affects every pixel
+        return content_hash((self._camera, world.lights, world.light_threshold))
+
+    def _snapshot(self, world):
+        # What each object looks like now, keyed by id.  The object itself is
+        # kept so that its id cannot be reused while it is in the snapshot.
+        return {id(the_object): (the_object,
+                                 content_hash(the_object),
+                                 the_object.world_bounds())
+                for the_object in world.objects}
+
+    def _render_tile(self, world, tile):
+        # Render the tile with a fresh record observing the packets of rays it
+        # traces.
+        record = TileRecord(tile=tile)
+        colors = self._camera.render_tile(world=world, tile=tile, observer=record)
+
+        x_start, y_start, width, height = tile
+        self._canvas.set_tile(x=x_start, y=y_start, width=width, height=height,
+                              colors=colors)
+
+        return record
+
+    def render(self, world):
+        """
+        Render the world, re-rendering only what changed since the previous
+        render.
+
+        :param world: World, the world to render
+        :return: Canvas, the rendered image.  The same canvas object is
+            updated by every render, so it should be written out or copied
+            before the world is edited and rendered again if the earlier image
+            is wanted.
+        """
+        frame_hash = self._frame_digest(world)
+        objects = self._snapshot(world)
+
+        if self._canvas is None or frame_hash != self._frame_hash or \
+                (self._canvas.width, self._canvas.height) != \
+                (self._camera.horizontal_size, self._camera.vertical_size):
+            self._canvas = Canvas(width=self._camera.horizontal_size,
+                                  height=self._camera.vertical_size)
+            self._records = [self._render_tile(world=world, tile=tile)
+                             for tile in self._camera.tiles(tile_size=self._tile_size)]
+            self._rendered_tiles = [record.tile for record in self._records]
+        else:
+            # Find the objects that were added, removed, or changed, along with
+            # where they were and where they are now.
+            changed_objects = set()
+            changed_bounds = []
+            for key, (_, digest, bounds) in self._objects.items():
+                current = objects.get(key)
+                if current is None or current[1] != digest:
+                    changed_objects.add(key)
+                    changed_bounds.append(bounds)
+            for key, (_, digest, bounds) in objects.items():
+                previous = self._objects.get(key)
+                if previous is None or previous[1] != digest:
+                    changed_objects.add(key)
+                    changed_bounds.append(bounds)
+
+            self._rendered_tiles = []
+            if changed_objects:
+                for index, record in enumerate(self._records):
+                    if record.is_affected(changed_objects=changed_objects,
+                                          changed_bounds=changed_bounds):
+                        self._records[index] = self._render_tile(world=world,
+                                                                 tile=record.tile)
+                        self._rendered_tiles.append(record.tile)
+
+        self._frame_hash = frame_hash
+        self._objects = objects
+
+        return self._canvas
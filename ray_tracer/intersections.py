@@ -1,23 +1,91 @@
 from point import Point
 from ray import Ray
+from tuple import Tuple
 from util import Utilities
 from vector import Vector
 
 
 class Computations:
+    """
+    The values needed to shade a hit.  A Computations object is created for
+    every hit while rendering, so it is kept lean: it uses slots, and when it
+    is created for a hit (see for_hit), only the position and eye vector are
+    computed up front.  The normal, inside flag, and over position are
+    computed together, the first time any of them is needed, without any
+    intermediate tuples.
+    """
+    __slots__ = ('_time', '_shape', '_position', '_eye', '_normal', '_inside',
+                 '_over_position')
+
     def __init__(self,
                  time=0.0,
                  shape=None,
                  position=None,
                  eye=None,
                  normal=None):
-        self.time = time
-        self.shape = shape
-        self.position = position
-        self.eye = eye
-        self.normal = normal
-        self.inside = False
-        self.over_position = 0
+        self._time = time
+        self._shape = shape
+        self._position = position if position else Point()
+        self._eye = eye if eye else Vector()
+        self._normal = normal if normal else Vector()
+        self._inside = False
+        self._over_position = 0
+
+    @staticmethod
+    def for_hit(time, shape, origin, direction):
+        """
+        Create the computations for a hit on a ray.
+
+        :param time: The time along the ray of the hit
+        :param shape: The shape that was hit
+        :param origin: The (x, y, z) origin of the ray
+        :param direction: The (x, y, z) direction of the ray
+        :return: Computations, with the same values that
+            Intersection.prepare_computations produces for the hit
+        """
+        origin_x, origin_y, origin_z = origin
+        direction_x, direction_y, direction_z = direction
+
+        computations = Computations.__new__(Computations)
+        computations._time = time
+        computations._shape = shape
+        computations._position = Tuple._make(origin_x + direction_x * time,
+                                             origin_y + direction_y * time,
+                                             origin_z + direction_z * time,
+                                             1.0)
+        computations._eye = Tuple._make(-direction_x,
+                                        -direction_y,
+                                        -direction_z,
+                                        -0.0)
+
+        # The normal is computed on demand (see _resolve)
+        computations._normal = None
+
+        return computations
+
+    def _resolve(self):
+        position = self._position
+        eye = self._eye
+        normal = self._shape.normal_at(position=position)
+
+        # If the normal vector points away from the eye vector (i.e., the dot
+        # product is less than zero), then the hit was inside the object.  We
+        # need to set the inside flag appropriately and negate the normal
+        # vector to point into the object.
+        self._inside = normal.x * eye.x + normal.y * eye.y + normal.z * eye.z < 0
+        if self._inside:
+            normal = normal.negate_unchecked()
+        self._normal = normal
+
+        # To prevent an object from casting a shadow over itself (because of
+        # inaccuracies in floating point arithmetic), adjust the point just
+        # slightly in the direction of the normal.  It is this point that will
+        # actually be used when determining if the point is in a shadow to keep
+        # from accidentally shadowing a point from the object it belongs to.
+        self._over_position = Tuple._make(position.x + normal.x * Utilities.EPSILON,
+                                          position.y + normal.y * Utilities.EPSILON,
+                                          position.z + normal.z * Utilities.EPSILON,
+                                          position.w + normal.w * Utilities.EPSILON)
 
     @property
     def time(self):
@@ -51,28 +119,43 @@ class Computations:
     def eye(self, value):
         self._eye = value if value else Vector()
 
+    # Setting any of the lazily computed values first computes all of them so
+    # that the values that were not set are not lost or recomputed later.
+
     @property
     def normal(self):
+        if self._normal is None:
+            self._resolve()
         return self._normal
 
     @normal.setter
     def normal(self, value):
+        if self._normal is None:
+            self._resolve()
         self._normal = value if value else Vector()
 
     @property
     def inside(self):
+        if self._normal is None:
+            self._resolve()
         return self._inside
 
     @inside.setter
     def inside(self, value):
+        if self._normal is None:
+            self._resolve()
         self._inside = value
 
     @property
     def over_position(self):
+        if self._normal is None:
+            self._resolve()
         return self._over_position
 
     @over_position.setter
     def over_position(self, value):
+        if self._normal is None:
+            self._resolve()
         self._over_position = value
 
 
@@ -98,38 +181,18 @@ class Intersection:
         self._shape = value
 
     def prepare_computations(self, ray=Ray()):
-        computations = Computations()
-
-        # Copy simple values from intersection
-        computations.time = self.time
-        computations.shape = self.shape
-
         # Precompute useful values:
         # - the position on the ray where intersection occurs
         # - the vector to the eye (i.e., the reverse of the array)
-        # - the normal at the point of intersection
-        computations.position = ray.position(self.time)
-        computations.eye = -ray.direction
-        computations.normal = self.shape.normal_at(position=computations.position)
-
-        # If the normal vector points away from the eye vector (i.e., the dot
-        # product is less than zero), then the hit was inside the object.  We
-        # need to set the inside flag appropriately and negate the normal
-        # vector to point into the object.
-        if computations.normal.dot_product(computations.eye) < 0:
-            computations.inside = True
-            computations.normal = -computations.normal
-
-        # To prevent an object from casting a shadow over itself (because of
-        # inaccuracies in floating point arithmetic), adjust the point just
-        # slightly in the direction of the normal.  It is this point that will
-        # actually be used when determining if the point is in a shadow to keep
-        # from accidentally shadowing a point from the object it belongs to.
-        computations.over_position = computations.position + \
-                                     computations.normal * \
-                                     Utilities.EPSILON
-
-        return computations
+        # - the normal at the point of intersection, whether the hit is inside
+        #   the shape, and the point just over the surface (computed when
+        #   first needed)
+        return Computations.for_hit(time=self._time,
+                                    shape=self._shape,
+                                    origin=(ray.origin.x, ray.origin.y, ray.origin.z),
+                                    direction=(ray.direction.x,
+                                               ray.direction.y,
+                                               ray.direction.z))
 
 
 class Intersections:
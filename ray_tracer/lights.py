@@ -5,9 +5,22 @@ from point import Point
 class PointLight:
     def __init__(self,
                  position=None,
-                 intensity=None):
+                 intensity=None,
+                 range=None):
+        """
+        Initialize a PointLight object.
+
+        :param position: Point, the position of the light
+        :param intensity: Color, the intensity (and color) of the light
+        :param range: Float, the distance at which the light no longer has any
+            effect.  If provided, the light's intensity falls off smoothly with
+            distance, reaching zero at the range, so that the light can be
+            ignored for any point beyond it.  If None, the light has the same
+            intensity everywhere.
+        """
         self.position = position
         self.intensity = intensity
+        self.range = range
 
     @property
     def position(self):
@@ -29,9 +42,57 @@ class PointLight:
                                 blue=value.blue) \
             if value else Color(red=1, green=1, blue=1)
 
+    @property
+    def range(self):
+        return self._range
+
+    @range.setter
+    def range(self, value):
+        if value is not None and value <= 0:
+            raise ValueError("Range must be greater than 0")
+
+        self._range = float(value) if value is not None else None
+
+    def attenuation(self, position):
+        """
+        Determine how much of the light's intensity reaches a point.
+
+        :param position: Point, the point being lit
+        :return: Float in [0.0, 1.0], the fraction of the light's intensity
+            that reaches the point.  This is always 1.0 for a light without a
+            range.
+        """
+        if self._range is None:
+            return 1.0
+
+        # Use (1 - (distance / range)^2)^2, which falls off roughly like the
+        # inverse square of the distance but reaches exactly zero at the range.
+        x = self._position.x - position.x
+        y = self._position.y - position.y
+        z = self._position.z - position.z
+        ratio = (x * x + y * y + z * z) / (self._range * self._range)
+        if ratio >= 1.0:
+            return 0.0
+
+        return (1.0 - ratio) * (1.0 - ratio)
+
+    def contribution(self, position):
+        """
+        Estimate the most that the light can contribute to any color component
+        of a point, ignoring the surface's material and orientation.
+
+        :param position: Point, the point being lit
+        :return: Float, the largest component of the light's intensity at the
+            point
+        """
+        return max(self._intensity.red,
+                   self._intensity.green,
+                   self._intensity.blue) * self.attenuation(position=position)
+
     def __eq__(self, other):
         return self.position == other.position and \
-               self.intensity == other.intensity
+               self.intensity == other.intensity and \
+               self.range == other.range
 
     def __ne__(self, other):
         return not self == other
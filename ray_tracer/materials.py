@@ -87,11 +87,15 @@ class Material:
         else:
             color = self.color
 
+        # Lights with a range are dimmer the farther away they are
+        intensity = light.intensity if light.range is None else \
+            light.intensity * light.attenuation(position=position)
+
         # Combine the material's color with the intensity/color of the light
-        effective_color = color * light.intensity
+        effective_color = color * intensity
 
         # Determine the direction to the light source
-        light_vector = (light.position - position).normalize()
+        light_vector = light.position.subtract_unchecked(position).normalize_unchecked()
 
         # Compute the ambient contribution to the final color, which is not
         # affected by the angle of the light
@@ -102,7 +106,7 @@ class Material:
         # than zero indicates that the light source is behind the surface.  In
         # that case, the diffuse and specular components contribute nothing to
         # the final color.
-        light_dot_normal = light_vector.dot_product(normal)
+        light_dot_normal = light_vector.dot_product_unchecked(normal)
         if light_dot_normal < 0:
             diffuse = specular = Color(red=0, green=0, blue=0)
         else:
@@ -115,13 +119,13 @@ class Material:
             # than zero indicates that the light reflects away from the eye.  In
             # that case the specular component contributes nothing to the final
             # color.
-            reflect_vector = (-light_vector).reflect(normal)
-            reflect_dot_eye = reflect_vector.dot_product(eye)
+            reflect_vector = light_vector.negate_unchecked().reflect_unchecked(normal)
+            reflect_dot_eye = reflect_vector.dot_product_unchecked(eye)
             if reflect_dot_eye < 0:
                 specular = Color(red=0, green=0, blue=0)
             else:
                 # Contribute the specular contribution to the final color
                 factor = math.pow(reflect_dot_eye, self.shininess)
-                specular = light.intensity * self.specular * factor
+                specular = intensity * self.specular * factor
 
         return ambient if in_shadow else ambient + diffuse + specular
@@ -1,7 +1,9 @@
 import copy
 import math
+from array import array
 
 from tuple import Tuple
+from tuple_array import TupleArray
 from util import Utilities
 
 
@@ -18,8 +20,19 @@ class Matrix:
         self._rows = rows
         self._columns = columns
 
+        # Every in-place change to the matrix bumps its version so that objects
+        # that cache values derived from the matrix (e.g., its inverse) can
+        # tell when those values are stale.
+        self._version = 0
+
     @staticmethod
     def identity(dimensions=4):
+        if dimensions == 4:
+            return Matrix4(values=[1.0, 0.0, 0.0, 0.0,
+                                   0.0, 1.0, 0.0, 0.0,
+                                   0.0, 0.0, 1.0, 0.0,
+                                   0.0, 0.0, 0.0, 1.0])
+
         matrix = Matrix(rows=dimensions, columns=dimensions)
 
         # Set the matrix diagonal values to 1.0
@@ -28,6 +41,10 @@ class Matrix:
 
         return matrix
 
+    # The transform factories build their matrices from the complete list of
+    # values rather than setting the non-zero elements one at a time, as they
+    # are called for every object when large scenes are built or loaded.
+
     @staticmethod
     def translation_transform(x=0, y=0, z=0):
         # Translation matrix is:
@@ -36,12 +53,10 @@ class Matrix:
         # | 0 0 1 z |
         # | 0 0 0 1 |
 
-        m = Matrix.identity(dimensions=4)
-        m.set_item(row=0, column=3, value=x)
-        m.set_item(row=1, column=3, value=y)
-        m.set_item(row=2, column=3, value=z)
-
-        return m
+        return Matrix4(values=[1.0, 0.0, 0.0, x,
+                               0.0, 1.0, 0.0, y,
+                               0.0, 0.0, 1.0, z,
+                               0.0, 0.0, 0.0, 1.0])
 
     @staticmethod
     def scaling_transform(x=1, y=1, z=1):
@@ -51,13 +66,10 @@ class Matrix:
         # | 0 0 z 0 |
         # | 0 0 0 1 |
 
-        m = Matrix(rows=4, columns=4)
-        m.set_item(row=0, column=0, value=x)
-        m.set_item(row=1, column=1, value=y)
-        m.set_item(row=2, column=2, value=z)
-        m.set_item(row=3, column=3, value=1.0)
-
-        return m
+        return Matrix4(values=[x, 0.0, 0.0, 0.0,
+                               0.0, y, 0.0, 0.0,
+                               0.0, 0.0, z, 0.0,
+                               0.0, 0.0, 0.0, 1.0])
 
     @staticmethod
     def rotation_x_transform(radians=0):
@@ -70,15 +82,10 @@ class Matrix:
         cosine = math.cos(radians)
         sine = math.sin(radians)
 
-        m = Matrix(rows=4, columns=4)
-        m.set_item(row=0, column=0, value=1.0)
-        m.set_item(row=1, column=1, value=cosine)
-        m.set_item(row=1, column=2, value=-sine)
-        m.set_item(row=2, column=1, value=sine)
-        m.set_item(row=2, column=2, value=cosine)
-        m.set_item(row=3, column=3, value=1.0)
-
-        return m
+        return Matrix4(values=[1.0, 0.0, 0.0, 0.0,
+                               0.0, cosine, -sine, 0.0,
+                               0.0, sine, cosine, 0.0,
+                               0.0, 0.0, 0.0, 1.0])
 
     @staticmethod
     def rotation_y_transform(radians=0):
@@ -91,15 +98,10 @@ class Matrix:
         cosine = math.cos(radians)
         sine = math.sin(radians)
 
-        m = Matrix(rows=4, columns=4)
-        m.set_item(row=0, column=0, value=cosine)
-        m.set_item(row=0, column=2, value=sine)
-        m.set_item(row=1, column=1, value=1.0)
-        m.set_item(row=2, column=0, value=-sine)
-        m.set_item(row=2, column=2, value=cosine)
-        m.set_item(row=3, column=3, value=1.0)
-
-        return m
+        return Matrix4(values=[cosine, 0.0, sine, 0.0,
+                               0.0, 1.0, 0.0, 0.0,
+                               -sine, 0.0, cosine, 0.0,
+                               0.0, 0.0, 0.0, 1.0])
 
     @staticmethod
     def rotation_z_transform(radians=0):
@@ -112,15 +114,10 @@ class Matrix:
         cosine = math.cos(radians)
         sine = math.sin(radians)
 
-        m = Matrix(rows=4, columns=4)
-        m.set_item(row=0, column=0, value=cosine)
-        m.set_item(row=0, column=1, value=-sine)
-        m.set_item(row=1, column=0, value=sine)
-        m.set_item(row=1, column=1, value=cosine)
-        m.set_item(row=2, column=2, value=1.0)
-        m.set_item(row=3, column=3, value=1.0)
-
-        return m
+        return Matrix4(values=[cosine, -sine, 0.0, 0.0,
+                               sine, cosine, 0.0, 0.0,
+                               0.0, 0.0, 1.0, 0.0,
+                               0.0, 0.0, 0.0, 1.0])
 
     @staticmethod
     def shearing_transform(x_moved_in_proportion_to_y=0,
@@ -137,15 +134,10 @@ class Matrix:
         #
         # Where x(y) is x_moved_in_proportion_to_y, etc.
 
-        m = Matrix.identity(dimensions=4)
-        m.set_item(row=0, column=1, value=x_moved_in_proportion_to_y)
-        m.set_item(row=0, column=2, value=x_moved_in_proportion_to_z)
-        m.set_item(row=1, column=0, value=y_moved_in_proportion_to_x)
-        m.set_item(row=1, column=2, value=y_moved_in_proportion_to_z)
-        m.set_item(row=2, column=0, value=z_moved_in_proportion_to_x)
-        m.set_item(row=2, column=1, value=z_moved_in_proportion_to_y)
-
-        return m
+        return Matrix4(values=[1.0, x_moved_in_proportion_to_y, x_moved_in_proportion_to_z, 0.0,
+                               y_moved_in_proportion_to_x, 1.0, y_moved_in_proportion_to_z, 0.0,
+                               z_moved_in_proportion_to_x, z_moved_in_proportion_to_y, 1.0, 0.0,
+                               0.0, 0.0, 0.0, 1.0])
 
     @staticmethod
     def view_transform(eye, to, up):
@@ -165,7 +157,7 @@ class Matrix:
         up_normalized = left_normalized.cross_product(forward_normalized)
 
         # Construct a matrix that represents the orientation matrix
-        orientation = Matrix(rows=4, columns=4, values=[
+        orientation = Matrix4(values=[
             left_normalized.x, left_normalized.y, left_normalized.z, 0,
             up_normalized.x, up_normalized.y, up_normalized.z, 0,
             -forward_normalized.x, -forward_normalized.y, -forward_normalized.z, 0,
@@ -185,6 +177,15 @@ class Matrix:
     def columns(self):
         return self._columns
 
+    @property
+    def values(self):
+        # All of the values, in row-major order
+        return tuple(self._values)
+
+    @property
+    def version(self):
+        return self._version
+
     def _validate_element(self, row=0, column=0):
         if row < 0 or row >= self._rows:
             raise ValueError("Matrix row {} is out of bounds".format(row))
@@ -232,6 +233,42 @@ class Matrix:
 
         return Tuple(x=values[0], y=values[1], z=values[2], w=values[3])
 
+    def transform_array(self, tuples):
+        """
+        Multiply the matrix by every tuple in a batch, e.g., to transform the
+        origins or directions of a whole packet of rays at once.  Each result
+        is the same as multiplying the matrix by the tuple, but each component
+        of the results is computed in a single pass over the batch, without
+        creating any per-tuple objects.
+
+        :param tuples: TupleArray, the tuples to transform
+        :return: TupleArray, the transformed tuples, in the same order
+        """
+        if self._rows != 4 or self._columns != 4:
+            raise NotImplementedError("Only 4x4 matrix multiplication by 4-tuple supported")
+
+        a00, a01, a02, a03, \
+            a10, a11, a12, a13, \
+            a20, a21, a22, a23, \
+            a30, a31, a32, a33 = self._values
+        xs, ys, zs, ws = tuples.x, tuples.y, tuples.z, tuples.w
+
+        # An affine transform leaves w unchanged, i.e., points stay points and
+        # vectors stay vectors, so the w components are simply copied.
+        if a30 == 0 and a31 == 0 and a32 == 0 and a33 == 1:
+            transformed_ws = ws
+        else:
+            transformed_ws = array('d', [a30 * x + a31 * y + a32 * z + a33 * w
+                            for x, y, z, w in zip(xs, ys, zs, ws)])
+
+        return TupleArray(x=array('d', [a00 * x + a01 * y + a02 * z + a03 * w
+                                        for x, y, z, w in zip(xs, ys, zs, ws)]),
+                          y=array('d', [a10 * x + a11 * y + a12 * z + a13 * w
+                                        for x, y, z, w in zip(xs, ys, zs, ws)]),
+                          z=array('d', [a20 * x + a21 * y + a22 * z + a23 * w
+                                        for x, y, z, w in zip(xs, ys, zs, ws)]),
+                          w=transformed_ws)
+
     def __eq__(self, other):
         if self._rows == other._rows and self._columns == other._columns:
             return all([Utilities.equal(self._values[index], other._values[index])
@@ -249,6 +286,9 @@ class Matrix:
         if isinstance(other, Tuple):
             return self._multiply_by_tuple(other)
 
+        if isinstance(other, TupleArray):
+            return self.transform_array(other)
+
         raise ValueError("Unable to multiply matrix by {}".format(type(other).__name__))
 
     def get_item(self, row=0, column=0):
@@ -260,6 +300,7 @@ class Matrix:
         self._validate_element(row=row, column=column)
 
         self._values[row * self._columns + column] = value
+        self._version += 1
 
     def transpose(self):
         transpose = Matrix(rows=self._columns, columns=self._rows)
@@ -393,3 +434,195 @@ class Matrix:
                                       z_moved_in_proportion_to_y=z_moved_in_proportion_to_y) * \
             self
 
+
+class Matrix4(Matrix):
+    """
+    A 4x4 matrix, i.e., the size of every transform.  It has the same interface
+    as Matrix, but because its size is fixed, multiplication, transposition,
+    determinant, and inversion are all unrolled to work directly on the values
+    instead of going through get_item/set_item and recursing through
+    submatrices.  The transform factory methods on Matrix all create Matrix4
+    objects.
+    """
+    def __init__(self, rows=4, columns=4, values=None):
+        if rows != 4 or columns != 4:
+            raise ValueError("Matrix4 must have 4 rows and 4 columns")
+
+        if values:
+            if len(values) != 16:
+                raise ValueError("Matrix4 needs exactly 16 values")
+
+            self._values = list(values)
+        else:
+            self._values = [0.0] * 16
+
+        self._rows = 4
+        self._columns = 4
+        self._version = 0
+
+    @property
+    def is_affine(self):
+        # An affine transform (i.e., any combination of translation, scaling,
+        # rotation, and shearing) has a bottom row of | 0 0 0 1 |
+        return self._values[12:] == [0, 0, 0, 1]
+
+    def _multiply_by_matrix(self, other):
+        if other._rows != 4 or other._columns != 4:
+            raise NotImplementedError("Only 4x4 matrix multiplication supported")
+
+        a00, a01, a02, a03, \
+            a10, a11, a12, a13, \
+            a20, a21, a22, a23, \
+            a30, a31, a32, a33 = self._values
+        b00, b01, b02, b03, \
+            b10, b11, b12, b13, \
+            b20, b21, b22, b23, \
+            b30, b31, b32, b33 = other._values[:16]
+
+        return Matrix4(values=[
+            a00 * b00 + a01 * b10 + a02 * b20 + a03 * b30,
+            a00 * b01 + a01 * b11 + a02 * b21 + a03 * b31,
+            a00 * b02 + a01 * b12 + a02 * b22 + a03 * b32,
+            a00 * b03 + a01 * b13 + a02 * b23 + a03 * b33,
+            a10 * b00 + a11 * b10 + a12 * b20 + a13 * b30,
+            a10 * b01 + a11 * b11 + a12 * b21 + a13 * b31,
+            a10 * b02 + a11 * b12 + a12 * b22 + a13 * b32,
+            a10 * b03 + a11 * b13 + a12 * b23 + a13 * b33,
+            a20 * b00 + a21 * b10 + a22 * b20 + a23 * b30,
+            a20 * b01 + a21 * b11 + a22 * b21 + a23 * b31,
+            a20 * b02 + a21 * b12 + a22 * b22 + a23 * b32,
+            a20 * b03 + a21 * b13 + a22 * b23 + a23 * b33,
+            a30 * b00 + a31 * b10 + a32 * b20 + a33 * b30,
+            a30 * b01 + a31 * b11 + a32 * b21 + a33 * b31,
+            a30 * b02 + a31 * b12 + a32 * b22 + a33 * b32,
+            a30 * b03 + a31 * b13 + a32 * b23 + a33 * b33])
+
+    def _multiply_by_tuple(self, other):
+        a00, a01, a02, a03, \
+            a10, a11, a12, a13, \
+            a20, a21, a22, a23, \
+            a30, a31, a32, a33 = self._values
+        x = other.x
+        y = other.y
+        z = other.z
+        w = other.w
+
+        return Tuple(x=a00 * x + a01 * y + a02 * z + a03 * w,
+                     y=a10 * x + a11 * y + a12 * z + a13 * w,
+                     z=a20 * x + a21 * y + a22 * z + a23 * w,
+                     w=a30 * x + a31 * y + a32 * z + a33 * w)
+
+    def transpose(self):
+        v = self._values
+
+        return Matrix4(values=[v[0], v[4], v[8], v[12],
+                               v[1], v[5], v[9], v[13],
+                               v[2], v[6], v[10], v[14],
+                               v[3], v[7], v[11], v[15]])
+
+    def _subdeterminants(self):
+        # Rather than expanding cofactors recursively, the determinant and
+        # the inverse can be written in terms of the determinants of the six
+        # 2x2 submatrices of the top two rows (s0-s5) and the six 2x2
+        # submatrices of the bottom two rows (c0-c5).
+        a00, a01, a02, a03, \
+            a10, a11, a12, a13, \
+            a20, a21, a22, a23, \
+            a30, a31, a32, a33 = self._values
+
+        s = (a00 * a11 - a10 * a01,
+             a00 * a12 - a10 * a02,
+             a00 * a13 - a10 * a03,
+             a01 * a12 - a11 * a02,
+             a01 * a13 - a11 * a03,
+             a02 * a13 - a12 * a03)
+        c = (a20 * a31 - a30 * a21,
+             a20 * a32 - a30 * a22,
+             a20 * a33 - a30 * a23,
+             a21 * a32 - a31 * a22,
+             a21 * a33 - a31 * a23,
+             a22 * a33 - a32 * a23)
+
+        return s, c
+
+    def determinant(self):
+        s, c = self._subdeterminants()
+
+        return s[0] * c[5] - s[1] * c[4] + s[2] * c[3] + \
+            s[3] * c[2] - s[4] * c[1] + s[5] * c[0]
+
+    def inverse(self):
+        if self.is_affine:
+            return self._affine_inverse()
+
+        a00, a01, a02, a03, \
+            a10, a11, a12, a13, \
+            a20, a21, a22, a23, \
+            a30, a31, a32, a33 = self._values
+        (s0, s1, s2, s3, s4, s5), (c0, c1, c2, c3, c4, c5) = \
+            self._subdeterminants()
+
+        determinant = s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+        if Utilities.equal(determinant, 0):
+            raise ArithmeticError("Matrix is not invertible")
+
+        # This is the transposed cofactor matrix divided by the determinant,
+        # just as in Matrix.inverse, with each cofactor written out in terms
+        # of the 2x2 subdeterminants.
+        return Matrix4(values=[
+            (a11 * c5 - a12 * c4 + a13 * c3) / determinant,
+            (-a01 * c5 + a02 * c4 - a03 * c3) / determinant,
+            (a31 * s5 - a32 * s4 + a33 * s3) / determinant,
+            (-a21 * s5 + a22 * s4 - a23 * s3) / determinant,
+            (-a10 * c5 + a12 * c2 - a13 * c1) / determinant,
+            (a00 * c5 - a02 * c2 + a03 * c1) / determinant,
+            (-a30 * s5 + a32 * s2 - a33 * s1) / determinant,
+            (a20 * s5 - a22 * s2 + a23 * s1) / determinant,
+            (a10 * c4 - a11 * c2 + a13 * c0) / determinant,
+            (-a00 * c4 + a01 * c2 - a03 * c0) / determinant,
+            (a30 * s4 - a31 * s2 + a33 * s0) / determinant,
+            (-a20 * s4 + a21 * s2 - a23 * s0) / determinant,
+            (-a10 * c3 + a11 * c1 - a12 * c0) / determinant,
+            (a00 * c3 - a01 * c1 + a02 * c0) / determinant,
+            (-a30 * s3 + a31 * s1 - a32 * s0) / determinant,
+            (a20 * s3 - a21 * s1 + a22 * s0) / determinant])
+
+    def _affine_inverse(self):
+        # An affine transform is a 3x3 linear part, L, followed by a
+        # translation, t:
+        #
+        # | L t |
+        # | 0 1 |
+        #
+        # Its inverse is the inverse of the linear part followed by the
+        # translation "undone" by that inverse:
+        #
+        # | inverse(L) -inverse(L)t |
+        # |     0           1       |
+        a00, a01, a02, tx, \
+            a10, a11, a12, ty, \
+            a20, a21, a22, tz = self._values[:12]
+
+        cofactor00 = a11 * a22 - a12 * a21
+        cofactor01 = a12 * a20 - a10 * a22
+        cofactor02 = a10 * a21 - a11 * a20
+
+        determinant = a00 * cofactor00 + a01 * cofactor01 + a02 * cofactor02
+        if Utilities.equal(determinant, 0):
+            raise ArithmeticError("Matrix is not invertible")
+
+        i00 = cofactor00 / determinant
+        i01 = (a02 * a21 - a01 * a22) / determinant
+        i02 = (a01 * a12 - a02 * a11) / determinant
+        i10 = cofactor01 / determinant
+        i11 = (a00 * a22 - a02 * a20) / determinant
+        i12 = (a02 * a10 - a00 * a12) / determinant
+        i20 = cofactor02 / determinant
+        i21 = (a01 * a20 - a00 * a21) / determinant
+        i22 = (a00 * a11 - a01 * a10) / determinant
+
+        return Matrix4(values=[
+            i00, i01, i02, -(i00 * tx + i01 * ty + i02 * tz),
+            i10, i11, i12, -(i10 * tx + i11 * ty + i12 * tz),
+            i20, i21, i22, -(i20 * tx + i21 * ty + i22 * tz),
+            0.0, 0.0, 0.0, 1.0])
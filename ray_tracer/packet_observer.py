@@ -0,0 +1,70 @@
+class PacketObserver:
+    """
+    A base class for objects that watch a world trace packets of rays, e.g., to
+    time the phases of a render or to record which rays a tile traced.  An
+    observer is passed explicitly to the packet methods (World.color_at_packet,
+    World.hit_packet, World.shade_packet, and World.is_shadowed_packet, and
+    through Camera.render_tile and Camera.render), which call it before and
+    after their work.  The world itself is never changed, so any number of
+    renders, each with its own observer (or none), can use the same world at
+    once.
+
+    Every method does nothing, so derived classes only override what they
+    need.
+    """
+    def hit_packet_started(self, origins, directions):
+        """
+        Called before the hits for a packet of rays are found.
+
+        :param origins: The (x, y, z) origins of the rays in the packet
+        :param directions: The (x, y, z) directions of the rays in the packet
+        """
+        pass
+
+    def hit_packet_finished(self, origins, directions, hits):
+        """
+        Called after the hits for a packet of rays are found.
+
+        :param origins: The (x, y, z) origins of the rays in the packet
+        :param directions: The (x, y, z) directions of the rays in the packet
+        :param hits: The (time, shape) hit, or None, for each ray
+        """
+        pass
+
+    def shadow_packet_started(self, positions, light):
+        """
+        Called before a packet of shadow rays is cast.
+
+        :param positions: The points the shadow rays are cast from
+        :param light: The light the shadow rays are cast toward
+        """
+        pass
+
+    def shadow_packet_finished(self, positions, light, shadowed):
+        """
+        Called after a packet of shadow rays is cast.
+
+        :param positions: The points the shadow rays were cast from
+        :param light: The light the shadow rays were cast toward
+        :param shadowed: True or False for each point, whether it is in shadow
+        """
+        pass
+
+    def color_packet_started(self, origins, directions):
+        """
+        Called before the colors for a packet of rays are determined.
+
+        :param origins: The (x, y, z) origins of the rays in the packet
+        :param directions: The (x, y, z) directions of the rays in the packet
+        """
+        pass
+
+    def color_packet_finished(self, origins, directions, colors):
+        """
+        Called after the colors for a packet of rays are determined.
+
+        :param origins: The (x, y, z) origins of the rays in the packet
+        :param directions: The (x, y, z) directions of the rays in the packet
+        :param colors: The Color for each ray
+        """
+        pass
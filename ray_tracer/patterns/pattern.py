@@ -1,8 +1,8 @@
 from color import Color
-from matrix import Matrix
+from transformable import Transformable
 
 
-class Pattern:
+class Pattern(Transformable):
     """
     The base class from which all patterns will derive.  Contains the common
     properties and methods for patterns.
@@ -38,15 +38,6 @@ class Pattern:
     def color_b(self, value):
         self._color_b = value if value else Color(red=0, green=0, blue=0)
 
-    @property
-    def transform(self):
-        return self._transform
-
-    @transform.setter
-    def transform(self, value):
-        self._transform = value if value else Matrix.identity()
-        self._inverse_transform = self._transform.inverse()
-
     def color_at(self, position):
         """
         Return the color for the pattern at the position provided.
@@ -70,10 +61,10 @@ class Pattern:
             provided.
         """
         # First convert the position from world space to object space
-        object_position = shape.transform.inverse() * position
+        object_position = shape.inverse_transform * position
 
         # Then convert the position from object space to pattern space
-        pattern_position = self._inverse_transform * object_position
+        pattern_position = self.inverse_transform * object_position
 
         # Now figure out the color for the patter space position
         return self.color_at(position=pattern_position)
@@ -1,4 +1,8 @@
+import math
+
+from bounds import BoundingBox
 from intersections import Intersection, Intersections
+from point import Point
 from shape import Shape
 from util import Utilities
 from vector import Vector
@@ -12,14 +16,28 @@ class Plane(Shape):
     """
     def __init__(self,
                  transform=None,
-                 material=None):
+                 material=None,
+                 casts_shadow=True):
         """
         Initialize a Plane object
 
         :param transform: The transform to be applied to the plane
         :param material: The material for the plane
+        :param casts_shadow: If False, the plane does not cast shadows
+        """
+        super().__init__(transform=transform,
+                         material=material,
+                         casts_shadow=casts_shadow)
+
+    def bounds(self):
         """
-        super().__init__(transform=transform, material=material)
+        Override base class method to provide the plane's object space bounds,
+        which are infinite in the x and z directions.
+
+        :return: BoundingBox, the object space bounds of the plane
+        """
+        return BoundingBox(minimum=Point(x=-math.inf, y=0, z=-math.inf),
+                           maximum=Point(x=math.inf, y=0, z=math.inf))
 
     def _intersect(self, ray):
         """
@@ -46,6 +64,45 @@ class Plane(Shape):
         time = -ray.origin.y / ray.direction.y
         return Intersections(Intersection(time=time, shape=self))
 
+    def _intersect_times(self, origin, direction):
+        """
+        Override base class method to provide plane-specific method for
+        computing the times at which a ray intersects the plane.
+
+        This method should not be called directly.  Instead, call the public
+        intersect method defined in the Shape class.
+
+        :param origin: The (x, y, z) object space origin of the ray
+        :param direction: The (x, y, z) object space direction of the ray
+        :return: A tuple of the times at which the ray intersects the plane
+        """
+        # See _intersect
+        if abs(direction[1]) < Utilities.EPSILON:
+            return ()
+
+        return -origin[1] / direction[1],
+
+    def _intersect_packet(self, origins, directions):
+        """
+        Override base class method to provide plane-specific method for
+        computing the intersections of a packet of rays with the plane.
+
+        This method should not be called directly.  Instead, call the public
+        intersect_packet method defined in the Shape class.
+
+        :param origins: A sequence of (x, y, z) tuples, the object space
+            origins of the rays in the packet.
+        :param directions: A sequence of (x, y, z) tuples, the object space
+            directions of the rays in the packet.
+        :return: A list, parallel to origins and directions, of tuples of the
+            times at which each ray intersects the plane.
+        """
+        # Rays that are parallel to the plane never intersect it, all others
+        # intersect it exactly once (see _intersect).
+        return [() if abs(direction[1]) < Utilities.EPSILON else
+                (-origin[1] / direction[1],)
+                for origin, direction in zip(origins, directions)]
+
     def _normal_at(self, position):
         """
         Override base class method to provide plane-specific method for
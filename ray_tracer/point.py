@@ -1,5 +1,7 @@
 from tuple import Tuple
 
 class Point(Tuple):
+    __slots__ = ()
+
     def __init__(self, x=0.0, y=0.0, z=0.0):
         super().__init__(x=x, y=y, z=z, w=1.0)
@@ -0,0 +1,94 @@
+from color import Color
+
+
+class PPMWriter:
+    """
+    Writes a PPM image to a file one row at a time, so that an image never has
+    to be held in memory as a single string.  Two flavors of PPM are supported:
+
+    - P3 (plain), where each color component is written as text.  Lines are
+      limited to 70 characters.  The file must be opened in text mode.
+    - P6 (binary), where each color component is written as a single byte.
+      This is much smaller and faster to write.  The file must be opened in
+      binary mode.
+
+    The header is written when the writer is created, and each call to
+    write_row writes the next row of the image.
+    """
+    MAXIMUM_LINE_LENGTH = 70
+
+    # The text for every possible component value, so that formatting a
+    # component is a table lookup.
+    _COMPONENT_TEXT = [str(value) for value in range(256)]
+
+    def __init__(self, file, width=0, height=0, binary=False):
+        """
+        Initialize a PPMWriter object and write the PPM header.
+
+        :param file: The file object to write the image to
+        :param width: The width of the image in pixels
+        :param height: The height of the image in pixels
+        :param binary: If True, write a binary (P6) image.  Otherwise write a
+            plain (P3) image.
+        """
+        if width <= 0:
+            raise ValueError("Width must be greater than 0")
+        if height <= 0:
+            raise ValueError("Height must be greater than 0")
+
+        self._file = file
+        self._width = width
+        self._height = height
+        self._binary = binary
+        self._rows_written = 0
+
+        header = "{}\n{} {}\n255\n".format("P6" if binary else "P3", width, height)
+        self._file.write(header.encode("ascii") if binary else header)
+
+    @property
+    def rows_written(self):
+        return self._rows_written
+
+    def write_row(self, values):
+        """
+        Write the next row of the image.
+
+        :param values: A sequence of width * 3 floats, the red, green, and blue
+            components of each pixel in the row from left to right.  Components
+            are clamped to [0.0, 1.0] and scaled to [0, 255].
+        """
+        if self._rows_written >= self._height:
+            raise ValueError("All {} rows have already been written".format(self._height))
+        if len(values) != self._width * 3:
+            raise ValueError("Row needs {} values".format(self._width * 3))
+
+        components = [Color._clamp_color_value(value) for value in values]
+        if self._binary:
+            self._file.write(bytes(components))
+        else:
+            self._file.write(self._wrap([self._COMPONENT_TEXT[component]
+                                         for component in components]))
+
+        self._rows_written += 1
+
+    def _wrap(self, words):
+        # Pack as many of the words (i.e., components) onto each line as will
+        # fit in the maximum line length, with a single space between words.
+        # This breaks lines in exactly the same places as searching backward
+        # from the 71st character of the row for a space.
+        lines = []
+        line = []
+        line_length = -1
+        for word in words:
+            if line and line_length + 1 + len(word) > self.MAXIMUM_LINE_LENGTH:
+                lines.append(" ".join(line))
+                line = []
+                line_length = -1
+
+            line.append(word)
+            line_length += 1 + len(word)
+
+        lines.append(" ".join(line))
+        lines.append("")
+
+        return "\n".join(lines)
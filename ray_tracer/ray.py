@@ -27,7 +27,7 @@ class Ray:
             if value else Vector(x=0, y=0, z=0)
 
     def position(self, time=0):
-        return self._origin + (self._direction * time)
+        return self._origin.add_unchecked(self._direction.multiply_unchecked(time))
 
     def transform(self, transformation=Matrix.identity()):
         return Ray(origin=transformation * self._origin,
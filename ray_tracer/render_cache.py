@@ -0,0 +1,309 @@
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+from array import array
+
+from camera import Camera
+from canvas import Canvas
+from color import Color
+from matrix import Matrix
+from tuple import Tuple
+from world import World
+
+# Bump this whenever a change to the renderer changes the images it produces,
+# so that images rendered by older code are never returned from the cache.
+CACHE_VERSION = 1
+
+# Attributes that are derived from other attributes (and so add nothing to a
+# description of the scene) or that are only used to speed up rendering and do
+# not change the rendered image.
+_DERIVED_ATTRIBUTES = frozenset(('_inverse_transform',
+                                 '_inverse_transform_transpose',
+                                 '_inverse_transform_values',
+                                 '_transform_version',
+                                 '_origin',
+                                 '_half_width',
+                                 '_half_height',
+                                 '_pixel_size',
+                                 '_bvh',
+                                 '_bvh_leaf_size',
+                                 '_unbounded_objects'))
+
+
+def _describe(value):
+    # Build a description of a value out of nothing but tuples and strings, so
+    # that its repr is the same every time the same scene is described, in
+    # any process.  Numbers are described by their exact hexadecimal float
+    # representation, and ints and floats with the same value are described
+    # the same way since they render the same way (as are 0.0 and -0.0).
+    if value is None or isinstance(value, (bool, str)):
+        return repr(value)
+    if isinstance(value, (int, float)):
+        return (float(value) + 0.0).hex()
+    if isinstance(value, (list, tuple)):
+        return tuple(_describe(item) for item in value)
+    if isinstance(value, Matrix):
+        return ("Matrix", str(value.rows), str(value.columns),
+                tuple(_describe(value.get_item(row=row, column=column))
+                      for row in range(value.rows)
+                      for column in range(value.columns)))
+    if isinstance(value, Tuple):
+        return ("Tuple",) + tuple(_describe(component)
+                                  for component in (value.x, value.y, value.z, value.w))
+    if isinstance(value, Color):
+        return ("Color",) + tuple(_describe(component)
+                                  for component in (value.red, value.green, value.blue))
+    if not hasattr(value, '__dict__'):
+        raise ValueError("Cannot describe a {} for a scene hash".format(
+            type(value).__name__))
+
+    # Everything else (shapes, materials, patterns, lights, the world, and the
+    # camera) is described by its class and its attributes, leaving out
+    # anything derived or only used for acceleration.  The class's module is
+    # left out because it depends on how the module was imported.
+    return (type(value).__qualname__,) + \
+        tuple((name, _describe(attribute))
+              for name, attribute in sorted(vars(value).items())
+              if name not in _DERIVED_ATTRIBUTES)
+
+
+def content_hash(value):
+    """
+    Compute a content hash of any part of a scene, e.g., a single shape or the
+    list of lights.  Like scene_hash, it only depends on what the value looks
+    like when rendered.
+
+    :param value: The part of the scene to hash
+    :return: String, the hexadecimal SHA-256 hash of the value
+    """
+    return hashlib.sha256(repr(_describe(value)).encode("utf-8")).hexdigest()
+
+
+def scene_hash(world, camera):
+    """
+    Compute a content hash of a scene, i.e., of everything that determines the
+    image the camera renders of the world: the objects, their transforms,
+    materials, and patterns, the lights, and the camera's size, field of view,
+    and transform.  Two scenes with the same content have the same hash, no
+    matter which process built them or whether they use a bounding volume
+    hierarchy.
+
+    :param world: World, the world being rendered
+    :param camera: Camera, the camera rendering the world
+    :return: String, the hexadecimal SHA-256 hash of the scene
+    """
+    if not isinstance(world, World) or not isinstance(camera, Camera):
+        raise ValueError("A scene is a World and a Camera")
+
+    description = ("scene", str(CACHE_VERSION), _describe(world), _describe(camera))
+
+    return hashlib.sha256(repr(description).encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    An on-disk cache of rendered canvases keyed by scene hash.  Each canvas is
+    stored in its own file as its raw color components, so that a cached
+    image comes back exactly as it was rendered.  When the files in the cache
+    take more than the maximum size, the least recently used ones are removed.
+    A file's modification time records when it was last used, so the cache
+    can be shared by several processes.
+    """
+    _MAGIC = b"RTCANVAS"
+    _HEADER = struct.Struct("<8sII")
+    _SUFFIX = ".canvas"
+
+    def __init__(self, directory, maximum_size=256 * 1024 * 1024):
+        """
+        Initialize a RenderCache object.
+
+        :param directory: The directory to keep cached canvases in.  It is
+            created if it does not exist.
+        :param maximum_size: Integer, the most bytes the cached canvases may
+            take up
+        """
+        if maximum_size <= 0:
+            raise ValueError("Maximum size must be greater than 0")
+
+        self._directory = directory
+        self._maximum_size = maximum_size
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def directory(self):
+        return self._directory
+
+    @property
+    def maximum_size(self):
+        return self._maximum_size
+
+    def _path(self, key):
+        return os.path.join(self._directory, key + self._SUFFIX)
+
+    def _entries(self):
+        # The (path, size, last used time) of every cached canvas
+        entries = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(self._SUFFIX):
+                continue
+
+            path = os.path.join(self._directory, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, status.st_size, status.st_mtime_ns))
+
+        return entries
+
+    @property
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def get(self, world, camera):
+        """
+        Find the canvas previously rendered for a scene.
+
+        :param world: World, the world being rendered
+        :param camera: Camera, the camera rendering the world
+        :return: Canvas, the cached canvas, or None if the scene has not been
+            cached
+        """
+        return self.get_by_key(key=scene_hash(world=world, camera=camera))
+
+    def get_by_key(self, key):
+        """
+        Find the canvas cached for a scene hash.
+
+        :param key: String, the scene hash
+        :return: Canvas, the cached canvas, or None if there is none
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+
+        canvas = self._decode(data)
+        if canvas is None:
+            # The file is damaged (e.g., it was being written when the
+            # machine crashed), so get rid of it.
+            self._remove(path)
+            return None
+
+        # Mark the canvas as the most recently used
+        try:
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+        except FileNotFoundError:
+            pass
+
+        return canvas
+
+    def put(self, world, camera, canvas):
+        """
+        Cache the canvas rendered for a scene.
+
+        :param world: World, the world that was rendered
+        :param camera: Camera, the camera that rendered the world
+        :param canvas: Canvas, the rendered image
+        :return: String, the scene hash the canvas is cached under
+        """
+        key = scene_hash(world=world, camera=camera)
+        self.put_by_key(key=key, canvas=canvas)
+
+        return key
+
+    def put_by_key(self, key, canvas):
+        """
+        Cache a canvas under a scene hash.
+
+        :param key: String, the scene hash
+        :param canvas: Canvas, the rendered image
+        """
+        data = self._encode(canvas)
+
+        # Write to a temporary file and then move it into place so that other
+        # processes never see a partially written canvas.
+        descriptor, temporary_path = tempfile.mkstemp(dir=self._directory,
+                                                      suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, self._path(key))
+        except BaseException:
+            self._remove(temporary_path)
+            raise
+
+        self._evict()
+
+    def render(self, world, camera, **render_options):
+        """
+        Return the canvas for a scene from the cache, rendering and caching it
+        if it has not been rendered before.
+
+        :param world: World, the world to render
+        :param camera: Camera, the camera to render the world with
+        :param render_options: Any other arguments for Camera.render (e.g.,
+            workers), which do not change the rendered image
+        :return: Canvas, the rendered image
+        """
+        key = scene_hash(world=world, camera=camera)
+        canvas = self.get_by_key(key=key)
+        if canvas is None:
+            canvas = camera.render(world=world, **render_options)
+            self.put_by_key(key=key, canvas=canvas)
+
+        return canvas
+
+    def clear(self):
+        """
+        Remove every cached canvas.
+        """
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    def _evict(self):
+        # Remove the least recently used canvases until the cache fits.
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total_size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total_size <= self._maximum_size:
+                break
+
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _encode(self, canvas):
+        values = array('d', canvas.buffer)
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        return self._HEADER.pack(self._MAGIC, canvas.width, canvas.height) + \
+            values.tobytes()
+
+    def _decode(self, data):
+        if len(data) < self._HEADER.size:
+            return None
+
+        magic, width, height = self._HEADER.unpack_from(data)
+        values = array('d')
+        if magic != self._MAGIC or width == 0 or height == 0 or \
+                len(data) - self._HEADER.size != width * height * 3 * values.itemsize:
+            return None
+
+        values.frombytes(data[self._HEADER.size:])
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        return Canvas(width=width, height=height, buffer=values)
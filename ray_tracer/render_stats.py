@@ -0,0 +1,395 @@
+import functools
+import math
+import threading
+import time
+
+from camera import Camera
+from color import Color
+from materials import Material
+from matrix import Matrix, Matrix4
+from shape import Shape
+from world import World
+
+
+class ShapeStatistics:
+    """
+    The work done on behalf of a single shape: how many rays were tested for
+    intersection with it and how many of its hits were shaded, along with the
+    time spent doing each.
+    """
+    def __init__(self, shape):
+        self.shape = shape
+        self.intersection_tests = 0
+        self.intersect_seconds = 0.0
+        self.shading_calls = 0
+        self.shading_seconds = 0.0
+
+    def as_dict(self, label):
+        return {
+            "shape": label,
+            "intersection_tests": self.intersection_tests,
+            "intersect_seconds": self.intersect_seconds,
+            "shading_calls": self.shading_calls,
+            "shading_seconds": self.shading_seconds,
+        }
+
+
+class RenderStatistics:
+    """
+    Opt-in instrumentation of the renderer.  While enabled, the following are
+    counted and/or timed:
+
+    - Camera.render: one frame per call, with the counters below broken out
+      per frame
+    - Camera.ray_for_pixel / Camera.rays_for_samples: primary rays, i.e., the
+      rays the camera generates, however they are traced afterwards
+    - World.intersect / World.nearest_hit / World.hit_packet: time spent
+      finding hits, for primary rays and any other rays alike
+    - World.is_shadowed / World.is_shadowed_packet: shadow rays
+    - Shape.intersect / Shape.hit_time / Shape.intersect_packet: intersection
+      tests, per shape
+    - Material.lighting: shading calls, per shape and per material
+    - Matrix.inverse: matrix inversions
+    - Color.__init__: color allocations
+
+    Instrumentation works by replacing those methods on their classes with
+    counting wrappers when enabled and putting the originals back when
+    disabled, so there is no overhead at all when statistics are not being
+    collected.  Because of that, only one RenderStatistics can be enabled at
+    a time.  The counters are updated under a lock, so renders that use
+    thread workers are counted correctly, but work done in render worker
+    processes is not seen; collect statistics from serial or threaded renders.
+
+    Typical use:
+
+        with RenderStatistics() as statistics:
+            canvas = camera.render(world=world)
+        print(statistics.report())
+    """
+    _enabled = None
+    _enabled_lock = threading.Lock()
+
+    COUNTERS = ("primary_rays",
+                "shadow_rays",
+                "intersection_tests",
+                "shading_calls",
+                "matrix_inversions",
+                "color_allocations")
+
+    def __init__(self):
+        self._patches = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self):
+        return RenderStatistics._enabled is self
+
+    @property
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    @property
+    def frames(self):
+        with self._lock:
+            return list(self._frames)
+
+    @property
+    def shapes(self):
+        with self._lock:
+            return [statistics for statistics in self._shapes.values()]
+
+    def reset(self):
+        """
+        Discard everything collected so far.
+        """
+        with self._lock:
+            self._counters = dict.fromkeys(self.COUNTERS, 0)
+            self._timers = {"intersect_seconds": 0.0,
+                            "shadow_seconds": 0.0,
+                            "shading_seconds": 0.0}
+            self._frames = []
+            self._shapes = {}
+            self._materials = {}
+            self._world = None
+
+    def enable(self):
+        """
+        Start collecting statistics.
+
+        :return: self, so that enable can be chained with the constructor
+        """
+        with RenderStatistics._enabled_lock:
+            if RenderStatistics._enabled is self:
+                return self
+            if RenderStatistics._enabled is not None:
+                raise RuntimeError("Render statistics are already being collected")
+
+            try:
+                self._patch(Camera, "render", self._wrap_render)
+                self._patch(Camera, "ray_for_pixel", self._wrap_ray_for_pixel)
+                self._patch(Camera, "rays_for_samples", self._wrap_rays_for_samples)
+                self._patch(World, "intersect", self._wrap_timed("intersect_seconds"))
+                self._patch(World, "nearest_hit", self._wrap_timed("intersect_seconds"))
+                self._patch(World, "hit_packet", self._wrap_timed("intersect_seconds"))
+                self._patch(World, "is_shadowed", self._wrap_is_shadowed)
+                self._patch(World, "is_shadowed_packet", self._wrap_is_shadowed_packet)
+                self._patch(Shape, "intersect", self._wrap_shape_intersect)
+                self._patch(Shape, "hit_time", self._wrap_shape_hit_time)
+                self._patch(Shape, "intersect_packet", self._wrap_shape_intersect_packet)
+                self._patch(Material, "lighting", self._wrap_lighting)
+                self._patch(Matrix, "inverse", self._wrap_counted("matrix_inversions"))
+                self._patch(Matrix4, "inverse", self._wrap_counted("matrix_inversions"))
+                self._patch(Color, "__init__", self._wrap_counted("color_allocations"))
+            except BaseException:
+                # Put back whatever was replaced before the failure so that no
+                # wrappers are left behind.
+                self._unpatch()
+                raise
+
+            RenderStatistics._enabled = self
+
+        return self
+
+    def disable(self):
+        """
+        Stop collecting statistics and restore the original methods.  The
+        statistics collected remain available.
+        """
+        with RenderStatistics._enabled_lock:
+            if RenderStatistics._enabled is not self:
+                return
+
+            self._unpatch()
+            RenderStatistics._enabled = None
+
+    def __enter__(self):
+        return self.enable()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+        return False
+
+    def _patch(self, owner, name, make_wrapper):
+        original = owner.__dict__[name]
+        self._patches.append((owner, name, original))
+        setattr(owner, name, functools.wraps(original)(make_wrapper(original)))
+
+    def _unpatch(self):
+        while self._patches:
+            owner, name, original = self._patches.pop()
+            setattr(owner, name, original)
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _time(self, timer, seconds, counter=None, amount=1):
+        with self._lock:
+            self._timers[timer] += seconds
+            if counter is not None:
+                self._counters[counter] += amount
+
+    def _shape_statistics(self, shape):
+        # Keyed by id, as shapes are not necessarily hashable.  The statistics
+        # keep a reference to the shape so the id cannot be reused.  Must be
+        # called with the lock held.
+        statistics = self._shapes.get(id(shape))
+        if statistics is None:
+            statistics = self._shapes[id(shape)] = ShapeStatistics(shape=shape)
+
+        return statistics
+
+    def _record_intersection_tests(self, shape, tests, seconds):
+        with self._lock:
+            statistics = self._shape_statistics(shape)
+            statistics.intersection_tests += tests
+            statistics.intersect_seconds += seconds
+            self._counters["intersection_tests"] += tests
+
+    def _wrap_counted(self, counter):
+        def make_wrapper(original):
+            def wrapper(*args, **kwargs):
+                self._count(counter)
+                return original(*args, **kwargs)
+
+            return wrapper
+
+        return make_wrapper
+
+    def _wrap_timed(self, timer):
+        def make_wrapper(original):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self._time(timer, time.perf_counter() - start)
+
+            return wrapper
+
+        return make_wrapper
+
+    def _wrap_render(self, original):
+        def render(camera, world, *args, **kwargs):
+            with self._lock:
+                self._world = world
+                before = dict(self._counters)
+            start = time.perf_counter()
+            try:
+                return original(camera, world, *args, **kwargs)
+            finally:
+                render_seconds = time.perf_counter() - start
+                with self._lock:
+                    frame = {counter: self._counters[counter] - before[counter]
+                             for counter in self.COUNTERS}
+                    frame["render_seconds"] = render_seconds
+                    frame["pixels"] = camera.horizontal_size * camera.vertical_size
+                    self._frames.append(frame)
+
+        return render
+
+    def _wrap_ray_for_pixel(self, original):
+        def ray_for_pixel(camera, *args, **kwargs):
+            self._count("primary_rays")
+            return original(camera, *args, **kwargs)
+
+        return ray_for_pixel
+
+    def _wrap_rays_for_samples(self, original):
+        def rays_for_samples(camera, samples):
+            # The samples may be a generator, so they are counted from the
+            # rays that come back rather than from the samples.
+            origins, directions = original(camera, samples)
+            self._count("primary_rays", len(origins))
+            return origins, directions
+
+        return rays_for_samples
+
+    def _wrap_is_shadowed(self, original):
+        def is_shadowed(world, position, light=None):
+            start = time.perf_counter()
+            try:
+                return original(world, position, light)
+            finally:
+                self._time("shadow_seconds", time.perf_counter() - start,
+                           counter="shadow_rays")
+
+        return is_shadowed
+
+    def _wrap_is_shadowed_packet(self, original):
+        def is_shadowed_packet(world, positions, light=None, observer=None):
+            start = time.perf_counter()
+            try:
+                return original(world, positions, light, observer)
+            finally:
+                self._time("shadow_seconds", time.perf_counter() - start,
+                           counter="shadow_rays", amount=len(positions))
+
+        return is_shadowed_packet
+
+    def _wrap_shape_intersect(self, original):
+        def intersect(shape, ray=None):
+            start = time.perf_counter()
+            try:
+                return original(shape, ray) if ray is not None else original(shape)
+            finally:
+                self._record_intersection_tests(
+                    shape=shape, tests=1, seconds=time.perf_counter() - start)
+
+        return intersect
+
+    def _wrap_shape_hit_time(self, original):
+        def hit_time(shape, origin, direction, maximum_time=math.inf):
+            start = time.perf_counter()
+            try:
+                return original(shape, origin, direction, maximum_time)
+            finally:
+                self._record_intersection_tests(
+                    shape=shape, tests=1, seconds=time.perf_counter() - start)
+
+        return hit_time
+
+    def _wrap_shape_intersect_packet(self, original):
+        def intersect_packet(shape, origins, directions):
+            start = time.perf_counter()
+            try:
+                return original(shape, origins, directions)
+            finally:
+                self._record_intersection_tests(
+                    shape=shape, tests=len(origins),
+                    seconds=time.perf_counter() - start)
+
+        return intersect_packet
+
+    def _wrap_lighting(self, original):
+        def lighting(material, shape, light, position, eye, normal, in_shadow):
+            start = time.perf_counter()
+            try:
+                return original(material, shape, light, position, eye, normal,
+                                in_shadow)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self._counters["shading_calls"] += 1
+                    self._timers["shading_seconds"] += elapsed
+
+                    statistics = self._shape_statistics(shape)
+                    statistics.shading_calls += 1
+                    statistics.shading_seconds += elapsed
+
+                    entry = self._materials.get(id(material))
+                    if entry is None:
+                        entry = self._materials[id(material)] = [material, 0, 0.0]
+                    entry[1] += 1
+                    entry[2] += elapsed
+
+        return lighting
+
+    def _shape_label(self, shape):
+        # Shapes in the most recently rendered world are labeled by their
+        # position in the world's list of objects, which is stable from run to
+        # run.  Any other shape is labeled by its identity.
+        if self._world is not None:
+            for index, the_object in enumerate(self._world.objects):
+                if the_object is shape:
+                    return "{}[{}]".format(type(shape).__name__, index)
+
+        return "{}@{:#x}".format(type(shape).__name__, id(shape))
+
+    def report(self):
+        """
+        Summarize the statistics collected.
+
+        :return: A dictionary, suitable for serializing to JSON, with the
+            overall counters and timers, a list of per-frame statistics, and
+            lists of per-shape and per-material statistics ordered from the
+            most to the least expensive.
+        """
+        with self._lock:
+            shapes = sorted(self._shapes.values(),
+                            key=lambda statistics: statistics.intersect_seconds +
+                                                   statistics.shading_seconds,
+                            reverse=True)
+            shapes = [statistics.as_dict(label=self._shape_label(statistics.shape))
+                      for statistics in shapes]
+            materials = sorted(([material, calls, seconds]
+                                for material, calls, seconds in self._materials.values()),
+                               key=lambda entry: entry[2],
+                               reverse=True)
+
+            totals = dict(self._counters)
+            totals.update(self._timers)
+            frames = list(self._frames)
+
+        return {
+            "totals": totals,
+            "frames": frames,
+            "shapes": shapes,
+            "materials": [{"material": "Material@{:#x}".format(id(material)),
+                           "shading_calls": calls,
+                           "shading_seconds": seconds}
+                          for material, calls, seconds in materials],
+        }
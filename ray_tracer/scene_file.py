@@ -0,0 +1,533 @@
+import gc
+import hashlib
+import json
+import math
+import os
+import pickle
+import tempfile
+from array import array
+
+from camera import Camera
+from color import Color
+from lights import PointLight
+from materials import Material
+from matrix import Matrix, Matrix4
+from patterns.checker_board import CheckerBoard
+from patterns.gradient import Gradient
+from patterns.ring import Ring
+from patterns.stripe import Stripe
+from plane import Plane
+from point import Point
+from sphere import Sphere
+from transform_builder import TransformBuilder
+from vector import Vector
+from world import World
+
+# A scene file is a JSON document describing a world and the camera to render
+# it with, e.g.:
+#
+#   {
+#     "camera": {"width": 200, "height": 100, "field_of_view": 1.0472,
+#                "from": [0, 1.5, -5], "to": [0, 1, 0], "up": [0, 1, 0]},
+#     "lights": [{"position": [-10, 10, -10], "intensity": [1, 1, 1]}],
+#     "materials": {
+#       "floor": {"color": [1, 0.9, 0.9], "specular": 1}
+#     },
+#     "objects": [
+#       {"type": "plane", "material": "floor"},
+#       {"type": "sphere",
+#        "transform": [["scale", 0.5, 0.5, 0.5], ["translate", 1.5, 0.5, -0.5]],
+#        "material": {"color": [1, 0.1, 0.1], "diffuse": 0.7, "specular": 0.3}}
+#     ]
+#   }
+#
+# - A transform is a list of steps applied in order, i.e., the example sphere is
+#   scaled and then translated, exactly like
+#   Matrix.identity().scale(...).translate(...).  The steps are translate,
+#   scale (x, y, z), rotate_x, rotate_y, rotate_z (radians), shear (the six
+#   proportions in the order Matrix.shearing_transform takes them), and matrix
+#   (the 16 values of a matrix in row-major order).
+# - A material is either an object with any of the Material properties
+#   (color, ambient, diffuse, specular, shininess, pattern) or the name of one
+#   of the shared materials.  Objects naming the same material share a single
+#   Material object.
+# - A pattern is an object with a type (stripe, gradient, ring, or
+#   checker_board), colors a and b, and an optional transform.
+# - The camera is positioned either with from/to/up or with a transform.
+# - Colors, points, and vectors are lists of three numbers.
+#
+# Parsing a large scene mostly consists of validating the document and
+# building transforms step by step, so a parsed scene can also be saved in a
+# compiled form that keeps every object's composed transform and its inverse
+# as raw doubles, which loads much faster.  Compiled scenes are only meant to be
+# read back by the process (or user) that wrote them: they are partly pickled,
+# and like any pickle, a compiled scene from an untrusted source must never be
+# loaded.
+
+# Bump this whenever the compiled form changes (e.g., a class gains a cached
+# attribute) so that stale compiled scenes are parsed again.
+COMPILED_VERSION = 2
+
+_COMPILED_MAGIC = b"RTSCENE\n"
+
+_SHAPES = {
+    "sphere": Sphere,
+    "plane": Plane,
+}
+
+_PATTERNS = {
+    "stripe": Stripe,
+    "gradient": Gradient,
+    "ring": Ring,
+    "checker_board": CheckerBoard,
+}
+
+
+def _numbers(value, count, what):
+    if not isinstance(value, list) or len(value) != count or \
+            not all(isinstance(item, (int, float)) and not isinstance(item, bool)
+                    for item in value):
+        raise ValueError("{} must be a list of {} numbers".format(what, count))
+
+    return value
+
+
+def _color(value, what="Color"):
+    red, green, blue = _numbers(value, 3, what)
+
+    return Color(red=red, green=green, blue=blue)
+
+
+def _point(value, what="Point"):
+    x, y, z = _numbers(value, 3, what)
+
+    return Point(x=x, y=y, z=z)
+
+
+def _vector(value, what="Vector"):
+    x, y, z = _numbers(value, 3, what)
+
+    return Vector(x=x, y=y, z=z)
+
+
+def _transform(steps):
+    # Build the transform from its steps in the order they are applied.  The
+    # builder composes the inverse along with the transform, so the shapes do
+    # not have to invert it.
+    if steps is None:
+        return None
+    if not isinstance(steps, list):
+        raise ValueError("A transform must be a list of steps")
+
+    builder = TransformBuilder()
+    for step in steps:
+        if not isinstance(step, list) or not step or not isinstance(step[0], str):
+            raise ValueError("A transform step must be a list starting with "
+                             "its name")
+
+        name, arguments = step[0], step[1:]
+        if name == "translate":
+            x, y, z = _numbers(arguments, 3, "translate")
+            builder.translate(x=x, y=y, z=z)
+        elif name == "scale":
+            x, y, z = _numbers(arguments, 3, "scale")
+            builder.scale(x=x, y=y, z=z)
+        elif name == "rotate_x":
+            builder.rotate_x(radians=_numbers(arguments, 1, "rotate_x")[0])
+        elif name == "rotate_y":
+            builder.rotate_y(radians=_numbers(arguments, 1, "rotate_y")[0])
+        elif name == "rotate_z":
+            builder.rotate_z(radians=_numbers(arguments, 1, "rotate_z")[0])
+        elif name == "shear":
+            builder.shear(*_numbers(arguments, 6, "shear"))
+        elif name == "matrix":
+            builder.matrix(matrix=Matrix4(values=_numbers(arguments, 16, "matrix")))
+        else:
+            raise ValueError("Unknown transform step {}".format(name))
+
+    return builder
+
+
+def _pattern(description):
+    if not isinstance(description, dict) or description.get("type") not in _PATTERNS:
+        raise ValueError("A pattern must have a type, one of {}".format(
+            ", ".join(sorted(_PATTERNS))))
+
+    return _PATTERNS[description["type"]](
+        color_a=_color(description["a"], "Pattern color a") if "a" in description else None,
+        color_b=_color(description["b"], "Pattern color b") if "b" in description else None,
+        transform=_transform(description.get("transform")))
+
+
+def _material(description):
+    if not isinstance(description, dict):
+        raise ValueError("A material must be an object")
+
+    material = Material(color=_color(description["color"], "Material color")
+                        if "color" in description else None)
+    for name in ("ambient", "diffuse", "specular", "shininess"):
+        if name in description:
+            setattr(material, name, float(_numbers([description[name]], 1, name)[0]))
+    if "pattern" in description:
+        material.pattern = _pattern(description["pattern"])
+
+    return material
+
+
+def _camera(description):
+    if not isinstance(description, dict):
+        raise ValueError("The camera must be an object")
+
+    if "transform" in description:
+        transform = _transform(description["transform"])
+    elif "from" in description:
+        transform = Matrix.view_transform(
+            eye=_point(description["from"], "Camera from"),
+            to=_point(description.get("to", [0, 0, 0]), "Camera to"),
+            up=_vector(description.get("up", [0, 1, 0]), "Camera up"))
+    else:
+        transform = None
+
+    return Camera(horizontal_size=int(description.get("width", 100)),
+                  vertical_size=int(description.get("height", 100)),
+                  field_of_view=float(description.get("field_of_view", math.pi)),
+                  transform=transform)
+
+
+def parse_scene(document):
+    """
+    Build the world and camera described by a parsed scene document.
+
+    :param document: A dictionary, the parsed JSON of a scene file
+    :return: A (world, camera) tuple
+    """
+    if not isinstance(document, dict):
+        raise ValueError("A scene must be an object")
+
+    materials = {name: _material(description)
+                 for name, description in document.get("materials", {}).items()}
+
+    lights = []
+    for description in document.get("lights", []):
+        if not isinstance(description, dict):
+            raise ValueError("A light must be an object")
+        lights.append(PointLight(
+            position=_point(description.get("position", [0, 0, 0]), "Light position"),
+            intensity=_color(description.get("intensity", [1, 1, 1]), "Light intensity"),
+            range=description.get("range")))
+
+    objects = []
+    for description in document.get("objects", []):
+        if not isinstance(description, dict):
+            raise ValueError("An object must be an object")
+        shape_class = _SHAPES.get(description.get("type"))
+        if shape_class is None:
+            raise ValueError("An object must have a type, one of {}".format(
+                ", ".join(sorted(_SHAPES))))
+
+        material = description.get("material")
+        if isinstance(material, str):
+            if material not in materials:
+                raise ValueError("Unknown material {}".format(material))
+            material = materials[material]
+        elif material is not None:
+            material = _material(material)
+
+        objects.append(shape_class(transform=_transform(description.get("transform")),
+                                   material=material,
+                                   casts_shadow=bool(description.get("casts_shadow",
+                                                                     True))))
+
+    world = World(objects=objects,
+                  lights=lights,
+                  light_threshold=document.get("light_threshold", 0.0))
+    if document.get("bvh"):
+        world.build_bvh()
+
+    return world, _camera(document.get("camera", {}))
+
+
+def _shape_type(the_object):
+    # The name of an object's type in a scene file.  Only what a scene file can
+    # describe can be written, so spheres must be unit spheres (i.e., sized and
+    # placed by their transforms).
+    object_type = next((name for name, shape_class in _SHAPES.items()
+                        if type(the_object) is shape_class), None)
+    if object_type is None:
+        raise ValueError("Cannot describe a {}".format(type(the_object).__name__))
+    if object_type == "sphere" and \
+            (the_object.center != Point(x=0, y=0, z=0) or the_object.radius != 1):
+        raise ValueError("Cannot describe a sphere that is not a unit sphere")
+
+    return object_type
+
+
+def _matrix_steps(matrix):
+    # A transform as a single matrix step, or None for the identity.  The
+    # values are compared exactly, rather than with Matrix's approximate
+    # equality, so that a transform that is merely close to the identity
+    # (e.g., a tiny translation) is still written out.
+    values = matrix.values
+    if values == Matrix.identity().values:
+        return None
+
+    return [["matrix"] + list(values)]
+
+
+def _color_list(color):
+    return [color.red, color.green, color.blue]
+
+
+def _material_description(material):
+    description = {"color": _color_list(material.color),
+                   "ambient": material.ambient,
+                   "diffuse": material.diffuse,
+                   "specular": material.specular,
+                   "shininess": material.shininess}
+    if material.pattern is not None:
+        pattern_type = next((name for name, pattern_class in _PATTERNS.items()
+                             if type(material.pattern) is pattern_class), None)
+        if pattern_type is None:
+            raise ValueError("Cannot describe a {} pattern".format(
+                type(material.pattern).__name__))
+        description["pattern"] = {"type": pattern_type,
+                                   "a": _color_list(material.pattern.color_a),
+                                   "b": _color_list(material.pattern.color_b)}
+        steps = _matrix_steps(material.pattern.transform)
+        if steps:
+            description["pattern"]["transform"] = steps
+
+    return description
+
+
+def scene_document(world, camera):
+    """
+    Describe a world and camera as a scene document, i.e., the inverse of
+    parse_scene.  Transforms are written as single matrix steps, so parsing
+    the document gives back exactly the same scene, and materials shared by
+    several objects are written once as named materials.
+
+    :param world: World, the world to describe
+    :param camera: Camera, the camera to describe
+    :return: A dictionary that can be written out as JSON
+    """
+    materials = {}
+    names = {}
+    objects = []
+    for the_object in world.objects:
+        object_type = _shape_type(the_object)
+        name = names.get(id(the_object.material))
+        if name is None:
+            name = names[id(the_object.material)] = "material_{}".format(len(names))
+            materials[name] = _material_description(the_object.material)
+
+        description = {"type": object_type, "material": name}
+        steps = _matrix_steps(the_object.transform)
+        if steps:
+            description["transform"] = steps
+        if not the_object.casts_shadow:
+            description["casts_shadow"] = False
+        objects.append(description)
+
+    lights = []
+    for light in world.lights:
+        description = {"position": [light.position.x, light.position.y, light.position.z],
+                       "intensity": _color_list(light.intensity)}
+        if light.range is not None:
+            description["range"] = light.range
+        lights.append(description)
+
+    camera_description = {"width": camera.horizontal_size,
+                          "height": camera.vertical_size,
+                          "field_of_view": camera.field_of_view}
+    steps = _matrix_steps(camera.transform)
+    if steps:
+        camera_description["transform"] = steps
+
+    document = {"camera": camera_description,
+                "lights": lights,
+                "materials": materials,
+                "objects": objects}
+    if world.light_threshold:
+        document["light_threshold"] = world.light_threshold
+    if world.bvh is not None:
+        document["bvh"] = True
+
+    return document
+
+
+def save_scene(world, camera, path):
+    """
+    Write a world and camera to a scene file.
+
+    :param world: World, the world to write
+    :param camera: Camera, the camera to write
+    :param path: The path of the scene file
+    """
+    with open(path, "w") as file:
+        json.dump(scene_document(world=world, camera=camera), file, indent=1)
+
+
+def compile_scene(world, camera, path, source_hash=None):
+    """
+    Write a world and camera in the compiled form.  The objects, which make up
+    nearly all of a large scene, are stored as flat arrays of their types,
+    material indices, and already parsed transforms and their inverses rather
+    than as pickled objects, as rebuilding the shapes from those is several times faster than
+    unpickling them.  The rest of the scene is small and simply pickled.
+
+    :param world: World, the world to write
+    :param camera: Camera, the camera to write
+    :param path: The path of the compiled scene
+    :param source_hash: String, the hash of the scene file the scene was
+        parsed from, if any, which load_compiled_scene can check
+    """
+    shape_types = list(_SHAPES)
+    materials = []
+    material_indices = {}
+    types = array('B')
+    object_materials = array('I')
+    casts_shadow = array('B')
+    transforms = array('d')
+    inverse_transforms = array('d')
+    for the_object in world.objects:
+        types.append(shape_types.index(_shape_type(the_object)))
+
+        index = material_indices.get(id(the_object.material))
+        if index is None:
+            index = material_indices[id(the_object.material)] = len(materials)
+            materials.append(the_object.material)
+        object_materials.append(index)
+
+        casts_shadow.append(1 if the_object.casts_shadow else 0)
+        transforms.extend(the_object.transform.values)
+        inverse_transforms.extend(the_object.inverse_transform.values)
+
+    data = _COMPILED_MAGIC + pickle.dumps((COMPILED_VERSION,
+                                           source_hash,
+                                           camera,
+                                           world.lights,
+                                           world.light_threshold,
+                                           world.bvh is not None,
+                                           materials,
+                                           types.tobytes(),
+                                           object_materials,
+                                           casts_shadow.tobytes(),
+                                           transforms,
+                                           inverse_transforms),
+                                          protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Write to a temporary file and then move it into place so that other
+    # processes never see a partially written scene.
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def load_compiled_scene(path, source_hash=None):
+    """
+    Read a compiled scene written by compile_scene.
+
+    :param path: The path of the compiled scene
+    :param source_hash: String, if not None, the hash the scene file that the
+        compiled scene was parsed from must have
+    :return: A (world, camera) tuple, or None if the file is not a compiled
+        scene of the current version (or not of the expected scene file)
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if not data.startswith(_COMPILED_MAGIC):
+        return None
+
+    # Loading a large scene allocates several objects per shape, and the
+    # cyclic garbage collector would repeatedly scan every object loaded so
+    # far while they are, which takes a large part of the load time.  None of
+    # them are garbage, so the collector is paused until the scene is loaded.
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _load_compiled_data(data=data[len(_COMPILED_MAGIC):],
+                                   source_hash=source_hash)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _load_compiled_data(data, source_hash):
+    try:
+        compiled = pickle.loads(data)
+    except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(compiled, tuple) or compiled[0] != COMPILED_VERSION:
+        return None
+
+    _, compiled_source_hash, camera, lights, light_threshold, use_bvh, materials, \
+        types, object_materials, casts_shadow, transforms, inverse_transforms = \
+        compiled
+    if source_hash is not None and compiled_source_hash != source_hash:
+        return None
+
+    # The transforms were checked and inverted when the scene was compiled,
+    # so they are handed to the shapes as they are, through the trusted path
+    # that neither checks nor inverts them again.
+    shape_classes = list(_SHAPES.values())
+    objects = []
+    for index, shape_type in enumerate(types):
+        start = index * 16
+        shape = shape_classes[shape_type](material=materials[object_materials[index]],
+                                          casts_shadow=bool(casts_shadow[index]))
+        shape._set_transform_cache(
+            transform=Matrix4(values=transforms[start:start + 16]),
+            inverse_transform=Matrix4(values=inverse_transforms[start:start + 16]))
+        objects.append(shape)
+
+    return World(objects=objects,
+                 lights=lights,
+                 light_threshold=light_threshold,
+                 use_bvh=use_bvh), camera
+
+
+def load_scene(path, compiled_directory=None):
+    """
+    Load a scene file.
+
+    :param path: The path of the scene file
+    :param compiled_directory: If not None, the directory in which compiled
+        forms of scene files are kept.  The compiled form is keyed by the
+        content of the scene file, so it is used whenever the scene file is
+        unchanged and the scene file is parsed (and compiled again) otherwise.
+    :return: A (world, camera) tuple
+    """
+    with open(path, "rb") as file:
+        source = file.read()
+
+    compiled_path = None
+    if compiled_directory is not None:
+        source_hash = hashlib.sha256(source).hexdigest()
+        compiled_path = os.path.join(compiled_directory, source_hash + ".rtscene")
+        if os.path.exists(compiled_path):
+            scene = load_compiled_scene(path=compiled_path, source_hash=source_hash)
+            if scene is not None:
+                return scene
+
+    try:
+        document = json.loads(source.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError("{} is not a valid scene file: {}".format(path, error))
+
+    world, camera = parse_scene(document)
+
+    if compiled_path is not None:
+        os.makedirs(compiled_directory, exist_ok=True)
+        compile_scene(world=world, camera=camera, path=compiled_path,
+                      source_hash=source_hash)
+
+    return world, camera
@@ -0,0 +1,203 @@
+import math
+
+from camera import Camera
+from color import Color
+from lights import PointLight
+from materials import Material
+from matrix import Matrix
+from patterns.stripe import Stripe
+from plane import Plane
+from point import Point
+from sphere import Sphere
+from vector import Vector
+from world import World
+
+# The scenes rendered by the chapter_*_pit.py scripts, rebuilt as functions
+# that return a (world, camera) tuple so that they can be used as workloads
+# with any resolution and any number of objects.  Every scene function takes
+# the same three parameters:
+#
+# - horizontal_size / vertical_size: the size of the rendered image in pixels
+# - additional_spheres: the number of small spheres to scatter over the floor
+#   in addition to the scene's own objects, to scale up the object count
+#
+# Chapters 5 and 6 did not use a camera or a world; they cast rays at a sphere
+# from a fixed eye point through a 7x7 "wall" 15 units away.  They are
+# rebuilt here as a camera with the field of view that makes the image cover
+# exactly that wall.
+
+
+def _scatter_spheres(count):
+    # Place the spheres on a grid in front of the scene's own objects, filling
+    # in rows from the back to the front, so that the same count always gives
+    # the same scene.
+    spheres = []
+    columns = max(1, math.ceil(math.sqrt(count)))
+    spacing = 6.0 / columns
+    for index in range(count):
+        row, column = divmod(index, columns)
+        radius = spacing / 4
+        material = Material(color=Color(red=(column % 3) / 2,
+                                        green=(row % 3) / 2,
+                                        blue=0.5),
+                            diffuse=0.7,
+                            specular=0.3)
+        spheres.append(
+            Sphere(transform=Matrix.translation_transform(x=-3 + spacing * (column + 0.5),
+                                                          y=radius,
+                                                          z=3 - spacing * row) *
+                             Matrix.scaling_transform(x=radius, y=radius, z=radius),
+                   material=material))
+
+    return spheres
+
+
+def _wall_camera(horizontal_size, vertical_size):
+    # The camera equivalent of the chapter 5 and 6 wall, which is 7 units wide
+    # and 15 units from the eye.
+    return Camera(horizontal_size=horizontal_size,
+                  vertical_size=vertical_size,
+                  field_of_view=2 * math.atan(3.5 / 15),
+                  transform=Matrix.view_transform(eye=Point(x=0, y=0, z=-5),
+                                                  to=Point(x=0, y=0, z=0),
+                                                  up=Vector(x=0, y=1, z=0)))
+
+
+def _room_camera(horizontal_size, vertical_size):
+    return Camera(horizontal_size=horizontal_size,
+                  vertical_size=vertical_size,
+                  field_of_view=math.pi/3,
+                  transform=Matrix.view_transform(eye=Point(x=0, y=1.5, z=-5),
+                                                  to=Point(x=0, y=1, z=0),
+                                                  up=Vector(x=0, y=1, z=0)))
+
+
+def _white_light():
+    return PointLight(position=Point(x=-10, y=10, z=-10),
+                      intensity=Color(red=1, green=1, blue=1))
+
+
+def _three_spheres(middle_material):
+    middle_sphere = Sphere(transform=Matrix.translation_transform(x=-0.5,
+                                                                  y=1,
+                                                                  z=0.5),
+                           material=middle_material)
+    right_sphere = Sphere(transform=Matrix.translation_transform(x=1.5,
+                                                                 y=0.5,
+                                                                 z=-0.5) *
+                                    Matrix.scaling_transform(x=0.5, y=0.5, z=0.5),
+                          material=Material(color=Color(red=1, green=0.1, blue=0.1),
+                                            diffuse=0.7,
+                                            specular=0.3))
+    left_sphere = Sphere(transform=Matrix.translation_transform(x=-1.5,
+                                                                y=0.33,
+                                                                z=-0.75) *
+                                   Matrix.scaling_transform(x=0.33, y=0.33, z=0.33),
+                         material=Material(color=Color(red=0.1, green=0.1, blue=1),
+                                           diffuse=0.7,
+                                           specular=0.3))
+
+    return [middle_sphere, right_sphere, left_sphere]
+
+
+def chapter_5_scene(horizontal_size=100, vertical_size=100, additional_spheres=0):
+    """
+    The red silhouette of a sphere.  The material is all ambient so that the
+    sphere is a flat color, which makes this the cheapest workload: rays only
+    need to be intersected with the scene.
+    """
+    sphere = Sphere(material=Material(color=Color(red=1, green=0, blue=0),
+                                      ambient=1,
+                                      diffuse=0,
+                                      specular=0))
+    world = World(objects=[sphere] + _scatter_spheres(additional_spheres),
+                  light_source=_white_light())
+
+    return world, _wall_camera(horizontal_size, vertical_size)
+
+
+def chapter_6_scene(horizontal_size=100, vertical_size=100, additional_spheres=0):
+    """
+    A single purple sphere lit by a white light above and to the left.
+    """
+    sphere = Sphere(material=Material(color=Color(red=1, green=0.2, blue=1)))
+    world = World(objects=[sphere] + _scatter_spheres(additional_spheres),
+                  light_source=_white_light())
+
+    return world, _wall_camera(horizontal_size, vertical_size)
+
+
+def chapter_7_scene(horizontal_size=200, vertical_size=100, additional_spheres=0):
+    """
+    Three spheres in a room whose floor and walls are flattened spheres.
+    """
+    floor = Sphere(transform=Matrix.scaling_transform(x=10, y=0.01, z=10),
+                   material=Material(color=Color(red=1, green=0.9, blue=0.9),
+                                     specular=1))
+    left_wall = Sphere(transform=Matrix.translation_transform(x=0, y=0, z=5) *
+                                 Matrix.rotation_y_transform(radians=-math.pi/4) *
+                                 Matrix.rotation_x_transform(radians=math.pi/2) *
+                                 Matrix.scaling_transform(x=10, y=0.01, z=10),
+                       material=floor.material)
+    right_wall = Sphere(transform=Matrix.translation_transform(x=0, y=0, z=5) *
+                                  Matrix.rotation_y_transform(radians=math.pi/4) *
+                                  Matrix.rotation_x_transform(radians=math.pi/2) *
+                                  Matrix.scaling_transform(x=10, y=0.01, z=10),
+                        material=floor.material)
+    spheres = _three_spheres(Material(color=Color(red=0.1, green=1, blue=0.5),
+                                      diffuse=0.7,
+                                      specular=0.3))
+    world = World(objects=[floor, left_wall, right_wall] + spheres +
+                          _scatter_spheres(additional_spheres),
+                  light_source=_white_light())
+
+    return world, _room_camera(horizontal_size, vertical_size)
+
+
+def chapter_9_scene(horizontal_size=200, vertical_size=100, additional_spheres=0):
+    """
+    Three spheres on a plane floor in front of a plane wall.
+    """
+    floor = Plane(material=Material(color=Color(red=1, green=0.9, blue=0.9),
+                                    specular=1))
+    wall = Plane(transform=Matrix.translation_transform(x=0, y=0, z=5) *
+                           Matrix.rotation_x_transform(radians=math.pi/2),
+                 material=floor.material)
+    spheres = _three_spheres(Material(color=Color(red=0.1, green=1, blue=0.5),
+                                      diffuse=0.7,
+                                      specular=0.3))
+    world = World(objects=[floor, wall] + spheres +
+                          _scatter_spheres(additional_spheres),
+                  light_source=_white_light())
+
+    return world, _room_camera(horizontal_size, vertical_size)
+
+
+def chapter_10_scene(horizontal_size=200, vertical_size=100, additional_spheres=0):
+    """
+    The chapter 9 scene with a striped middle sphere.
+    """
+    floor = Plane(material=Material(color=Color(red=1, green=0.9, blue=0.9),
+                                    specular=1))
+    wall = Plane(transform=Matrix.translation_transform(x=0, y=0, z=5) *
+                           Matrix.rotation_x_transform(radians=math.pi/2),
+                 material=floor.material)
+    material = Material(diffuse=0.7, specular=0.3)
+    material.pattern = Stripe(color_a=Color(red=1, green=0, blue=0),
+                              color_b=Color(red=0, green=1, blue=0),
+                              transform=Matrix.rotation_z_transform(radians=math.pi/4) *
+                                        Matrix.scaling_transform(x=0.25, y=1, z=1))
+    world = World(objects=[floor, wall] + _three_spheres(material) +
+                          _scatter_spheres(additional_spheres),
+                  light_source=_white_light())
+
+    return world, _room_camera(horizontal_size, vertical_size)
+
+
+SCENES = {
+    "chapter_5": chapter_5_scene,
+    "chapter_6": chapter_6_scene,
+    "chapter_7": chapter_7_scene,
+    "chapter_9": chapter_9_scene,
+    "chapter_10": chapter_10_scene,
+}
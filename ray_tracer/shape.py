@@ -1,17 +1,23 @@
+import math
+
+from bounds import BoundingBox
+from intersections import Intersection, Intersections
 from materials import Material
-from matrix import Matrix
 from point import Point
 from ray import Ray
+from transformable import Transformable
+from vector import Vector
 
 
-class Shape:
+class Shape(Transformable):
     """
     A base class that is used to define a generic shape and the common data
     and operations that all shapes share.
     """
     def __init__(self,
                  transform=None,
-                 material=None):
+                 material=None,
+                 casts_shadow=True):
         """
         Initialize a newly-created Shape object.
 
@@ -19,19 +25,12 @@ class Shape:
             then the identity transform is used.
         :param material: The material for the shape.  If None, the default
             material is used.
+        :param casts_shadow: If False, the shape is ignored when determining
+            if a point is in a shadow.
         """
         self.transform = transform
         self.material = material
-
-    @property
-    def transform(self):
-        return self._transform
-
-    @transform.setter
-    def transform(self, value):
-        self._transform = value if value else Matrix.identity()
-        self._inverse_transform = self._transform.inverse()
-        self._inverse_transform_transpose = self._inverse_transform.transpose()
+        self.casts_shadow = casts_shadow
 
     @property
     def material(self):
@@ -41,6 +40,14 @@ class Shape:
     def material(self, value):
         self._material = value if value else Material()
 
+    @property
+    def casts_shadow(self):
+        return self._casts_shadow
+
+    @casts_shadow.setter
+    def casts_shadow(self, value):
+        self._casts_shadow = value
+
     def _intersect(self, ray):
         """
         Derived classes must override this method.
@@ -73,6 +80,28 @@ class Shape:
         raise NotImplementedError(
             "{} does not implement _normal_at method".format(self.__class__.__name__))
 
+    def bounds(self):
+        """
+        Derived classes should override this method.
+
+        Return the object space bounding box for the shape.  The default
+        implementation returns a box that is infinite in every direction, which
+        is always correct but never allows a ray to be culled.
+
+        :return: BoundingBox, the object space bounds of the shape
+        """
+        return BoundingBox(minimum=Point(x=-math.inf, y=-math.inf, z=-math.inf),
+                           maximum=Point(x=math.inf, y=math.inf, z=math.inf))
+
+    def world_bounds(self):
+        """
+        Return the world space bounding box for the shape, i.e., the object
+        space bounds transformed by the shape's transform.
+
+        :return: BoundingBox, the world space bounds of the shape
+        """
+        return self.bounds().transform(self._transform)
+
     def intersect(self, ray=Ray()):
         """
         Given a ray, return the set of intersections with the shape.
@@ -83,9 +112,152 @@ class Shape:
             representing where the ray intersects the shape
         """
         # Transform the ray to object space and then let the derived class
-        # perform its specific intersect algorithm.
-        object_space_ray = ray.transform(self.transform.inverse())
-        return self._intersect(ray=object_space_ray)
+        # perform its specific intersect algorithm.  The transform is applied
+        # directly to the components of the ray's origin (a point) and
+        # direction (a vector) so that no intermediate Ray, Point, or Vector
+        # objects are created.
+        m00, m01, m02, m03, \
+            m10, m11, m12, m13, \
+            m20, m21, m22, m23 = self.inverse_transform_values
+        x, y, z = ray.origin.x, ray.origin.y, ray.origin.z
+        origin = (m00 * x + m01 * y + m02 * z + m03,
+                  m10 * x + m11 * y + m12 * z + m13,
+                  m20 * x + m21 * y + m22 * z + m23)
+        x, y, z = ray.direction.x, ray.direction.y, ray.direction.z
+        direction = (m00 * x + m01 * y + m02 * z,
+                     m10 * x + m11 * y + m12 * z,
+                     m20 * x + m21 * y + m22 * z)
+
+        return Intersections(*[Intersection(time=time, shape=self)
+                               for time in self._intersect_times(origin=origin,
+                                                                 direction=direction)])
+
+    def hit_time(self, origin, direction, maximum_time=math.inf):
+        """
+        Find the nearest non-negative time at which a ray intersects the shape,
+        ignoring intersections at or beyond a maximum time.  Unlike intersect,
+        nothing is allocated for the intersections, which makes this the
+        cheaper query when only the hit matters.
+
+        :param origin: The (x, y, z) world space origin of the ray
+        :param direction: The (x, y, z) world space direction of the ray
+        :param maximum_time: The time at or beyond which intersections are
+            ignored, e.g., the time of the nearest hit on another shape
+        :return: The time of the nearest intersection in [0, maximum_time), or
+            None if there is none
+        """
+        m00, m01, m02, m03, \
+            m10, m11, m12, m13, \
+            m20, m21, m22, m23 = self.inverse_transform_values
+        x, y, z = origin
+        object_origin = (m00 * x + m01 * y + m02 * z + m03,
+                         m10 * x + m11 * y + m12 * z + m13,
+                         m20 * x + m21 * y + m22 * z + m23)
+        x, y, z = direction
+        object_direction = (m00 * x + m01 * y + m02 * z,
+                            m10 * x + m11 * y + m12 * z,
+                            m20 * x + m21 * y + m22 * z)
+
+        nearest = None
+        for time in self._intersect_times(origin=object_origin,
+                                          direction=object_direction):
+            if 0 <= time < maximum_time:
+                nearest = maximum_time = time
+
+        return nearest
+
+    def _intersect_times(self, origin, direction):
+        """
+        Derived classes should override this method.
+
+        When the public intersect method is called, the base class will invoke
+        this method with the components of the ray as defined in object space
+        and the derived class then solves its shape-specific equation for the
+        times directly on those components.  The default implementation falls
+        back to building an object space Ray and calling _intersect.
+
+        :param origin: The (x, y, z) object space origin of the ray
+        :param direction: The (x, y, z) object space direction of the ray
+        :return: A sequence of the times at which the ray intersects the shape
+        """
+        intersections = self._intersect(ray=Ray(origin=Point(*origin),
+                                                direction=Vector(*direction)))
+
+        return [intersections[index].time for index in range(intersections.count)]
+
+    def _intersect_packet(self, origins, directions):
+        """
+        Derived classes should override this method.
+
+        When the public intersect_packet method is called, the base class will
+        invoke this method with the packet of rays as defined in object space
+        and the derived class then performs its shape-specific intersect
+        algorithm for every ray in the packet.  The default implementation
+        falls back to intersecting the rays one at a time with _intersect.
+
+        :param origins: A sequence of (x, y, z) tuples, the object space
+            origins of the rays in the packet.
+        :param directions: A sequence of (x, y, z) tuples, the object space
+            directions of the rays in the packet.
+        :return: A list, parallel to origins and directions, of sequences of
+            the times at which each ray intersects the shape.
+        """
+        packet_times = []
+        for origin, direction in zip(origins, directions):
+            intersections = self._intersect(ray=Ray(origin=Point(*origin),
+                                                    direction=Vector(*direction)))
+            packet_times.append([intersections[index].time
+                                 for index in range(intersections.count)])
+
+        return packet_times
+
+    def intersect_packet(self, origins, directions):
+        """
+        Given a packet of rays, return the times at which each of the rays
+        intersects the shape.
+
+        The rays are described by raw (x, y, z) components instead of Ray
+        objects so that a whole packet of rays (e.g., a scanline or a tile from
+        the camera) can be transformed and intersected without allocating
+        intermediate objects for every ray.
+
+        :param origins: A sequence of (x, y, z) tuples, the world space origins
+            of the rays in the packet.
+        :param directions: A sequence of (x, y, z) tuples, the world space
+            directions of the rays in the packet.
+        :return: A list, parallel to origins and directions, of sequences of
+            the times at which each ray intersects the shape.
+        """
+        # Transform the packet to object space and then let the derived class
+        # perform its specific intersect algorithm.  The ray origins are points
+        # and the ray directions are vectors, so the translation component of
+        # the inverse transform only applies to the origins.
+        m00, m01, m02, m03, \
+            m10, m11, m12, m13, \
+            m20, m21, m22, m23 = self.inverse_transform_values
+
+        # Rays in a packet often share an origin (e.g., every ray from the
+        # camera starts at the camera), so an origin that is the same object
+        # as the previous ray's is transformed only once, and the object space
+        # origins share it as well, which lets the derived class reuse any
+        # terms that depend only on the origin.
+        object_origins = []
+        last_origin = last_object_origin = None
+        for origin in origins:
+            if origin is not last_origin:
+                x, y, z = origin
+                last_origin = origin
+                last_object_origin = (m00 * x + m01 * y + m02 * z + m03,
+                                      m10 * x + m11 * y + m12 * z + m13,
+                                      m20 * x + m21 * y + m22 * z + m23)
+            object_origins.append(last_object_origin)
+        object_directions = [(m00 * x + m01 * y + m02 * z,
+                              m10 * x + m11 * y + m12 * z,
+                              m20 * x + m21 * y + m22 * z)
+                             for x, y, z in directions]
+
+        return self._intersect_packet(origins=object_origins,
+                                      directions=object_directions)
 
     def normal_at(self, position=Point()):
         """
@@ -97,10 +269,10 @@ class Shape:
         """
         # Transform the point to object space and then let the derived class
         # perform its specific algorithm for computing the normal.
-        object_normal = self._normal_at(position=self._inverse_transform * position)
+        object_normal = self._normal_at(position=self.inverse_transform * position)
 
         # Convert the object normal to a world normal
-        world_normal = self._inverse_transform_transpose * object_normal
+        world_normal = self.inverse_transform_transpose * object_normal
         world_normal.w = 0
 
-        return world_normal.normalize()
+        return world_normal.normalize_unchecked()
@@ -1,5 +1,6 @@
 import math
 
+from bounds import BoundingBox
 from intersections import Intersection, Intersections
 from point import Point
 from shape import Shape
@@ -10,8 +11,11 @@ class Sphere(Shape):
                  center=Point(),
                  radius=1.0,
                  transform=None,
-                 material=None):
-        super().__init__(transform=transform, material=material)
+                 material=None,
+                 casts_shadow=True):
+        super().__init__(transform=transform,
+                         material=material,
+                         casts_shadow=casts_shadow)
         self.center = center
         self.radius = radius
 
@@ -32,6 +36,20 @@ class Sphere(Shape):
     def radius(self, value):
         self._radius = value
 
+    def bounds(self):
+        """
+        Override base class method to provide the sphere's object space bounds,
+        the cube that just contains the sphere.
+
+        :return: BoundingBox, the object space bounds of the sphere
+        """
+        return BoundingBox(minimum=Point(x=self._center.x - self._radius,
+                                         y=self._center.y - self._radius,
+                                         z=self._center.z - self._radius),
+                           maximum=Point(x=self._center.x + self._radius,
+                                         y=self._center.y + self._radius,
+                                         z=self._center.z + self._radius))
+
     def _intersect(self, ray):
         """
         Override base class method to provide sphere-specific method for
@@ -136,6 +154,98 @@ class Sphere(Shape):
 
         return Intersections(i1, i2)
 
+    def _intersect_times(self, origin, direction):
+        """
+        Override base class method to provide sphere-specific method for
+        computing the times at which a ray intersects the sphere.
+
+        This method should not be called directly.  Instead, call the public
+        intersect method defined in the Shape class.
+
+        :param origin: The (x, y, z) object space origin of the ray
+        :param direction: The (x, y, z) object space direction of the ray
+        :return: A tuple of the times at which the ray intersects the sphere
+        """
+        # This is the same quadratic as described in _intersect, just solved
+        # directly on the components of the ray.
+        origin_x, origin_y, origin_z = origin
+        direction_x, direction_y, direction_z = direction
+
+        to_ray_x = origin_x - self._center.x
+        to_ray_y = origin_y - self._center.y
+        to_ray_z = origin_z - self._center.z
+
+        a = direction_x * direction_x + \
+            direction_y * direction_y + \
+            direction_z * direction_z
+        b = 2 * (direction_x * to_ray_x +
+                 direction_y * to_ray_y +
+                 direction_z * to_ray_z)
+        c = (to_ray_x * to_ray_x +
+             to_ray_y * to_ray_y +
+             to_ray_z * to_ray_z) - self._radius**2
+
+        discriminant = b**2 - 4 * a * c
+        if discriminant < 0:
+            return ()
+
+        root = math.sqrt(discriminant)
+        return (-b - root) / (2 * a), (-b + root) / (2 * a)
+
+    def _intersect_packet(self, origins, directions):
+        """
+        Override base class method to provide sphere-specific method for
+        computing the intersections of a packet of rays with the sphere.
+
+        This method should not be called directly.  Instead, call the public
+        intersect_packet method defined in the Shape class.
+
+        :param origins: A sequence of (x, y, z) tuples, the object space
+            origins of the rays in the packet.
+        :param directions: A sequence of (x, y, z) tuples, the object space
+            directions of the rays in the packet.
+        :return: A list, parallel to origins and directions, of tuples of the
+            times at which each ray intersects the sphere.
+        """
+        # This is the same quadratic as described in _intersect, just solved
+        # directly on the components of each ray in the packet.  The vector
+        # from the center to the ray's origin, and c, depend only on the origin,
+        # so they are only recomputed when the origin changes from one ray to
+        # the next, i.e., once for a packet of rays from the camera.
+        center_x = self._center.x
+        center_y = self._center.y
+        center_z = self._center.z
+        radius_squared = self._radius**2
+
+        packet_times = []
+        last_origin = None
+        for origin, (direction_x, direction_y, direction_z) in zip(origins, directions):
+            if origin is not last_origin:
+                last_origin = origin
+                to_ray_x = origin[0] - center_x
+                to_ray_y = origin[1] - center_y
+                to_ray_z = origin[2] - center_z
+                c = (to_ray_x * to_ray_x +
+                     to_ray_y * to_ray_y +
+                     to_ray_z * to_ray_z) - radius_squared
+
+            a = direction_x * direction_x + \
+                direction_y * direction_y + \
+                direction_z * direction_z
+            b = 2 * (direction_x * to_ray_x +
+                     direction_y * to_ray_y +
+                     direction_z * to_ray_z)
+
+            discriminant = b**2 - 4 * a * c
+            if discriminant < 0:
+                packet_times.append(())
+                continue
+
+            root = math.sqrt(discriminant)
+            packet_times.append(((-b - root) / (2 * a), (-b + root) / (2 * a)))
+
+        return packet_times
+
     def _normal_at(self, position):
         """
         Override base class method to provide sphere-specific method for
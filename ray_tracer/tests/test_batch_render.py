@@ -0,0 +1,179 @@
+import io
+import json
+import math
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from batch_render import RenderJob, main, run_batch
+from matrix import Matrix
+from point import Point
+from scene_file import save_scene
+from scenes import SCENES
+from vector import Vector
+
+
+class TestRenderJob(unittest.TestCase):
+    def test_outputs(self):
+        self.assertEqual(RenderJob(scene="chapter_6", output="a.ppm").outputs(),
+                         [(None, "a.ppm")])
+        self.assertEqual(RenderJob(scene="chapter_6", output="a_{frame:02d}.ppm",
+                                   frames=range(3, 5)).outputs(),
+                         [(3, "a_03.ppm"), (4, "a_04.ppm")])
+        self.assertEqual(RenderJob(scene="chapter_6", output="{x}/{}/{frame}.ppm",
+                                   frames=range(1, 2)).outputs(),
+                         [(1, "{x}/{}/1.ppm")])
+
+    def test_from_dict(self):
+        job = RenderJob.from_dict({"scene": "chapter_6", "output": "{frame}.ppm",
+                                   "frames": [0, 10], "width": 20})
+        self.assertEqual(job.frames, range(0, 10))
+        self.assertEqual(job.width, 20)
+        self.assertIsNone(job.height)
+        with self.assertRaises(ValueError):
+            RenderJob.from_dict({"scene": "chapter_6", "output": "a.ppm",
+                                 "frames": [1]})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RenderJob(scene="chapter_6", output="a.ppm", frames=range(0))
+        with self.assertRaises(ValueError):
+            RenderJob(scene="chapter_6", output="a.ppm", frames=range(3))
+        with self.assertRaises(ValueError):
+            RenderJob(scene="chapter_6", output="a.ppm", keyframes=[])
+        with self.assertRaises(ValueError):
+            RenderJob(scene="chapter_6", output="a.ppm",
+                      keyframes=[{"frame": 0, "from": [0, 0, -5]}])
+        with self.assertRaises(ValueError):
+            RenderJob(scene="chapter_6", output="a.ppm",
+                      keyframes=[{"frame": 10, "from": [0, 0, -5], "to": [0, 0, 0]},
+                                 {"frame": 0, "from": [0, 0, -5], "to": [0, 0, 0]}])
+        with self.assertRaises(ValueError):
+            RenderJob(scene="chapter_6", output="a.ppm",
+                      keyframes=[{"frame": 0, "from": [0, 0, -5], "to": [0, 0, 0]},
+                                 {"frame": 0, "from": [1, 0, -5], "to": [0, 0, 0]}])
+
+    def test_camera_size(self):
+        _, camera = SCENES["chapter_6"](horizontal_size=10, vertical_size=10)
+        job = RenderJob(scene="chapter_6", output="a.ppm")
+        self.assertIs(job.camera_for(camera=camera, frame=None), camera)
+        resized = RenderJob(scene="chapter_6", output="a.ppm",
+                            width=20).camera_for(camera=camera, frame=None)
+        self.assertEqual((resized.horizontal_size, resized.vertical_size), (20, 10))
+        self.assertEqual(resized.transform, camera.transform)
+
+    def test_keyframes(self):
+        _, camera = SCENES["chapter_7"](horizontal_size=10, vertical_size=5)
+        job = RenderJob(scene="chapter_7", output="{frame}.ppm", frames=range(0, 20),
+                        keyframes=[{"frame": 0, "from": [0, 1, -5], "to": [0, 1, 0]},
+                                   {"frame": 10, "from": [4, 1, -5], "to": [0, 1, 0]}])
+
+        def view(x):
+            return Matrix.view_transform(eye=Point(x=x, y=1, z=-5),
+                                         to=Point(x=0, y=1, z=0),
+                                         up=Vector(x=0, y=1, z=0))
+
+        self.assertEqual(job.camera_for(camera=camera, frame=0).transform, view(0))
+        self.assertEqual(job.camera_for(camera=camera, frame=5).transform, view(2))
+        self.assertEqual(job.camera_for(camera=camera, frame=15).transform, view(4))
+        self.assertEqual(job.camera_for(camera=camera, frame=5).field_of_view,
+                         math.pi / 3)
+
+
+class TestRunBatch(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_serial(self):
+        job = RenderJob(scene="chapter_6",
+                        output=os.path.join(self.directory, "frame_{frame}.ppm"),
+                        frames=range(3), width=8, height=4)
+        report = run_batch(jobs=[job], workers=1)
+
+        self.assertEqual(report["frames"], 3)
+        self.assertEqual(report["jobs"][0]["frames"], 3)
+        self.assertEqual(report["jobs"][0]["scene_loads"], 1)
+
+        world, camera = SCENES["chapter_6"](horizontal_size=8, vertical_size=4)
+        with open(os.path.join(self.directory, "frame_2.ppm")) as file:
+            self.assertEqual(file.read(), camera.render(world=world).to_ppm())
+
+    def test_scene_file_and_binary(self):
+        path = os.path.join(self.directory, "scene.json")
+        world, camera = SCENES["chapter_9"](horizontal_size=6, vertical_size=4)
+        save_scene(world=world, camera=camera, path=path)
+        output = os.path.join(self.directory, "out", "scene.ppm")
+
+        run_batch(jobs=[RenderJob(scene=path, output=output)], workers=1,
+                  binary=True,
+                  compiled_directory=os.path.join(self.directory, "compiled"))
+
+        with open(output, "rb") as file:
+            self.assertEqual(file.read(), camera.render(world=world).to_ppm_binary())
+
+    def test_parallel_matches_serial(self):
+        jobs = [RenderJob(scene=scene,
+                          output=os.path.join(self.directory, scene + "_{frame}.ppm"),
+                          frames=range(4), width=6, height=3)
+                for scene in ("chapter_5", "chapter_10")]
+        report = run_batch(jobs=jobs, workers=2)
+        self.assertEqual(report["frames"], 8)
+        self.assertLessEqual(report["jobs"][1]["scene_loads"], 2)
+
+        world, camera = SCENES["chapter_10"](horizontal_size=6, vertical_size=3)
+        with open(os.path.join(self.directory, "chapter_10_3.ppm")) as file:
+            self.assertEqual(file.read(), camera.render(world=world).to_ppm())
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            run_batch(jobs=[], workers=0)
+
+    def test_same_output_rejected(self):
+        first = os.path.join(self.directory, "a", "room.json")
+        second = os.path.join(self.directory, "b", "room.json")
+        for path in (first, second):
+            os.makedirs(os.path.dirname(path))
+            save_scene(*SCENES["chapter_6"](horizontal_size=4, vertical_size=2),
+                       path=path)
+
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            with self.assertRaises(ValueError):
+                main([first, second, "--output-directory", self.directory,
+                      "--workers", "1"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "room.ppm")))
+
+        with self.assertRaises(ValueError):
+            run_batch(jobs=[RenderJob(scene="chapter_6",
+                                      output=os.path.join(self.directory, "{frame}.ppm"),
+                                      frames=range(2)),
+                            RenderJob(scene="chapter_5",
+                                      output=os.path.join(self.directory, "1.ppm"))],
+                      workers=1)
+
+    def test_main(self):
+        jobs_path = os.path.join(self.directory, "jobs.json")
+        with open(jobs_path, "w") as file:
+            json.dump([{"scene": "chapter_5",
+                        "output": os.path.join(self.directory, "job.ppm"),
+                        "width": 4, "height": 4}], file)
+
+        output = io.StringIO()
+        with redirect_stdout(output), redirect_stderr(io.StringIO()):
+            main(["chapter_6", "--width", "4", "--height", "2", "--frames", "0:2",
+                  "--output-directory", self.directory, "--workers", "1",
+                  "--jobs", jobs_path])
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["frames"], 3)
+        self.assertTrue(os.path.exists(os.path.join(self.directory,
+                                                    "chapter_6_0001.ppm")))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, "job.ppm")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+import benchmark
+from scenes import SCENES
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_run_workload(self):
+        result = benchmark.run_workload(scene="chapter_9",
+                                        horizontal_size=10,
+                                        vertical_size=5,
+                                        additional_spheres=2)
+        self.assertEqual(result["objects"], 7)
+        self.assertEqual(result["primary_rays"], 50)
+        self.assertGreater(result["shadow_rays"], 0)
+        self.assertGreater(result["rays_per_second"], 0)
+        self.assertGreater(result["peak_memory_bytes"], 0)
+        self.assertLessEqual(result["intersect_seconds"], result["render_seconds"])
+        self.assertGreaterEqual(result["shading_seconds"], 0)
+        # The results must be machine-readable
+        self.assertEqual(json.loads(json.dumps(result)), result)
+
+    def test_invalid_workload(self):
+        with self.assertRaises(ValueError):
+            benchmark.run_workload(scene="chapter_1", horizontal_size=10,
+                                   vertical_size=5)
+        with self.assertRaises(ValueError):
+            benchmark.run_workload(scene="chapter_9", horizontal_size=10,
+                                   vertical_size=5, repeat=0)
+
+    def test_phase_timer(self):
+        world, camera = SCENES["chapter_6"](horizontal_size=6, vertical_size=6)
+        expected = list(camera.render(world=world).buffer)
+        timer = benchmark.PhaseTimer()
+        self.assertEqual(list(camera.render(world=world, observer=timer).buffer),
+                         expected)
+        self.assertEqual(timer.primary_rays, 36)
+        self.assertGreater(timer.color_seconds, 0)
+        self.assertGreaterEqual(timer.shading_seconds, 0)
+        self.assertNotIn("hit_packet", vars(world))
+
+    def test_compare_by_backend(self):
+        result = benchmark.run_workload(scene="chapter_5",
+                                        horizontal_size=4,
+                                        vertical_size=4,
+                                        measure_memory=False)
+        baseline = {"results": [dict(result, backend="processes")]}
+        current = {"results": [dict(result, backend="threads")]}
+        self.assertEqual(benchmark.compare(baseline=baseline, current=current), [])
+
+    def test_main_without_rays_per_second(self):
+        result = {"scene": "chapter_5", "objects": 1, "rays_per_second": None}
+        with mock.patch.object(benchmark, "run_workload", return_value=result), \
+                mock.patch("sys.stdout", new_callable=io.StringIO), \
+                mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            benchmark.main(["--scene", "chapter_5", "--no-memory"])
+        self.assertIn("n/a rays/s", stderr.getvalue())
+
+    def test_compare(self):
+        baseline = {"results": [benchmark.run_workload(scene="chapter_5",
+                                                       horizontal_size=4,
+                                                       vertical_size=4,
+                                                       measure_memory=False)]}
+        current = {"results": [dict(baseline["results"][0],
+                                    rays_per_second=baseline["results"][0]["rays_per_second"] * 2)]}
+        comparisons = benchmark.compare(baseline=baseline, current=current)
+        self.assertEqual(len(comparisons), 1)
+        self.assertAlmostEqual(comparisons[0][3], 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import math
+import unittest
+
+from bounds import BoundingBox
+from matrix import Matrix
+from point import Point
+
+
+class TestBoundingBox(unittest.TestCase):
+    def setUp(self):
+        self._box = BoundingBox(minimum=Point(x=-1, y=-1, z=-1),
+                                maximum=Point(x=1, y=1, z=1))
+
+    def test_create_empty(self):
+        b = BoundingBox()
+        self.assertTrue(b.is_empty)
+        self.assertFalse(b.is_infinite)
+
+    def test_add_point(self):
+        b = BoundingBox()
+        b.add_point(-5, 2, 0)
+        b.add_point(7, 0, -3)
+        self.assertEqual(b.minimum, Point(x=-5, y=0, z=-3))
+        self.assertEqual(b.maximum, Point(x=7, y=2, z=0))
+        self.assertFalse(b.is_empty)
+
+    def test_merge(self):
+        b = BoundingBox(minimum=Point(x=0, y=0, z=0),
+                        maximum=Point(x=3, y=0.5, z=3))
+        m = self._box.merge(b)
+        self.assertEqual(m.minimum, Point(x=-1, y=-1, z=-1))
+        self.assertEqual(m.maximum, Point(x=3, y=1, z=3))
+
+    def test_centroid(self):
+        b = BoundingBox(minimum=Point(x=0, y=-2, z=1),
+                        maximum=Point(x=4, y=2, z=2))
+        self.assertEqual(b.centroid, (2, 0, 1.5))
+
+    def test_transform(self):
+        t = Matrix.translation_transform(x=1, y=2, z=3) * \
+            Matrix.rotation_y_transform(radians=math.pi/4)
+        b = self._box.transform(t)
+        s = math.sqrt(2)
+        self.assertEqual(b.minimum, Point(x=1 - s, y=1, z=3 - s))
+        self.assertEqual(b.maximum, Point(x=1 + s, y=3, z=3 + s))
+
+    def test_transform_infinite(self):
+        b = BoundingBox(minimum=Point(x=-math.inf, y=0, z=-math.inf),
+                        maximum=Point(x=math.inf, y=0, z=math.inf))
+        self.assertTrue(b.is_infinite)
+        t = b.transform(Matrix.rotation_x_transform(radians=math.pi/2))
+        self.assertTrue(math.isinf(t.minimum.y))
+        self.assertTrue(math.isinf(t.maximum.y))
+
+    def test_intersects(self):
+        self.assertTrue(self._box.intersects((0, 0, -5), (0, 0, 1)))
+        self.assertTrue(self._box.intersects((5, 0.5, 0), (-1, 0, 0)))
+        self.assertFalse(self._box.intersects((0, 2, -5), (0, 0, 1)))
+        self.assertFalse(self._box.intersects((2, 2, 2), (0, 0, 1)))
+
+    def test_intersects_respects_times(self):
+        self.assertFalse(self._box.intersects((0, 0, -5), (0, 0, 1),
+                                              minimum_time=0,
+                                              maximum_time=3))
+        self.assertFalse(self._box.intersects((0, 0, -5), (0, 0, -1),
+                                              minimum_time=0))
+        self.assertTrue(self._box.intersects((0, 0, -5), (0, 0, -1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from bvh import BoundingVolumeHierarchy
+from matrix import Matrix
+from plane import Plane
+from sphere import Sphere
+
+
+class TestBoundingVolumeHierarchy(unittest.TestCase):
+    def setUp(self):
+        self._spheres = [Sphere(transform=Matrix.translation_transform(x=x * 3,
+                                                                       y=0,
+                                                                       z=0))
+                         for x in range(8)]
+        self._bvh = BoundingVolumeHierarchy(shapes=self._spheres, leaf_size=2)
+
+    def test_create_empty(self):
+        b = BoundingVolumeHierarchy()
+        self.assertIsNone(b.root)
+        self.assertEqual(list(b.candidates((0, 0, -5), (0, 0, 1))), [])
+
+    def test_root_bounds_contain_all_shapes(self):
+        self.assertAlmostEqual(self._bvh.root.bounds.minimum.x, -1)
+        self.assertAlmostEqual(self._bvh.root.bounds.maximum.x, 22)
+        self.assertFalse(self._bvh.root.is_leaf)
+
+    def test_infinite_shapes_rejected(self):
+        with self.assertRaises(ValueError):
+            BoundingVolumeHierarchy(shapes=[Plane()])
+
+    def test_candidates(self):
+        candidates = list(self._bvh.candidates((9, 0, -5), (0, 0, 1)))
+        self.assertIn(self._spheres[3], candidates)
+        self.assertLessEqual(len(candidates), 2)
+
+    def test_candidates_miss(self):
+        self.assertEqual(list(self._bvh.candidates((9, 5, -5), (0, 0, 1))), [])
+
+    def test_packet_candidates(self):
+        origins = [(0, 0, -5), (21, 0, -5), (9, 5, -5)]
+        directions = [(0, 0, 1), (0, 0, 1), (0, 0, 1)]
+        groups = list(self._bvh.packet_candidates(origins=origins,
+                                                  directions=directions))
+        shapes_for_ray = [[shape for shape, indices in groups if index in indices]
+                          for index in range(3)]
+        self.assertIn(self._spheres[0], shapes_for_ray[0])
+        self.assertIn(self._spheres[7], shapes_for_ray[1])
+        self.assertEqual(shapes_for_ray[2], [])
+
+    def test_nearest_hit(self):
+        time, shape = self._bvh.nearest_hit((-5, 0, 0), (1, 0, 0))
+        self.assertAlmostEqual(time, 4)
+        self.assertIs(shape, self._spheres[0])
+        self.assertIsNone(self._bvh.nearest_hit((9, 5, -5), (0, 0, 1)))
+        self.assertIsNone(self._bvh.nearest_hit((-5, 0, 0), (1, 0, 0), maximum_time=4))
+        self.assertIsNone(BoundingVolumeHierarchy().nearest_hit((0, 0, -5), (0, 0, 1)))
+
+    def test_nearest_hit_prunes_boxes_beyond_hit(self):
+        # Once the first sphere has been hit, only the boxes the ray enters
+        # before that hit may still be tested
+        with mock.patch.object(Sphere, 'hit_time', autospec=True,
+                               side_effect=lambda shape, origin, direction, maximum_time:
+                               1.0) as hit_time:
+            self._bvh.nearest_hit((-5, 0, 0), (1, 0, 0))
+        self.assertLessEqual(hit_time.call_count, 2)
+
+    def test_refit_after_transform_change(self):
+        self._spheres[0].transform = Matrix.translation_transform(x=0, y=10, z=0)
+        self.assertEqual(list(self._bvh.candidates((0, 10, -5), (0, 0, 1))), [])
+        self._bvh.refit()
+        self.assertIn(self._spheres[0],
+                      list(self._bvh.candidates((0, 10, -5), (0, 0, 1))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,12 @@
 import math
 import unittest
+from unittest import mock
 
 from camera import Camera
 from color import Color
 from lights import PointLight
 from matrix import Matrix
+from packet_observer import PacketObserver
 from point import Point
 from sphere import Sphere
 from util import Utilities
@@ -88,6 +90,201 @@ class TestCamera(unittest.TestCase):
                                                       green=0.47583,
                                                       blue=0.2855))
 
+    def test_tiles_cover_canvas(self):
+        c = Camera(horizontal_size=10, vertical_size=7)
+        tiles = list(c.tiles(tile_size=4))
+        self.assertEqual(tiles, [(0, 0, 4, 4), (4, 0, 4, 4), (8, 0, 2, 4),
+                                 (0, 4, 4, 3), (4, 4, 4, 3), (8, 4, 2, 3)])
+
+    def test_tiles_invalid_size(self):
+        c = Camera(horizontal_size=10, vertical_size=7)
+        with self.assertRaises(ValueError):
+            list(c.tiles(tile_size=0))
+
+    def test_render_invalid_workers(self):
+        c = Camera(horizontal_size=11, vertical_size=11)
+        with self.assertRaises(ValueError):
+            c.render(self._default_world, workers=0)
+
+    def test_render_parallel_matches_serial(self):
+        c = Camera(horizontal_size=11,
+                   vertical_size=11,
+                   field_of_view=math.pi/2)
+        e = Point(x=0, y=0, z=-5)
+        t = Point(x=0, y=0, z=0)
+        u = Vector(x=0, y=1, z=0)
+        c.transform = Matrix.view_transform(eye=e, to=t, up=u)
+        serial = c.render(self._default_world)
+        parallel = c.render(self._default_world, workers=2, tile_size=4)
+        for y in range(c.vertical_size):
+            for x in range(c.horizontal_size):
+                p = parallel.get_pixel(x=x, y=y)
+                s = serial.get_pixel(x=x, y=y)
+                self.assertEqual((p.red, p.green, p.blue),
+                                 (s.red, s.green, s.blue))
+        self.assertEqual(parallel.get_pixel(x=5, y=5), Color(red=0.38066,
+                                                             green=0.47583,
+                                                             blue=0.2855))
+
+    def test_render_threaded_matches_serial(self):
+        c = Camera(horizontal_size=11,
+                   vertical_size=11,
+                   field_of_view=math.pi/2)
+        c.transform = Matrix.view_transform(eye=Point(x=0, y=0, z=-5),
+                                            to=Point(x=0, y=0, z=0),
+                                            up=Vector(x=0, y=1, z=0))
+        serial = c.render(self._default_world)
+        threaded = c.render(self._default_world,
+                            workers=3,
+                            tile_size=4,
+                            backend=Camera.BACKEND_THREADS)
+        self.assertEqual(list(threaded.buffer), list(serial.buffer))
+
+    def test_render_threaded_prepares_scene(self):
+        c = Camera(horizontal_size=11,
+                   vertical_size=11,
+                   field_of_view=math.pi/2)
+        c.transform = Matrix.translation_transform(x=0, y=0, z=5)
+        c.transform.set_item(row=2, column=3, value=6)
+        s = self._default_world.objects[0]
+        s.transform.set_item(row=0, column=0, value=2)
+        with mock.patch.object(World, 'prepare', autospec=True,
+                               side_effect=World.prepare) as prepare:
+            c.render(self._default_world, workers=2, backend=Camera.BACKEND_THREADS)
+            prepare.assert_called_once_with(self._default_world)
+        self.assertEqual(c.inverse_transform_values[11], -6)
+        self.assertEqual(s.inverse_transform_values[0], 0.5)
+
+    def test_render_backend_selection(self):
+        c = Camera(horizontal_size=4, vertical_size=4, field_of_view=math.pi/2)
+        with mock.patch.object(Camera, '_render_threaded') as threaded, \
+                mock.patch.object(Camera, '_render_parallel') as parallel:
+            with mock.patch('camera._gil_enabled', return_value=False):
+                c.render(self._default_world, workers=2)
+            threaded.assert_called_once()
+            parallel.assert_not_called()
+
+            with mock.patch('camera._gil_enabled', return_value=True):
+                c.render(self._default_world, workers=2)
+            parallel.assert_called_once()
+
+            c.render(self._default_world, workers=2, backend=Camera.BACKEND_THREADS)
+            self.assertEqual(threaded.call_count, 2)
+
+        with self.assertRaises(ValueError):
+            c.render(self._default_world, workers=2, backend="fibers")
+        with self.assertRaises(ValueError):
+            c.render(self._default_world, workers=2, observer=PacketObserver())
+
+    def test_ray_after_in_place_transform_change(self):
+        c = Camera(horizontal_size=201,
+                   vertical_size=101,
+                   field_of_view=math.pi/2)
+        c.transform = Matrix.translation_transform(x=0, y=-2, z=5)
+        c.transform.set_item(row=1, column=3, value=-3)
+        r = c.ray_for_pixel(x=100, y=50)
+        self.assertEqual(r.origin, Point(x=0, y=3, z=-5))
+
+    def test_render_progressive(self):
+        c = Camera(horizontal_size=11,
+                   vertical_size=9,
+                   field_of_view=math.pi/2)
+        c.transform = Matrix.view_transform(eye=Point(x=0, y=0, z=-5),
+                                            to=Point(x=0, y=0, z=0),
+                                            up=Vector(x=0, y=1, z=0))
+        expected = c.render(self._default_world)
+
+        with mock.patch.object(self._default_world,
+                               'color_at_packet',
+                               wraps=self._default_world.color_at_packet) as packet:
+            passes = [(step, image.to_ppm())
+                      for step, image in c.render_progressive(self._default_world,
+                                                              initial_step=4)]
+            rays = sum(len(call.kwargs['origins']) for call in packet.call_args_list)
+
+        self.assertEqual([step for step, _ in passes], [4, 2, 1])
+        self.assertEqual(passes[-1][1], expected.to_ppm())
+        self.assertNotEqual(passes[0][1], expected.to_ppm())
+        self.assertEqual(rays, 11 * 9)
+
+    def test_render_progressive_preview_fills_blocks(self):
+        c = Camera(horizontal_size=4, vertical_size=4, field_of_view=math.pi/2)
+        c.transform = Matrix.view_transform(eye=Point(x=0, y=0, z=-5),
+                                            to=Point(x=0, y=0, z=0),
+                                            up=Vector(x=0, y=1, z=0))
+        step, image = next(c.render_progressive(self._default_world,
+                                                initial_step=2))
+        self.assertEqual(step, 2)
+        self.assertEqual(image.get_pixel(x=1, y=1), image.get_pixel(x=0, y=0))
+        self.assertEqual(image.get_pixel(x=3, y=2), image.get_pixel(x=2, y=2))
+
+    def test_render_progressive_invalid_step(self):
+        c = Camera(horizontal_size=4, vertical_size=4)
+        with self.assertRaises(ValueError):
+            next(c.render_progressive(self._default_world, initial_step=0))
+
+
+    def test_ray_for_pixel_sub_pixel(self):
+        c = Camera(horizontal_size=201, vertical_size=101, field_of_view=math.pi/2)
+        r = c.ray_for_pixel(x=100, y=50, sub_pixel_x=0, sub_pixel_y=0)
+        center = c.ray_for_pixel(x=100, y=50)
+        self.assertEqual(r.origin, center.origin)
+        self.assertNotEqual(r.direction, center.direction)
+        self.assertEqual(r.direction,
+                         c.ray_for_pixel(x=99, y=49, sub_pixel_x=1, sub_pixel_y=1).direction)
+
+    def test_rays_for_samples(self):
+        c = Camera(horizontal_size=20, vertical_size=10, field_of_view=math.pi/2)
+        c.transform = Matrix.rotation_y_transform(radians=math.pi/4)
+        origins, directions = c.rays_for_samples(samples=[(3.25, 7.75)])
+        r = c.ray_for_pixel(x=3, y=7, sub_pixel_x=0.25, sub_pixel_y=0.75)
+        self.assertEqual(Point(*origins[0]), r.origin)
+        self.assertEqual(Vector(*directions[0]), r.direction)
+
+    def test_render_adaptive_refines_edges(self):
+        c = Camera(horizontal_size=11, vertical_size=11, field_of_view=math.pi/2)
+        c.transform = Matrix.view_transform(eye=Point(x=0, y=0, z=-5),
+                                            to=Point(x=0, y=0, z=0),
+                                            up=Vector(x=0, y=1, z=0))
+        plain = c.render(self._default_world)
+        image, report = c.render_adaptive(self._default_world,
+                                          threshold=0.1,
+                                          max_samples=16)
+        self.assertEqual(report["pixels"], 121)
+        self.assertGreater(report["refined_pixels"], 0)
+        self.assertLess(report["refined_pixels"], 121)
+        self.assertEqual(sum(report["pixels_by_samples"].values()), 121)
+        by_samples = report["pixels_by_samples"]
+        self.assertEqual(report["samples"],
+                         121 + 4 * (by_samples.get(4, 0) + by_samples.get(16, 0)) +
+                         16 * by_samples.get(16, 0))
+        self.assertLess(report["samples"], report["supersampling_samples"])
+        self.assertEqual(report["supersampling_samples"], 121 * 16)
+        # Flat areas, like the background, are left alone
+        self.assertEqual(image.get_pixel(x=0, y=0), plain.get_pixel(x=0, y=0))
+        self.assertNotEqual(image.to_ppm(), plain.to_ppm())
+
+    def test_render_adaptive_without_refinement(self):
+        c = Camera(horizontal_size=11, vertical_size=11, field_of_view=math.pi/2)
+        c.transform = Matrix.view_transform(eye=Point(x=0, y=0, z=-5),
+                                            to=Point(x=0, y=0, z=0),
+                                            up=Vector(x=0, y=1, z=0))
+        plain = c.render(self._default_world).to_ppm()
+        for threshold, max_samples in ((10, 16), (0.1, 3)):
+            image, report = c.render_adaptive(self._default_world,
+                                              threshold=threshold,
+                                              max_samples=max_samples)
+            self.assertEqual(image.to_ppm(), plain)
+            self.assertEqual(report["samples"], 121)
+            self.assertEqual(report["pixels_by_samples"], {1: 121})
+
+    def test_render_adaptive_invalid(self):
+        c = Camera(horizontal_size=4, vertical_size=4)
+        with self.assertRaises(ValueError):
+            c.render_adaptive(self._default_world, threshold=-1)
+        with self.assertRaises(ValueError):
+            c.render_adaptive(self._default_world, max_samples=0)
+
 
 if __name__ == '__main__':
     unittest.main()
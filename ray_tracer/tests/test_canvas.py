@@ -1,3 +1,6 @@
+import copy
+import io
+import pickle
 import unittest
 
 from canvas import Canvas
@@ -80,5 +83,102 @@ class TestCanvas(unittest.TestCase):
         c = Canvas(width=5, height=3)
         self.assertTrue(c.to_ppm().endswith("\n"))
 
+    def test_set_pixel_copies_color(self):
+        c = Canvas(width=10, height=20)
+        red = Color(red=1, green=0, blue=0)
+        c.set_pixel(x=3, y=2, color=red)
+        red.green = 1
+        self.assertEqual(c.get_pixel(x=3, y=2), Color(red=1, green=0, blue=0))
+
+    def test_set_row(self):
+        c = Canvas(width=3, height=2)
+        colors = [Color(red=x, green=0.5, blue=0) for x in range(3)]
+        c.set_row(y=1, colors=colors)
+        self.assertEqual([c.get_pixel(x=x, y=1) for x in range(3)], colors)
+        self.assertEqual(c.get_pixel(x=1, y=0), Color(red=0, green=0, blue=0))
+
+    def test_set_tile(self):
+        c = Canvas(width=4, height=4)
+        colors = [Color(red=x, green=y, blue=1) for y in range(2) for x in range(3)]
+        c.set_tile(x=1, y=2, width=3, height=2, colors=colors)
+        self.assertEqual(c.get_pixel(x=1, y=2), Color(red=0, green=0, blue=1))
+        self.assertEqual(c.get_pixel(x=3, y=3), Color(red=2, green=1, blue=1))
+        self.assertEqual(c.get_pixel(x=0, y=3), Color(red=0, green=0, blue=0))
+
+    def test_set_tile_values(self):
+        c = Canvas(width=4, height=4)
+        c.set_tile_values(x=2, y=1, width=2, height=1,
+                          values=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6])
+        self.assertEqual(c.get_pixel(x=2, y=1), Color(red=0.1, green=0.2, blue=0.3))
+        self.assertEqual(c.get_pixel(x=3, y=1), Color(red=0.4, green=0.5, blue=0.6))
+
+    def test_set_tile_invalid(self):
+        c = Canvas(width=4, height=4)
+        with self.assertRaises(ValueError):
+            c.set_tile_values(x=3, y=0, width=2, height=1, values=[0] * 6)
+        with self.assertRaises(ValueError):
+            c.set_tile_values(x=0, y=0, width=2, height=1, values=[0] * 5)
+
+    def test_buffer_is_a_view(self):
+        c = Canvas(width=4, height=2)
+        self.assertEqual(len(c.buffer), 4 * 2 * 3)
+        c.buffer[(1 * 4 + 2) * 3 + 1] = 0.75
+        self.assertEqual(c.get_pixel(x=2, y=1), Color(red=0, green=0.75, blue=0))
+        c.set_pixel(x=0, y=1, color=Color(red=0.5, green=0, blue=0))
+        self.assertEqual(c.buffer[12], 0.5)
+
+    def test_external_buffer(self):
+        storage = bytearray(4 * 2 * 3 * 8)
+        c = Canvas(width=4, height=2, buffer=storage)
+        c.set_pixel(x=1, y=0, color=Color(red=1, green=0, blue=0))
+        self.assertEqual(Canvas(width=4, height=2, buffer=storage).get_pixel(x=1, y=0),
+                         Color(red=1, green=0, blue=0))
+        with self.assertRaises(ValueError):
+            Canvas(width=4, height=3, buffer=storage)
+
+    def test_to_ppm_binary(self):
+        c = Canvas(width=2, height=2)
+        c.set_pixel(x=0, y=0, color=Color(red=1.5, green=0, blue=0))
+        c.set_pixel(x=1, y=1, color=Color(red=0, green=0.5, blue=1))
+        self.assertEqual(c.to_ppm_binary(),
+                         b"P6\n2 2\n255\n" +
+                         bytes([255, 0, 0, 0, 0, 0, 0, 0, 0, 0, 128, 255]))
+
+    def test_write_ppm_matches_to_ppm(self):
+        c = Canvas(width=10, height=2)
+        [c.set_pixel(x=x, y=y, color=Color(red=1, green=0.8, blue=0.6))
+         for x in range(c.width)
+         for y in range(c.height)]
+        f = io.StringIO()
+        c.write_ppm(file=f)
+        self.assertEqual(f.getvalue(), c.to_ppm())
+
+
+    def _assertIndependentCopy(self, original, duplicate):
+        self.assertEqual((duplicate.width, duplicate.height), (3, 2))
+        self.assertEqual(list(duplicate.buffer), list(original.buffer))
+        duplicate.set_pixel(x=0, y=0, color=Color(red=0, green=1, blue=0))
+        self.assertEqual(original.get_pixel(x=0, y=0), Color(red=1, green=0.5, blue=0.25))
+
+    def _canvas_to_copy(self, buffer=None):
+        c = Canvas(width=3, height=2, buffer=buffer)
+        c.set_pixel(x=0, y=0, color=Color(red=1, green=0.5, blue=0.25))
+        c.set_pixel(x=2, y=1, color=Color(red=0, green=0, blue=1))
+        return c
+
+    def test_copy(self):
+        c = self._canvas_to_copy(buffer=bytearray(3 * 2 * 3 * 8))
+        self._assertIndependentCopy(c, c.copy())
+
+    def test_pickle(self):
+        c = self._canvas_to_copy()
+        self._assertIndependentCopy(c, pickle.loads(pickle.dumps(c)))
+
+    def test_copy_module(self):
+        c = self._canvas_to_copy()
+        self._assertIndependentCopy(c, copy.deepcopy(c))
+        self._assertIndependentCopy(c, copy.copy(c))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -29,5 +29,11 @@ class TestColor(unittest.TestCase):
         c2 = Color(red=0.9, green=1, blue=0.1)
         self.assertEqual(c1 * c2, Color(red=0.9, green=0.2, blue=0.04))
 
+    def test_slots(self):
+        c = Color(red=0.9, green=0.6, blue=0.75)
+        self.assertFalse(hasattr(c, '__dict__'))
+        c.green = 0.1
+        self.assertTrue(Utilities.equal(c.green, 0.1))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+
+from color import Color
+from gbuffer import GBuffer
+from lights import PointLight
+from point import Point
+from scenes import SCENES
+from world import World
+
+
+class TestGBuffer(unittest.TestCase):
+    def setUp(self):
+        self.world, self.camera = SCENES["chapter_10"](horizontal_size=40,
+                                                       vertical_size=20)
+        self.gbuffer = GBuffer.capture(world=self.world, camera=self.camera)
+
+    def assertMatchesFullRender(self, canvas):
+        self.assertEqual(list(canvas.buffer),
+                         list(self.camera.render(world=self.world).buffer))
+
+    def test_create(self):
+        gbuffer = GBuffer(width=4, height=3)
+        self.assertEqual(gbuffer.width, 4)
+        self.assertEqual(gbuffer.height, 3)
+        self.assertEqual(gbuffer.hits, 0)
+        self.assertEqual(gbuffer.shapes, [])
+        self.assertIsNone(gbuffer.shape_at(x=3, y=2))
+        self.assertIsNone(gbuffer.computations_at(pixel=0))
+        self.assertRaises(ValueError, GBuffer, width=0, height=3)
+        self.assertRaises(ValueError, gbuffer.shape_at, x=4, y=0)
+
+    def test_capture(self):
+        self.assertEqual(self.gbuffer.width, 40)
+        self.assertEqual(self.gbuffer.height, 20)
+        self.assertGreater(self.gbuffer.hits, 0)
+        for y in range(self.gbuffer.height):
+            origins, directions = self.camera.rays_for_pixels(
+                pixels=[(x, y) for x in range(self.gbuffer.width)])
+            hits = self.world.hit_packet(origins=origins, directions=directions)
+            for x, hit in enumerate(hits):
+                shape = self.gbuffer.shape_at(x=x, y=y)
+                if hit is None:
+                    self.assertIsNone(shape)
+                else:
+                    self.assertIs(shape, hit[1])
+
+    def test_relight_matches_render(self):
+        self.assertMatchesFullRender(self.gbuffer.relight(world=self.world))
+
+    def test_relight_after_moving_light(self):
+        self.world.light_source = PointLight(position=Point(x=5, y=10, z=-10),
+                                             intensity=Color(red=0.8,
+                                                             green=0.9,
+                                                             blue=1))
+        self.assertMatchesFullRender(self.gbuffer.relight(world=self.world))
+
+    def test_relight_after_changing_material(self):
+        self.world.objects[4].material.color = Color(red=0, green=0, blue=1)
+        self.world.objects[4].material.shininess = 10
+        self.assertMatchesFullRender(self.gbuffer.relight(world=self.world))
+
+    def test_relight_reuses_shadows(self):
+        with mock.patch.object(World, 'is_shadowed_packet',
+                               autospec=True,
+                               side_effect=World.is_shadowed_packet) as is_shadowed_packet:
+            # Editing materials and the light's color casts no shadow rays
+            self.world.objects[4].material.color = Color(red=0, green=0, blue=1)
+            self.world.light_source.intensity = Color(red=0.5, green=0.5, blue=0.5)
+            canvas = self.gbuffer.relight(world=self.world)
+            is_shadowed_packet.assert_not_called()
+        self.assertMatchesFullRender(canvas)
+
+        # Shadow rays are only cast toward a light that was added (or moved),
+        # and only once
+        light = PointLight(position=Point(x=5, y=10, z=-10),
+                           intensity=Color(red=0.3, green=0.3, blue=0.3))
+        self.world.add_light(light)
+        with mock.patch.object(World, 'is_shadowed_packet',
+                               autospec=True,
+                               side_effect=World.is_shadowed_packet) as is_shadowed_packet:
+            canvas = self.gbuffer.relight(world=self.world)
+            self.assertGreater(is_shadowed_packet.call_count, 0)
+            self.assertTrue(all(call.kwargs["light"] is light
+                                for call in is_shadowed_packet.call_args_list))
+
+            is_shadowed_packet.reset_mock()
+            self.gbuffer.relight(world=self.world)
+            is_shadowed_packet.assert_not_called()
+        self.assertMatchesFullRender(canvas)
+
+    def test_relight_onto_canvas(self):
+        canvas = self.camera.render(world=self.world)
+        self.assertIs(self.gbuffer.relight(world=self.world, canvas=canvas), canvas)
+        self.assertMatchesFullRender(canvas)
+        self.assertRaises(ValueError,
+                          GBuffer(width=2, height=2).relight,
+                          world=self.world,
+                          canvas=canvas)
+
+
+if __name__ == '__main__':
+    unittest.main()
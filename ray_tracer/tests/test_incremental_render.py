@@ -0,0 +1,89 @@
+import unittest
+
+from color import Color
+from incremental_render import IncrementalRenderer
+from lights import PointLight
+from matrix import Matrix
+from point import Point
+from scenes import SCENES
+from sphere import Sphere
+
+
+class TestIncrementalRenderer(unittest.TestCase):
+    def setUp(self):
+        self.world, self.camera = SCENES["chapter_10"](horizontal_size=40,
+                                                       vertical_size=20)
+        self.renderer = IncrementalRenderer(camera=self.camera, tile_size=8)
+        self.tile_count = len(list(self.camera.tiles(tile_size=8)))
+
+    def assertMatchesFullRender(self, canvas):
+        self.assertEqual(list(canvas.buffer),
+                         list(self.camera.render(world=self.world).buffer))
+
+    def test_first_render_renders_everything(self):
+        canvas = self.renderer.render(world=self.world)
+        self.assertEqual(len(self.renderer.rendered_tiles), self.tile_count)
+        self.assertMatchesFullRender(canvas)
+
+    def test_unchanged_world_renders_nothing(self):
+        self.renderer.render(world=self.world)
+        self.renderer.render(world=self.world)
+        self.assertEqual(self.renderer.rendered_tiles, [])
+
+    def test_moved_object(self):
+        self.renderer.render(world=self.world)
+        sphere = self.world.objects[3]
+        sphere.transform = Matrix.translation_transform(x=0.5, y=0, z=0) * \
+            sphere.transform
+        canvas = self.renderer.render(world=self.world)
+        self.assertGreater(len(self.renderer.rendered_tiles), 0)
+        self.assertLess(len(self.renderer.rendered_tiles), self.tile_count)
+        self.assertMatchesFullRender(canvas)
+
+    def test_changed_material(self):
+        self.renderer.render(world=self.world)
+        self.world.objects[4].material.color = Color(red=0, green=0, blue=1)
+        canvas = self.renderer.render(world=self.world)
+        self.assertLess(len(self.renderer.rendered_tiles), self.tile_count)
+        self.assertMatchesFullRender(canvas)
+
+    def test_added_and_removed_objects(self):
+        self.renderer.render(world=self.world)
+        self.world.add_object(Sphere(transform=Matrix.translation_transform(x=1,
+                                                                            y=2,
+                                                                            z=-1) *
+                                               Matrix.scaling_transform(x=0.3,
+                                                                        y=0.3,
+                                                                        z=0.3)))
+        self.assertMatchesFullRender(self.renderer.render(world=self.world))
+
+        del self.world.objects[4]
+        self.assertMatchesFullRender(self.renderer.render(world=self.world))
+
+    def test_changed_light_renders_everything(self):
+        self.renderer.render(world=self.world)
+        self.world.light_source = PointLight(position=Point(x=5, y=10, z=-10),
+                                             intensity=Color(red=1, green=1, blue=1))
+        canvas = self.renderer.render(world=self.world)
+        self.assertEqual(len(self.renderer.rendered_tiles), self.tile_count)
+        self.assertMatchesFullRender(canvas)
+
+    def test_reuses_canvas(self):
+        canvas = self.renderer.render(world=self.world)
+        self.world.objects[2].material.ambient = 0.3
+        self.assertIs(self.renderer.render(world=self.world), canvas)
+
+    def test_world_is_not_changed(self):
+        before = dict(vars(self.world))
+        self.renderer.render(world=self.world)
+        self.assertEqual(vars(self.world).keys(), before.keys())
+        self.assertNotIn("hit_packet", vars(self.world))
+        self.assertNotIn("is_shadowed_packet", vars(self.world))
+
+    def test_invalid_tile_size(self):
+        with self.assertRaises(ValueError):
+            IncrementalRenderer(camera=self.camera, tile_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
+from unittest import mock
 
-from intersections import Intersection, Intersections
+from intersections import Computations, Intersection, Intersections
 from matrix import Matrix
 from point import Point
 from ray import Ray
@@ -46,6 +47,50 @@ class TestIntersection(unittest.TestCase):
         self.assertEqual(c.normal, Vector(x=0, y=0, z=-1))
 
 
+    def test_computations_are_lazy(self):
+        r = Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        s = Sphere()
+        with mock.patch.object(s, 'normal_at', wraps=s.normal_at) as normal_at:
+            c = Intersection(time=4, shape=s).prepare_computations(ray=r)
+            self.assertEqual(c.position, Point(x=0, y=0, z=-1))
+            self.assertEqual(normal_at.call_count, 0)
+            self.assertFalse(c.inside)
+            self.assertEqual(c.normal, Vector(x=0, y=0, z=-1))
+            self.assertEqual(c.over_position, Point(x=0, y=0, z=-1 - Utilities.EPSILON))
+            self.assertEqual(normal_at.call_count, 1)
+
+    def test_computations_for_hit(self):
+        r = Ray(origin=Point(x=0.25, y=0.5, z=-5),
+                direction=Vector(x=0.1, y=-0.2, z=1).normalize())
+        s = Sphere(transform=Matrix.scaling_transform(x=2, y=1, z=1))
+        i = Intersection(time=4.5, shape=s)
+        c = i.prepare_computations(ray=r)
+        f = Computations.for_hit(time=4.5,
+                                 shape=s,
+                                 origin=(r.origin.x, r.origin.y, r.origin.z),
+                                 direction=(r.direction.x, r.direction.y, r.direction.z))
+        position = r.position(time=4.5)
+        normal = s.normal_at(position=position)
+        for computations in (c, f):
+            self.assertEqual((computations.position.x, computations.position.y,
+                              computations.position.z),
+                             (position.x, position.y, position.z))
+            self.assertEqual((computations.normal.x, computations.normal.y,
+                              computations.normal.z),
+                             (normal.x, normal.y, normal.z))
+            over_position = position + normal * Utilities.EPSILON
+            self.assertEqual((computations.over_position.x,
+                              computations.over_position.y,
+                              computations.over_position.z),
+                             (over_position.x, over_position.y, over_position.z))
+
+    def test_set_lazy_computations(self):
+        r = Ray(origin=Point(x=0, y=0, z=0), direction=Vector(x=0, y=0, z=1))
+        c = Intersection(time=1, shape=Sphere()).prepare_computations(ray=r)
+        c.inside = False
+        self.assertFalse(c.inside)
+        self.assertEqual(c.normal, Vector(x=0, y=0, z=-1))
+
 class TestIntersections(unittest.TestCase):
     def setUp(self):
         self._sphere = Sphere()
@@ -13,6 +13,29 @@ class TestPointLight(unittest.TestCase):
         self.assertEqual(p, l.position)
         self.assertEqual(i, l.intensity)
 
+    def test_range_attenuation(self):
+        l = PointLight(position=Point(x=0, y=0, z=0), range=10)
+        self.assertEqual(l.attenuation(position=Point(x=0, y=0, z=0)), 1.0)
+        self.assertAlmostEqual(l.attenuation(position=Point(x=5, y=0, z=0)), 0.5625)
+        self.assertEqual(l.attenuation(position=Point(x=0, y=10, z=0)), 0.0)
+        self.assertEqual(l.attenuation(position=Point(x=0, y=0, z=20)), 0.0)
+
+    def test_no_range_no_attenuation(self):
+        l = PointLight(position=Point(x=0, y=0, z=0))
+        self.assertIsNone(l.range)
+        self.assertEqual(l.attenuation(position=Point(x=1000, y=0, z=0)), 1.0)
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            PointLight(range=0)
+
+    def test_contribution(self):
+        l = PointLight(position=Point(x=0, y=0, z=0),
+                       intensity=Color(red=0.5, green=0.25, blue=0),
+                       range=10)
+        self.assertAlmostEqual(l.contribution(position=Point(x=5, y=0, z=0)),
+                               0.5 * 0.5625)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -212,6 +212,20 @@ class TestMaterial(unittest.TestCase):
                         in_shadow=False)
         self.assertEqual(c2, Color(red=0, green=0, blue=0))
 
+    def test_lighting_light_with_range(self):
+        e = Vector(x=0, y=0, z=-1)
+        n = Vector(x=0, y=0, z=-1)
+        l = PointLight(position=Point(x=0, y=0, z=-5),
+                       intensity=Color(red=1, green=1, blue=1),
+                       range=10)
+        c = self._material.lighting(shape=Sphere(),
+                                    light=l,
+                                    position=self._position,
+                                    eye=e,
+                                    normal=n,
+                                    in_shadow=False)
+        self.assertEqual(c, Color(red=1.9, blue=1.9, green=1.9) * 0.5625)
+
 
 if __name__ == '__main__':
     unittest.main()
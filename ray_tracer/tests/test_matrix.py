@@ -1,9 +1,10 @@
 import math
 import unittest
 
-from matrix import Matrix
+from matrix import Matrix, Matrix4
 from point import Point
 from tuple import Tuple
+from tuple_array import TupleArray
 from util import Utilities
 from vector import Vector
 
@@ -505,6 +506,120 @@ class TestMatrix(unittest.TestCase):
                                               0.00000, 0.00000, 0.00000, 1.00000])
         self.assertEqual(t, m)
 
+    def test_set_item_changes_version(self):
+        m = Matrix.identity()
+        version = m.version
+        m.set_item(row=1, column=2, value=3)
+        self.assertNotEqual(m.version, version)
+
+    def test_values(self):
+        m = Matrix(rows=2, columns=3, values=[1, 2, 3, 4, 5, 6])
+        self.assertEqual(m.values, (1, 2, 3, 4, 5, 6))
+        self.assertEqual(Matrix.translation_transform(x=1, y=2, z=3).values,
+                         (1, 0, 0, 1, 0, 1, 0, 2, 0, 0, 1, 3, 0, 0, 0, 1))
+
+    def test_transform_array(self):
+        tuples = [Point(x=1, y=2, z=3), Vector(x=-1, y=0.5, z=2), Tuple(1, 2, 3, 4)]
+        for m in (Matrix.translation_transform(x=1, y=2, z=3) *
+                  Matrix.rotation_y_transform(radians=math.pi / 3),
+                  Matrix4(values=[1, 2, 3, 4,
+                                  2, 4, 4, 2,
+                                  8, 6, 4, 1,
+                                  0.5, 0, 0, 1]),
+                  Matrix(rows=4, columns=4, values=list(range(16)))):
+            transformed = m * TupleArray.from_tuples(tuples)
+            self.assertEqual(len(transformed), 3)
+            for index, value in enumerate(tuples):
+                expected = m * value
+                self.assertEqual((transformed.x[index], transformed.y[index],
+                                  transformed.z[index], transformed.w[index]),
+                                 (expected.x, expected.y, expected.z, expected.w))
+
+        self.assertEqual(len(Matrix.identity() * TupleArray()), 0)
+        self.assertRaises(NotImplementedError,
+                          Matrix(rows=3, columns=3).transform_array,
+                          TupleArray())
+
+
+class TestMatrix4(unittest.TestCase):
+    def setUp(self):
+        self._values = [-5, 2, 6, -8,
+                        1, -5, 1, 8,
+                        7, 7, -6, -7,
+                        1, -3, 7, 4]
+        self._affine_values = [2, 0.5, 0, 3,
+                               -1, 1, 0.25, -2,
+                               0.5, 0, 4, 5,
+                               0, 0, 0, 1]
+
+    def test_create_requires_4x4(self):
+        with self.assertRaises(ValueError):
+            Matrix4(rows=3, columns=3)
+        with self.assertRaises(ValueError):
+            Matrix4(values=[1, 2, 3])
+        with self.assertRaises(ValueError):
+            Matrix4(values=list(range(17)))
+
+    def test_transforms_are_4x4(self):
+        self.assertIsInstance(Matrix.identity(), Matrix4)
+        self.assertIsInstance(Matrix.translation_transform(x=1, y=2, z=3), Matrix4)
+        self.assertIsInstance(Matrix.scaling_transform(x=1, y=2, z=3), Matrix4)
+        self.assertIsInstance(Matrix.rotation_x_transform(radians=1), Matrix4)
+        self.assertIsInstance(Matrix.rotation_y_transform(radians=1), Matrix4)
+        self.assertIsInstance(Matrix.rotation_z_transform(radians=1), Matrix4)
+        self.assertIsInstance(Matrix.shearing_transform(), Matrix4)
+        self.assertIsInstance(Matrix.identity(dimensions=3), Matrix)
+        self.assertNotIsInstance(Matrix.identity(dimensions=3), Matrix4)
+
+    def test_is_affine(self):
+        self.assertTrue(Matrix4(values=self._affine_values).is_affine)
+        self.assertFalse(Matrix4(values=self._values).is_affine)
+
+    def test_multiply_matches_matrix(self):
+        a = Matrix4(values=self._values)
+        b = Matrix4(values=self._affine_values)
+        expected = Matrix(rows=4, columns=4, values=self._values) * \
+            Matrix(rows=4, columns=4, values=self._affine_values)
+        self.assertIsInstance(a * b, Matrix4)
+        self.assertEqual(a * b, expected)
+        self.assertEqual(a * Matrix(rows=4, columns=4, values=self._affine_values),
+                         expected)
+
+    def test_multiply_by_tuple_matches_matrix(self):
+        t = Tuple(x=1, y=2, z=3, w=1)
+        self.assertEqual(Matrix4(values=self._values) * t,
+                         Matrix(rows=4, columns=4, values=self._values) * t)
+
+    def test_transpose_matches_matrix(self):
+        self.assertEqual(Matrix4(values=self._values).transpose(),
+                         Matrix(rows=4, columns=4, values=self._values).transpose())
+
+    def test_determinant_matches_matrix(self):
+        self.assertTrue(Utilities.equal(Matrix4(values=self._values).determinant(),
+                                        532))
+        self.assertTrue(Utilities.equal(
+            Matrix4(values=self._affine_values).determinant(),
+            Matrix(rows=4, columns=4, values=self._affine_values).determinant()))
+
+    def test_inverse_matches_matrix(self):
+        self.assertEqual(Matrix4(values=self._values).inverse(),
+                         Matrix(rows=4, columns=4, values=self._values).inverse())
+
+    def test_affine_inverse_matches_matrix(self):
+        m = Matrix4(values=self._affine_values)
+        self.assertEqual(m.inverse(),
+                         Matrix(rows=4, columns=4, values=self._affine_values).inverse())
+        self.assertEqual(m * m.inverse(), Matrix.identity())
+
+    def test_inverse_of_noninvertible_matrix(self):
+        with self.assertRaises(ArithmeticError):
+            Matrix4(values=[-4, 2, -2, -3,
+                            9, 6, 2, 6,
+                            0, -5, 1, -5,
+                            0, 0, 0, 0]).inverse()
+        with self.assertRaises(ArithmeticError):
+            Matrix.scaling_transform(x=0, y=1, z=1).inverse()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -42,6 +42,30 @@ class TestPlane(unittest.TestCase):
         self.assertTrue(Utilities.equal(i[0].time, 1))
         self.assertIs(i[0].shape, self._plane)
 
+    def test_intersect_packet(self):
+        origins = [(0, 10, 0), (0, 1, 0), (0, -1, 0)]
+        directions = [(0, 0, 1), (0, -1, 0), (0, 1, 0)]
+        times = self._plane.intersect_packet(origins=origins,
+                                             directions=directions)
+        self.assertEqual(len(times), 3)
+        self.assertEqual(len(times[0]), 0)
+        self.assertEqual(len(times[1]), 1)
+        self.assertTrue(Utilities.equal(times[1][0], 1))
+        self.assertEqual(len(times[2]), 1)
+        self.assertTrue(Utilities.equal(times[2][0], 1))
+
+    def test_bounds_are_infinite(self):
+        self.assertTrue(self._plane.bounds().is_infinite)
+        self.assertTrue(self._plane.world_bounds().is_infinite)
+
+    def test_intersect_times(self):
+        self.assertEqual(self._plane._intersect_times(origin=(0, 1, 0),
+                                                      direction=(0, -1, 0)),
+                         (1,))
+        self.assertEqual(self._plane._intersect_times(origin=(0, 10, 0),
+                                                      direction=(0, 0, 1)),
+                         ())
+
 
 if __name__ == '__main__':
     unittest.main()
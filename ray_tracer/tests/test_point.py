@@ -71,6 +71,9 @@ class TestPoint(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             Point().reflect(Vector())
 
+    def test_slots(self):
+        self.assertFalse(hasattr(Point(x=1, y=2, z=3), '__dict__'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import io
+import unittest
+
+from ppm import PPMWriter
+
+
+class TestPPMWriter(unittest.TestCase):
+    def test_plain_header(self):
+        f = io.StringIO()
+        PPMWriter(file=f, width=5, height=3)
+        self.assertEqual(f.getvalue(), "P3\n5 3\n255\n")
+
+    def test_binary_header(self):
+        f = io.BytesIO()
+        PPMWriter(file=f, width=5, height=3, binary=True)
+        self.assertEqual(f.getvalue(), b"P6\n5 3\n255\n")
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            PPMWriter(file=io.StringIO(), width=0, height=3)
+        with self.assertRaises(ValueError):
+            PPMWriter(file=io.StringIO(), width=5, height=0)
+
+    def test_write_plain_row(self):
+        f = io.StringIO()
+        w = PPMWriter(file=f, width=2, height=1)
+        w.write_row([1.5, 0, 0.5, -0.5, 0, 1])
+        self.assertEqual(f.getvalue(), "P3\n2 1\n255\n255 0 128 0 0 255\n")
+        self.assertEqual(w.rows_written, 1)
+
+    def test_write_plain_row_70_column_limit(self):
+        f = io.StringIO()
+        w = PPMWriter(file=f, width=10, height=1)
+        w.write_row([1, 0.8, 0.6] * 10)
+        self.assertTrue(f.getvalue().endswith(
+            "255 204 153 255 204 153 255 204 153 255 204 153 255 204 153 255 204\n"
+            "153 255 204 153 255 204 153 255 204 153 255 204 153\n"))
+
+    def test_write_binary_row(self):
+        f = io.BytesIO()
+        w = PPMWriter(file=f, width=2, height=1, binary=True)
+        w.write_row([1.5, 0, 0.5, -0.5, 0, 1])
+        self.assertEqual(f.getvalue(), b"P6\n2 1\n255\n" + bytes([255, 0, 128, 0, 0, 255]))
+
+    def test_write_row_wrong_length(self):
+        w = PPMWriter(file=io.StringIO(), width=2, height=1)
+        with self.assertRaises(ValueError):
+            w.write_row([0, 0, 0])
+
+    def test_write_too_many_rows(self):
+        w = PPMWriter(file=io.StringIO(), width=1, height=1)
+        w.write_row([0, 0, 0])
+        with self.assertRaises(ValueError):
+            w.write_row([0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
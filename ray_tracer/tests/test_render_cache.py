@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from color import Color
+from lights import PointLight
+from matrix import Matrix
+from point import Point
+from render_cache import RenderCache, scene_hash
+from scenes import SCENES
+
+
+class TestSceneHash(unittest.TestCase):
+    def test_same_scene_same_hash(self):
+        world, camera = SCENES["chapter_10"](horizontal_size=20, vertical_size=10)
+        other_world, other_camera = SCENES["chapter_10"](horizontal_size=20,
+                                                         vertical_size=10)
+        self.assertEqual(scene_hash(world=world, camera=camera),
+                         scene_hash(world=other_world, camera=other_camera))
+
+    def test_acceleration_does_not_change_hash(self):
+        world, camera = SCENES["chapter_7"](horizontal_size=20, vertical_size=10)
+        before = scene_hash(world=world, camera=camera)
+        world.build_bvh()
+        camera.ray_for_pixel(x=1, y=1)
+        self.assertEqual(scene_hash(world=world, camera=camera), before)
+
+    def test_changes_change_hash(self):
+        def changed(change):
+            world, camera = SCENES["chapter_10"](horizontal_size=20, vertical_size=10)
+            before = scene_hash(world=world, camera=camera)
+            change(world, camera)
+            return scene_hash(world=world, camera=camera) != before
+
+        self.assertTrue(changed(lambda w, c: w.objects[2].transform.set_item(
+            row=0, column=3, value=1)))
+        self.assertTrue(changed(lambda w, c: setattr(w.objects[3].material,
+                                                     "diffuse", 0.5)))
+        self.assertTrue(changed(lambda w, c: setattr(w.objects[2].material.pattern,
+                                                     "color_b",
+                                                     Color(red=0, green=0, blue=1))))
+        self.assertTrue(changed(lambda w, c: w.add_light(
+            PointLight(position=Point(x=5, y=5, z=-5)))))
+        self.assertTrue(changed(lambda w, c: setattr(c, "transform",
+                                                     Matrix.identity())))
+        self.assertFalse(changed(lambda w, c: setattr(w.objects[2], "transform",
+                                                      w.objects[2].transform)))
+
+    def test_camera_size_changes_hash(self):
+        world, camera = SCENES["chapter_6"](horizontal_size=20, vertical_size=10)
+        _, other_camera = SCENES["chapter_6"](horizontal_size=20, vertical_size=11)
+        self.assertNotEqual(scene_hash(world=world, camera=camera),
+                            scene_hash(world=world, camera=other_camera))
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._world, self._camera = SCENES["chapter_9"](horizontal_size=8,
+                                                        vertical_size=4)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_miss_then_hit(self):
+        cache = RenderCache(directory=self._directory.name)
+        self.assertIsNone(cache.get(world=self._world, camera=self._camera))
+
+        canvas = cache.render(world=self._world, camera=self._camera)
+        with mock.patch.object(type(self._camera), "render") as render:
+            cached = cache.render(world=self._world, camera=self._camera)
+            render.assert_not_called()
+
+        self.assertEqual((cached.width, cached.height), (8, 4))
+        self.assertEqual(list(cached.buffer), list(canvas.buffer))
+
+    def test_shared_between_instances(self):
+        canvas = self._camera.render(world=self._world)
+        RenderCache(directory=self._directory.name).put(world=self._world,
+                                                        camera=self._camera,
+                                                        canvas=canvas)
+        cached = RenderCache(directory=self._directory.name).get(world=self._world,
+                                                                 camera=self._camera)
+        self.assertEqual(cached.to_ppm(), canvas.to_ppm())
+
+    def test_lru_eviction(self):
+        canvas = self._camera.render(world=self._world)
+        entry_size = len(RenderCache(directory=self._directory.name)._encode(canvas))
+        cache = RenderCache(directory=self._directory.name,
+                            maximum_size=entry_size * 2)
+
+        cache.put_by_key(key="a", canvas=canvas)
+        os.utime(cache._path("a"), ns=(1, 1))
+        cache.put_by_key(key="b", canvas=canvas)
+        os.utime(cache._path("b"), ns=(2, 2))
+
+        # Using "a" makes "b" the least recently used
+        self.assertIsNotNone(cache.get_by_key(key="a"))
+        cache.put_by_key(key="c", canvas=canvas)
+
+        self.assertIsNotNone(cache.get_by_key(key="a"))
+        self.assertIsNone(cache.get_by_key(key="b"))
+        self.assertIsNotNone(cache.get_by_key(key="c"))
+        self.assertLessEqual(cache.size, entry_size * 2)
+
+    def test_damaged_entry_is_a_miss(self):
+        cache = RenderCache(directory=self._directory.name)
+        key = cache.put(world=self._world, camera=self._camera,
+                        canvas=self._camera.render(world=self._world))
+        with open(cache._path(key), "r+b") as file:
+            file.truncate(20)
+        self.assertIsNone(cache.get_by_key(key=key))
+        self.assertFalse(os.path.exists(cache._path(key)))
+
+    def test_clear(self):
+        cache = RenderCache(directory=self._directory.name)
+        cache.render(world=self._world, camera=self._camera)
+        cache.clear()
+        self.assertEqual(cache.size, 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            RenderCache(directory=self._directory.name, maximum_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest import mock
+
+from camera import Camera
+from color import Color
+from materials import Material
+from matrix import Matrix
+from point import Point
+from ray import Ray
+from render_stats import RenderStatistics
+from scenes import SCENES
+from shape import Shape
+from vector import Vector
+from world import World
+
+
+class TestRenderStatistics(unittest.TestCase):
+    def test_disabled_leaves_methods_alone(self):
+        originals = (Camera.render, World.intersect, Shape.intersect,
+                     Material.lighting, Matrix.inverse, Color.__init__)
+        with RenderStatistics() as statistics:
+            self.assertTrue(statistics.enabled)
+            self.assertIsNot(Shape.intersect, originals[2])
+        self.assertFalse(statistics.enabled)
+        self.assertEqual((Camera.render, World.intersect, Shape.intersect,
+                          Material.lighting, Matrix.inverse, Color.__init__),
+                         originals)
+
+    def test_only_one_enabled(self):
+        with RenderStatistics():
+            with self.assertRaises(RuntimeError):
+                RenderStatistics().enable()
+
+    def test_render_frame(self):
+        world, camera = SCENES["chapter_9"](horizontal_size=8, vertical_size=4)
+        expected = list(camera.render(world=world).buffer)
+        with RenderStatistics() as statistics:
+            self.assertEqual(list(camera.render(world=world).buffer), expected)
+            camera.render(world=world)
+
+        report = statistics.report()
+        self.assertEqual(len(report["frames"]), 2)
+        frame = report["frames"][0]
+        self.assertEqual(frame["pixels"], 32)
+        self.assertEqual(frame["primary_rays"], 32)
+        self.assertLessEqual(frame["shadow_rays"], frame["shading_calls"])
+        self.assertGreaterEqual(frame["intersection_tests"], 32 * len(world.objects))
+        self.assertGreater(frame["color_allocations"], 0)
+        self.assertEqual(report["totals"]["primary_rays"], 64)
+        self.assertEqual(sum(shape["intersection_tests"] for shape in report["shapes"]),
+                         report["totals"]["intersection_tests"])
+        self.assertTrue(all(shape["shape"].split("[")[0] in ("Plane", "Sphere")
+                            for shape in report["shapes"]))
+        self.assertEqual(sum(material["shading_calls"] for material in report["materials"]),
+                         report["totals"]["shading_calls"])
+
+    def test_single_ray_queries(self):
+        world, camera = SCENES["chapter_6"]()
+        with RenderStatistics() as statistics:
+            # Only rays from the camera are primary rays
+            world.color_at(ray=Ray(origin=Point(x=0, y=0, z=-5),
+                                   direction=Vector(x=0, y=0, z=1)))
+            self.assertEqual(statistics.counters["primary_rays"], 0)
+            camera.ray_for_pixel(x=0, y=0)
+            Matrix.scaling_transform(x=2, y=2, z=2).inverse()
+
+        counters = statistics.counters
+        self.assertEqual(counters["primary_rays"], 1)
+        self.assertEqual(counters["shadow_rays"], 1)
+        self.assertEqual(counters["shading_calls"], 1)
+        self.assertEqual(counters["matrix_inversions"], 1)
+        self.assertEqual(statistics.shapes[0].intersection_tests, 2)
+
+    def test_threaded_render(self):
+        world, camera = SCENES["chapter_9"](horizontal_size=16, vertical_size=8)
+        with RenderStatistics() as serial:
+            camera.render(world=world)
+        with RenderStatistics() as threaded:
+            camera.render(world=world, workers=4, tile_size=4,
+                          backend=Camera.BACKEND_THREADS)
+
+        self.assertEqual(threaded.counters["primary_rays"], 128)
+        self.assertEqual(threaded.counters["intersection_tests"],
+                         serial.counters["intersection_tests"])
+        self.assertEqual(threaded.counters["shading_calls"],
+                         serial.counters["shading_calls"])
+
+    def test_failed_enable_leaves_methods_alone(self):
+        originals = (Camera.render, World.intersect, Shape.intersect)
+        statistics = RenderStatistics()
+        with mock.patch.object(RenderStatistics, "_wrap_lighting",
+                               side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                statistics.enable()
+        self.assertFalse(statistics.enabled)
+        self.assertEqual((Camera.render, World.intersect, Shape.intersect),
+                         originals)
+        with RenderStatistics():
+            pass
+
+    def test_reset(self):
+        world, _ = SCENES["chapter_6"]()
+        statistics = RenderStatistics()
+        with statistics:
+            world.color_at(ray=Ray(origin=Point(x=0, y=0, z=-5),
+                                   direction=Vector(x=0, y=0, z=1)))
+        statistics.reset()
+        self.assertEqual(statistics.counters["primary_rays"], 0)
+        self.assertEqual(statistics.report()["shapes"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
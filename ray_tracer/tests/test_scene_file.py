@@ -0,0 +1,177 @@
+import json
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from color import Color
+from matrix import Matrix, Matrix4
+from patterns.ring import Ring
+from plane import Plane
+from point import Point
+from scene_file import compile_scene, load_compiled_scene, load_scene, \
+    parse_scene, save_scene, scene_document
+from scenes import SCENES
+from sphere import Sphere
+
+
+class TestSceneFile(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "scene.json")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def assertSameRender(self, scene, other_scene):
+        world, camera = scene
+        other_world, other_camera = other_scene
+        self.assertEqual(list(camera.render(world=world).buffer),
+                         list(other_camera.render(world=other_world).buffer))
+
+    def test_parse(self):
+        world, camera = parse_scene({
+            "camera": {"width": 20, "height": 10, "field_of_view": math.pi / 3,
+                       "from": [0, 1.5, -5], "to": [0, 1, 0], "up": [0, 1, 0]},
+            "lights": [{"position": [-10, 10, -10], "intensity": [1, 1, 1]},
+                       {"position": [10, 10, -10], "range": 30}],
+            "materials": {"floor": {"color": [1, 0.9, 0.9], "specular": 1}},
+            "objects": [
+                {"type": "plane", "material": "floor"},
+                {"type": "plane", "material": "floor",
+                 "transform": [["rotate_x", math.pi / 2], ["translate", 0, 0, 5]]},
+                {"type": "sphere", "casts_shadow": False,
+                 "transform": [["scale", 0.5, 0.5, 0.5], ["translate", 1.5, 0.5, -0.5]],
+                 "material": {"diffuse": 0.7,
+                              "pattern": {"type": "ring", "a": [1, 0, 0], "b": [0, 0, 1],
+                                          "transform": [["scale", 0.2, 0.2, 0.2]]}}}
+            ]})
+
+        self.assertEqual((camera.horizontal_size, camera.vertical_size), (20, 10))
+        self.assertEqual(camera.field_of_view, math.pi / 3)
+        self.assertEqual(len(world.lights), 2)
+        self.assertEqual(world.lights[1].range, 30)
+        floor, wall, sphere = world.objects
+        self.assertIsInstance(floor, Plane)
+        self.assertIs(floor.material, wall.material)
+        self.assertEqual(floor.material.color, Color(red=1, green=0.9, blue=0.9))
+        self.assertEqual(wall.transform,
+                         Matrix.translation_transform(x=0, y=0, z=5) *
+                         Matrix.rotation_x_transform(radians=math.pi / 2))
+        self.assertIsInstance(sphere, Sphere)
+        self.assertFalse(sphere.casts_shadow)
+        self.assertEqual(sphere.material.diffuse, 0.7)
+        self.assertIsInstance(sphere.material.pattern, Ring)
+        self.assertEqual(sphere.material.pattern.color_b, Color(red=0, green=0, blue=1))
+
+    def test_invalid(self):
+        for document in ([],
+                         {"objects": [{"type": "cube"}]},
+                         {"objects": [{"type": "sphere", "material": "missing"}]},
+                         {"objects": [{"type": "sphere",
+                                       "transform": [["translate", 1, 2]]}]},
+                         {"objects": [{"type": "sphere", "transform": [["twist", 1]]}]},
+                         {"materials": {"a": {"pattern": {"type": "plaid"}}}},
+                         {"lights": [{"position": [1, "2", 3]}]}):
+            with self.assertRaises(ValueError):
+                parse_scene(document)
+
+    def test_save_and_load(self):
+        scene = SCENES["chapter_10"](horizontal_size=20, vertical_size=10)
+        save_scene(*scene, path=self.path)
+        loaded = load_scene(path=self.path)
+        self.assertSameRender(scene, loaded)
+        self.assertIs(loaded[0].objects[0].material, loaded[0].objects[1].material)
+
+    def test_save_nearly_identity_transform(self):
+        world, camera = SCENES["chapter_6"](horizontal_size=10, vertical_size=10)
+        world.objects[0].transform = Matrix.translation_transform(x=1e-6, y=0, z=0)
+        save_scene(world=world, camera=camera, path=self.path)
+        loaded_world, _ = load_scene(path=self.path)
+        self.assertEqual(loaded_world.objects[0].transform.values,
+                         world.objects[0].transform.values)
+
+    def test_unit_spheres_only(self):
+        world, camera = SCENES["chapter_6"](horizontal_size=10, vertical_size=10)
+        world.objects[0].center = Point(x=1, y=0, z=0)
+        with self.assertRaises(ValueError):
+            scene_document(world=world, camera=camera)
+
+    def test_compile(self):
+        world, camera = SCENES["chapter_10"](horizontal_size=20, vertical_size=10,
+                                             additional_spheres=4)
+        world.build_bvh()
+        path = os.path.join(self._directory.name, "scene.rtscene")
+        compile_scene(world=world, camera=camera, path=path, source_hash="abc")
+
+        loaded = load_compiled_scene(path=path)
+        self.assertSameRender((world, camera), loaded)
+        self.assertIsNotNone(loaded[0].bvh)
+        self.assertIsNone(load_compiled_scene(path=path, source_hash="def"))
+
+    def test_load_large_compiled_scene(self):
+        # Loading a compiled scene must not check or invert any of the
+        # transforms again, which would dominate loading tens of thousands of
+        # objects.
+        world, camera = SCENES["chapter_6"](horizontal_size=10, vertical_size=10)
+        material = world.objects[0].material
+        for index in range(20000):
+            world.add_object(Sphere(transform=Matrix.translation_transform(x=index % 100,
+                                                                           y=index // 100,
+                                                                           z=5),
+                                    material=material))
+        path = os.path.join(self._directory.name, "scene.rtscene")
+        compile_scene(world=world, camera=camera, path=path)
+
+        with mock.patch.object(Matrix4, 'inverse') as inverse, \
+                mock.patch('transformable._check_affine') as check_affine:
+            loaded_world, _ = load_compiled_scene(path=path)
+        inverse.assert_not_called()
+        check_affine.assert_not_called()
+
+        self.assertEqual(len(loaded_world.objects), len(world.objects))
+        last = loaded_world.objects[-1]
+        self.assertEqual(last.transform, world.objects[-1].transform)
+        self.assertEqual(last.inverse_transform, world.objects[-1].inverse_transform)
+        self.assertEqual(last.inverse_transform_transpose,
+                         world.objects[-1].inverse_transform_transpose)
+
+    def test_compiled_directory(self):
+        compiled_directory = os.path.join(self._directory.name, "compiled")
+        save_scene(*SCENES["chapter_9"](horizontal_size=20, vertical_size=10),
+                   path=self.path)
+
+        first = load_scene(path=self.path, compiled_directory=compiled_directory)
+        self.assertEqual(len(os.listdir(compiled_directory)), 1)
+        second = load_scene(path=self.path, compiled_directory=compiled_directory)
+        self.assertSameRender(first, second)
+
+        # A damaged compiled scene is ignored and compiled again
+        compiled_path = os.path.join(compiled_directory,
+                                     os.listdir(compiled_directory)[0])
+        with open(compiled_path, "wb") as file:
+            file.write(b"damaged")
+        self.assertSameRender(first, load_scene(path=self.path,
+                                                compiled_directory=compiled_directory))
+
+        # Changing the scene file compiles it again rather than using the
+        # stale compiled scene
+        with open(self.path) as file:
+            document = json.load(file)
+        document["camera"]["width"] = 30
+        with open(self.path, "w") as file:
+            json.dump(document, file)
+        _, camera = load_scene(path=self.path, compiled_directory=compiled_directory)
+        self.assertEqual(camera.horizontal_size, 30)
+        self.assertEqual(len(os.listdir(compiled_directory)), 2)
+
+    def test_not_json(self):
+        with open(self.path, "w") as file:
+            file.write("{not json")
+        with self.assertRaises(ValueError):
+            load_scene(path=self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from camera import Camera
+from scenes import SCENES
+from world import World
+
+
+class TestScenes(unittest.TestCase):
+    def test_scenes_are_parameterized(self):
+        for name, scene in SCENES.items():
+            world, camera = scene(horizontal_size=12, vertical_size=8)
+            self.assertIsInstance(world, World, name)
+            self.assertIsInstance(camera, Camera, name)
+            self.assertEqual(camera.horizontal_size, 12)
+            self.assertEqual(camera.vertical_size, 8)
+
+    def test_additional_spheres(self):
+        for name, scene in SCENES.items():
+            world, _ = scene()
+            crowded_world, _ = scene(additional_spheres=10)
+            self.assertEqual(len(crowded_world.objects), len(world.objects) + 10, name)
+
+    def test_scenes_are_deterministic(self):
+        first_world, first_camera = SCENES["chapter_10"](horizontal_size=10,
+                                                         vertical_size=5,
+                                                         additional_spheres=4)
+        second_world, second_camera = SCENES["chapter_10"](horizontal_size=10,
+                                                           vertical_size=5,
+                                                           additional_spheres=4)
+        self.assertEqual(list(first_camera.render(world=first_world).buffer),
+                         list(second_camera.render(world=second_world).buffer))
+
+
+if __name__ == '__main__':
+    unittest.main()
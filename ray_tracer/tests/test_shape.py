@@ -102,6 +102,72 @@ class TestShape(unittest.TestCase):
         xp = Point(x=0.83125, y=1.14412, z=-0.70711)
         self._shape._normal_at.assert_called_with(position=xp)
 
+    def test_intersect_packet_falls_back_to_intersect(self):
+        self._shape.transform = Matrix.translation_transform(x=5, y=0, z=0)
+        self._shape._intersect = mock.MagicMock(return_value=Intersections())
+
+        times = self._shape.intersect_packet(origins=[(0, 0, -5)],
+                                             directions=[(0, 0, 1)])
+        self.assertEqual(times, [[]])
+        xr = Ray(origin=Point(x=-5, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        self._shape._intersect.assert_called_with(ray=xr)
+
+    def test_intersect_uses_cached_inverse(self):
+        self._shape.transform = Matrix.scaling_transform(x=2, y=2, z=2)
+        self._shape._intersect = mock.MagicMock(return_value=Intersections())
+
+        r = Ray(origin=Point(x=0, y= 0, z=-5), direction=Vector(x=0, y=0, z=1))
+        with mock.patch.object(Matrix, 'inverse') as inverse:
+            self._shape.intersect(ray=r)
+            inverse.assert_not_called()
+
+    def test_intersect_after_in_place_transform_change(self):
+        self._shape.transform = Matrix.scaling_transform(x=2, y=2, z=2)
+        self._shape.transform.set_item(row=0, column=3, value=5)
+        self._shape._intersect = mock.MagicMock(return_value=Intersections())
+
+        r = Ray(origin=Point(x=0, y= 0, z=-5), direction=Vector(x=0, y=0, z=1))
+        self._shape.intersect(ray=r)
+        xr = Ray(origin=Point(x=-2.5, y=0, z=-2.5), direction=Vector(x=0,
+                                                                     y=0,
+                                                                     z=0.5))
+        self._shape._intersect.assert_called_with(ray=xr)
+
+    def test_casts_shadow_default(self):
+        self.assertTrue(self._shape.casts_shadow)
+
+    def test_casts_shadow_set(self):
+        self.assertFalse(Shape(casts_shadow=False).casts_shadow)
+
+    def test_intersect_does_not_build_rays(self):
+        self._shape.transform = Matrix.scaling_transform(x=2, y=2, z=2)
+        self._shape._intersect_times = mock.MagicMock(return_value=(1.5, 3.5))
+
+        r = Ray(origin=Point(x=0, y= 0, z=-5), direction=Vector(x=0, y=0, z=1))
+        with mock.patch.object(Ray, 'transform') as transform:
+            xs = self._shape.intersect(ray=r)
+            transform.assert_not_called()
+        self._shape._intersect_times.assert_called_with(origin=(0, 0, -2.5),
+                                                        direction=(0, 0, 0.5))
+        self.assertEqual([xs[index].time for index in range(xs.count)], [1.5, 3.5])
+        self.assertIs(xs[0].shape, self._shape)
+
+    def test_hit_time(self):
+        self._shape.transform = Matrix.scaling_transform(x=2, y=2, z=2)
+        self._shape._intersect_times = mock.MagicMock(return_value=(-1.0, 3.5, 1.5))
+        self.assertEqual(self._shape.hit_time(origin=(0, 0, -5), direction=(0, 0, 1)),
+                         1.5)
+        self._shape._intersect_times.assert_called_with(origin=(0, 0, -2.5),
+                                                        direction=(0, 0, 0.5))
+        self.assertEqual(self._shape.hit_time(origin=(0, 0, -5), direction=(0, 0, 1),
+                                              maximum_time=2),
+                         1.5)
+        self.assertIsNone(self._shape.hit_time(origin=(0, 0, -5), direction=(0, 0, 1),
+                                               maximum_time=1.5))
+
+        self._shape._intersect_times = mock.MagicMock(return_value=())
+        self.assertIsNone(self._shape.hit_time(origin=(0, 0, -5), direction=(0, 0, 1)))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -110,6 +110,54 @@ class TestSphere(unittest.TestCase):
                                                   z=-math.sqrt(2)/2))
         self.assertEqual(n, Vector(0, 0.97014, -0.24254))
 
+    def test_intersect_packet(self):
+        self._sphere.transform = Matrix.scaling_transform(x=2, y=2, z=2)
+        origins = [(0, 0, -5), (0, 2, -5), (0, 3, -5)]
+        directions = [(0, 0, 1), (0, 0, 1), (0, 0, 1)]
+        times = self._sphere.intersect_packet(origins=origins,
+                                              directions=directions)
+        self.assertEqual(len(times), 3)
+        self.assertEqual(len(times[0]), 2)
+        self.assertTrue(Utilities.equal(times[0][0], 3))
+        self.assertTrue(Utilities.equal(times[0][1], 7))
+        self.assertTrue(Utilities.equal(times[1][0], 5))
+        self.assertTrue(Utilities.equal(times[1][1], 5))
+        self.assertEqual(len(times[2]), 0)
+
+    def test_world_bounds(self):
+        self._sphere.transform = Matrix.translation_transform(x=1, y=2, z=3) * \
+                                 Matrix.scaling_transform(x=2, y=2, z=2)
+        b = self._sphere.world_bounds()
+        self.assertEqual(b.minimum, Point(x=-1, y=0, z=1))
+        self.assertEqual(b.maximum, Point(x=3, y=4, z=5))
+
+    def test_intersect_times_matches_intersect(self):
+        r = Ray(origin=Point(x=0.1, y=0.2, z=-5), direction=Vector(x=0, y=0, z=1))
+        xs = self._sphere._intersect(ray=r)
+        self.assertEqual(self._sphere._intersect_times(origin=(0.1, 0.2, -5),
+                                                       direction=(0, 0, 1)),
+                         (xs[0].time, xs[1].time))
+        self.assertEqual(self._sphere._intersect_times(origin=(0, 2, -5),
+                                                       direction=(0, 0, 1)),
+                         ())
+
+    def test_intersect_packet_shared_origin(self):
+        self._sphere.transform = Matrix.translation_transform(x=0.5, y=0, z=0) * \
+                                 Matrix.scaling_transform(x=2, y=1, z=1)
+        origin = (0.25, 0.5, -5)
+        directions = [(0, 0, 1), (0.1, 0, 0.99), (0, 0.3, 0.95)]
+        shared = self._sphere.intersect_packet(origins=[origin] * 3,
+                                               directions=directions)
+        separate = self._sphere.intersect_packet(origins=[(origin[0], origin[1], origin[2])
+                                                          for _ in range(3)],
+                                                 directions=directions)
+        self.assertEqual(shared, separate)
+        for times, direction in zip(shared, directions):
+            xs = self._sphere.intersect(ray=Ray(origin=Point(*origin),
+                                                direction=Vector(*direction)))
+            self.assertEqual(tuple(times), tuple(xs[index].time
+                                                 for index in range(xs.count)))
+
 
 if __name__ == '__main__':
     unittest.main()
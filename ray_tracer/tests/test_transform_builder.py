@@ -0,0 +1,93 @@
+import math
+import unittest
+from unittest import mock
+
+from matrix import Matrix
+from point import Point
+from sphere import Sphere
+from transform_builder import TransformBuilder
+from vector import Vector
+
+
+class TestTransformBuilder(unittest.TestCase):
+    def assertInverses(self, builder, transform):
+        self.assertEqual(builder.transform, transform)
+        self.assertEqual(builder.inverse_transform, transform.inverse())
+        self.assertEqual(builder.inverse_transform_transpose,
+                         transform.inverse().transpose())
+
+    def test_empty(self):
+        builder = TransformBuilder()
+        self.assertEqual(builder.transform, Matrix.identity())
+        self.assertEqual(builder.inverse_transform, Matrix.identity())
+        self.assertEqual(builder.inverse_transform_transpose, Matrix.identity())
+
+    def test_single_steps(self):
+        self.assertInverses(TransformBuilder().translate(x=5, y=-3, z=2),
+                            Matrix.translation_transform(x=5, y=-3, z=2))
+        self.assertInverses(TransformBuilder().scale(x=2, y=3, z=4),
+                            Matrix.scaling_transform(x=2, y=3, z=4))
+        self.assertInverses(TransformBuilder().rotate_x(radians=math.pi / 4),
+                            Matrix.rotation_x_transform(radians=math.pi / 4))
+        self.assertInverses(TransformBuilder().rotate_y(radians=math.pi / 3),
+                            Matrix.rotation_y_transform(radians=math.pi / 3))
+        self.assertInverses(TransformBuilder().rotate_z(radians=math.pi / 5),
+                            Matrix.rotation_z_transform(radians=math.pi / 5))
+        self.assertInverses(TransformBuilder().shear(1, 0, 0.5, 0, 0, 2),
+                            Matrix.shearing_transform(1, 0, 0.5, 0, 0, 2))
+
+    def test_steps_are_applied_in_order(self):
+        builder = TransformBuilder() \
+            .rotate_x(radians=math.pi / 2) \
+            .scale(x=5, y=5, z=5) \
+            .shear(0, 1, 0, 0, 0.5, 0) \
+            .translate(x=10, y=5, z=7)
+        self.assertInverses(builder,
+                            Matrix.identity()
+                            .rotate_x(radians=math.pi / 2)
+                            .scale(x=5, y=5, z=5)
+                            .shear(0, 1, 0, 0, 0.5, 0)
+                            .translate(x=10, y=5, z=7))
+
+    def test_no_general_inversion(self):
+        with mock.patch.object(Matrix, 'inverse') as inverse:
+            builder = TransformBuilder() \
+                .scale(x=1, y=0.5, z=1) \
+                .rotate_z(radians=math.pi / 5) \
+                .translate(x=0, y=1, z=0)
+            builder.inverse_transform_transpose
+            inverse.assert_not_called()
+
+    def test_matrix(self):
+        transform = Matrix.view_transform(eye=Point(x=1, y=3, z=2),
+                                          to=Point(x=4, y=-2, z=8),
+                                          up=Vector(x=1, y=1, z=0))
+        self.assertInverses(TransformBuilder().matrix(matrix=transform), transform)
+
+        inverse = transform.inverse()
+        with mock.patch.object(Matrix, 'inverse') as matrix_inverse:
+            builder = TransformBuilder().matrix(matrix=transform, inverse=inverse)
+            matrix_inverse.assert_not_called()
+        self.assertEqual(builder.inverse_transform, inverse)
+
+        self.assertRaises(ValueError,
+                          TransformBuilder().matrix,
+                          matrix=Matrix(rows=3, columns=3))
+
+    def test_not_invertible(self):
+        self.assertRaises(ArithmeticError, TransformBuilder().scale, x=0, y=1, z=1)
+
+    def test_shape_normal(self):
+        builder = TransformBuilder() \
+            .rotate_z(radians=math.pi / 5) \
+            .scale(x=1, y=0.5, z=1)
+        shape = Sphere(transform=builder)
+        other = Sphere(transform=Matrix.scaling_transform(x=1, y=0.5, z=1) *
+                       Matrix.rotation_z_transform(radians=math.pi / 5))
+        position = Point(x=0, y=math.sqrt(2) / 2, z=-math.sqrt(2) / 2)
+        self.assertEqual(shape.normal_at(position=position),
+                         other.normal_at(position=position))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest import mock
+
+from matrix import Matrix
+from transform_builder import TransformBuilder
+import transformable
+from transformable import Transformable
+from util import Utilities
+
+
+class TestTransformable(unittest.TestCase):
+    def setUp(self):
+        self._transformable = Transformable()
+        self._transformable.transform = Matrix.translation_transform(x=1,
+                                                                     y=2,
+                                                                     z=3)
+
+    def test_transform_default(self):
+        self._transformable.transform = None
+        self.assertEqual(self._transformable.transform, Matrix.identity())
+        self.assertEqual(self._transformable.inverse_transform, Matrix.identity())
+
+    def test_inverse_transform(self):
+        self.assertEqual(self._transformable.inverse_transform,
+                         Matrix.translation_transform(x=-1, y=-2, z=-3))
+
+    def test_inverse_transform_transpose(self):
+        self.assertEqual(self._transformable.inverse_transform_transpose,
+                         Matrix.translation_transform(x=-1,
+                                                      y=-2,
+                                                      z=-3).transpose())
+
+    def test_inverse_transform_values(self):
+        self.assertEqual(self._transformable.inverse_transform_values,
+                         (1, 0, 0, -1, 0, 1, 0, -2, 0, 0, 1, -3))
+        self._transformable.transform.set_item(row=0, column=3, value=5)
+        self.assertEqual(self._transformable.inverse_transform_values[3], -5)
+
+    def test_projective_transform_rejected(self):
+        projective = Matrix.identity()
+        projective.set_item(row=3, column=2, value=0.5)
+        with self.assertRaises(ValueError):
+            self._transformable.transform = projective
+        self.assertEqual(self._transformable.inverse_transform,
+                         Matrix.translation_transform(x=-1, y=-2, z=-3))
+
+        self._transformable.transform.set_item(row=3, column=0, value=0.5)
+        with self.assertRaises(ValueError):
+            self._transformable.inverse_transform_values
+
+    def test_transform_checked_once(self):
+        with mock.patch('transformable._check_affine',
+                        wraps=transformable._check_affine) as check:
+            self._transformable.transform = Matrix.scaling_transform(x=2, y=2, z=2)
+            self._transformable.transform = TransformBuilder().translate(x=1)
+        self.assertEqual(check.call_count, 2)
+
+        # An exact bottom row does not need the comparison within epsilon
+        with mock.patch.object(Utilities, 'equal') as equal:
+            transformable._check_affine(matrix=Matrix.translation_transform(x=1,
+                                                                           y=2,
+                                                                           z=3))
+        equal.assert_not_called()
+        nearly_affine = Matrix.identity()
+        nearly_affine.set_item(row=3, column=3, value=1.000001)
+        transformable._check_affine(matrix=nearly_affine)
+
+    def test_inverse_is_cached(self):
+        with mock.patch.object(Matrix, 'inverse') as inverse:
+            self._transformable.inverse_transform
+            self._transformable.inverse_transform_transpose
+            inverse.assert_not_called()
+
+    def test_in_place_change_invalidates_cache(self):
+        self._transformable.transform.set_item(row=0, column=3, value=5)
+        self.assertEqual(self._transformable.inverse_transform,
+                         Matrix.translation_transform(x=-5, y=-2, z=-3))
+        self.assertEqual(self._transformable.inverse_transform_transpose,
+                         Matrix.translation_transform(x=-5,
+                                                      y=-2,
+                                                      z=-3).transpose())
+
+    def test_prepare(self):
+        self._transformable.transform.set_item(row=0, column=3, value=5)
+        self._transformable.prepare()
+        with mock.patch.object(Matrix, 'inverse') as inverse:
+            self.assertEqual(self._transformable.inverse_transform_values[3], -5)
+            inverse.assert_not_called()
+
+    def test_transform_builder(self):
+        builder = TransformBuilder().scale(x=2, y=2, z=2).translate(x=1, y=0, z=0)
+        with mock.patch.object(Matrix, 'inverse') as inverse:
+            self._transformable.transform = builder
+            inverse.assert_not_called()
+        self.assertIs(self._transformable.transform, builder.transform)
+        self.assertIs(self._transformable.inverse_transform, builder.inverse_transform)
+        self.assertIs(self._transformable.inverse_transform_transpose,
+                      builder.inverse_transform_transpose)
+        self.assertEqual(self._transformable.inverse_transform_values,
+                         (0.5, 0, 0, -0.5, 0, 0.5, 0, 0, 0, 0, 0.5, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -83,5 +83,34 @@ class TestTuple(unittest.TestCase):
         t = Tuple(1, -2, 3, -4)
         self.assertEqual(t / 2, Tuple(0.5, -1, 1.5, -2))
 
+    def test_slots(self):
+        t = Tuple(4.3, -4.2, 3.1, 1.0)
+        self.assertFalse(hasattr(t, '__dict__'))
+        with self.assertRaises(AttributeError):
+            t.v = 1.0
+
+    def test_set_components(self):
+        t = Tuple(4.3, -4.2, 3.1, 1.0)
+        t.x = 1.5
+        t.w = 0.0
+        self.assertEqual(t, Tuple(1.5, -4.2, 3.1, 0.0))
+
+    def test_unchecked_matches_checked(self):
+        p = Tuple(3, -2, 5, 1)
+        v = Tuple(-2, 3, 1, 0)
+        n = Tuple(0, 0.6, 0.8, 0)
+        self.assertEqual(p.add_unchecked(v), p + v)
+        self.assertEqual(p.subtract_unchecked(v), p - v)
+        self.assertEqual(p.negate_unchecked(), -p)
+        self.assertEqual(p.multiply_unchecked(3.5), p * 3.5)
+        self.assertEqual(v.dot_product_unchecked(n), v.dot_product(n))
+        self.assertEqual(v.normalize_unchecked(), v.normalize())
+        self.assertEqual(v.reflect_unchecked(n), v.reflect(n))
+
+    def test_unchecked_skips_checks(self):
+        p1 = Tuple(3, -2, 5, 1)
+        p2 = Tuple(-2, 3, 1, 1)
+        self.assertEqual(p1.add_unchecked(p2), Tuple(1, 1, 6, 2))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from point import Point
+from tuple import Tuple
+from tuple_array import TupleArray
+from vector import Vector
+
+
+class TestTupleArray(unittest.TestCase):
+    def test_default_create(self):
+        tuples = TupleArray()
+        self.assertEqual(len(tuples), 0)
+        self.assertEqual(list(tuples), [])
+
+    def test_create(self):
+        tuples = TupleArray(x=[1, 2], y=[3, 4], z=[5, 6], w=[1, 0])
+        self.assertEqual(len(tuples), 2)
+        self.assertEqual(tuples[0], Point(x=1, y=3, z=5))
+        self.assertEqual(tuples[1], Vector(x=2, y=4, z=6))
+        self.assertEqual(list(tuples.x), [1, 2])
+        self.assertRaises(ValueError, TupleArray, x=[1, 2], y=[3], z=[5, 6], w=[1, 0])
+
+    def test_from_tuples(self):
+        values = [Point(x=1, y=2, z=3), Vector(x=4, y=5, z=6), Tuple(7, 8, 9, 2)]
+        tuples = TupleArray.from_tuples(values)
+        self.assertEqual(list(tuples), values)
+        self.assertEqual(tuples[-1], values[-1])
+
+    def test_points_and_vectors(self):
+        components = [(1, 2, 3), (4, 5, 6)]
+        points = TupleArray.points(components)
+        self.assertEqual(list(points), [Point(x=1, y=2, z=3), Point(x=4, y=5, z=6)])
+        vectors = TupleArray.vectors(components)
+        self.assertEqual(list(vectors), [Vector(x=1, y=2, z=3), Vector(x=4, y=5, z=6)])
+        self.assertEqual(vectors.components(), components)
+
+    def test_equal(self):
+        tuples = TupleArray.points([(1, 2, 3)])
+        self.assertEqual(tuples, TupleArray.points([(1, 2, 3.000001)]))
+        self.assertNotEqual(tuples, TupleArray.vectors([(1, 2, 3)]))
+        self.assertNotEqual(tuples, TupleArray.points([(1, 2, 3), (1, 2, 3)]))
+
+
+    def test_slice(self):
+        tuples = TupleArray.points([(1, 2, 3), (4, 5, 6), (7, 8, 9)])
+        self.assertEqual(tuples[1:], TupleArray.points([(4, 5, 6), (7, 8, 9)]))
+        self.assertEqual(tuples[::-2], TupleArray.points([(7, 8, 9), (1, 2, 3)]))
+        self.assertEqual(len(tuples[3:]), 0)
+        tuples[:1].x[0] = 10
+        self.assertEqual(tuples.x[0], 1)
+        with self.assertRaises(TypeError):
+            tuples["x"]
+        with self.assertRaises(TypeError):
+            tuples[1.0]
+
+
+if __name__ == '__main__':
+    unittest.main()
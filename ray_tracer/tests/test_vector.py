@@ -89,6 +89,9 @@ class TestVector(unittest.TestCase):
         r = v.reflect(normal=n)
         self.assertEqual(r, Vector(x=1, y=0, z=0))
 
+    def test_slots(self):
+        self.assertFalse(hasattr(Vector(x=1, y=2, z=3), '__dict__'))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,9 @@ from color import Color
 from intersections import Intersection
 from lights import PointLight
 from matrix import Matrix
+from packet_observer import PacketObserver
+from plane import Plane
+from patterns.stripe import Stripe
 from point import Point
 from ray import Ray
 from sphere import Sphere
@@ -151,6 +154,247 @@ class TestWorld(unittest.TestCase):
         p = Point(x=-2, y=2, z=-2)
         self.assertFalse(self._default_world.is_shadowed(position=p))
 
+    def test_color_at_packet_matches_color_at(self):
+        floor = Plane(transform=Matrix.translation_transform(x=0, y=-1, z=0))
+        self._default_world.objects.append(floor)
+        origins = [(0, 0, -5), (0, 0, -5), (0, 0, 0.75), (0, 0, -5), (2, 2, -5)]
+        directions = [(0, 0, 1), (0, 1, 0), (0, 0, -1), (0, -0.6, 0.8),
+                      (0, 0, 1)]
+        colors = self._default_world.color_at_packet(origins=origins,
+                                                     directions=directions)
+        self.assertEqual(len(colors), len(origins))
+        for origin, direction, color in zip(origins, directions, colors):
+            expected = self._default_world.color_at(
+                ray=Ray(origin=Point(*origin), direction=Vector(*direction)))
+            self.assertEqual((color.red, color.green, color.blue),
+                             (expected.red, expected.green, expected.blue))
+
+    def test_color_at_packet_observer(self):
+        class Recorder(PacketObserver):
+            def __init__(self):
+                self.calls = []
+
+            def hit_packet_finished(self, origins, directions, hits):
+                self.calls.append(("hits", len(hits)))
+
+            def shadow_packet_started(self, positions, light):
+                self.calls.append(("shadows", len(positions)))
+
+            def color_packet_finished(self, origins, directions, colors):
+                self.calls.append(("colors", len(colors)))
+
+        recorder = Recorder()
+        origins = [(0, 0, -5), (0, 0, -5)]
+        directions = [(0, 0, 1), (0, 1, 0)]
+        colors = self._default_world.color_at_packet(origins=origins,
+                                                     directions=directions,
+                                                     observer=recorder)
+        self.assertEqual(recorder.calls,
+                         [("hits", 2), ("shadows", 1), ("colors", 2)])
+        self.assertEqual(colors,
+                         self._default_world.color_at_packet(origins=origins,
+                                                             directions=directions))
+
+    def test_hit_packet(self):
+        hits = self._default_world.hit_packet(origins=[(0, 0, -5), (0, 0, 0)],
+                                              directions=[(0, 0, 1), (0, 1, 0)])
+        self.assertTrue(Utilities.equal(hits[0][0], 4))
+        self.assertIs(hits[0][1], self._s1)
+        self.assertTrue(Utilities.equal(hits[1][0], 0.5))
+        self.assertIs(hits[1][1], self._s2)
+
+    def test_nearest_hit(self):
+        time, shape = self._default_world.nearest_hit(origin=(0, 0, -5),
+                                                      direction=(0, 0, 1))
+        self.assertTrue(Utilities.equal(time, 4))
+        self.assertIs(shape, self._s1)
+
+        time, shape = self._default_world.nearest_hit(origin=(0, 0, 0),
+                                                      direction=(0, 1, 0))
+        self.assertTrue(Utilities.equal(time, 0.5))
+        self.assertIs(shape, self._s2)
+
+        self.assertIsNone(self._default_world.nearest_hit(origin=(0, 0, -5),
+                                                          direction=(0, 1, 0)))
+        self.assertIsNone(self._default_world.nearest_hit(origin=(0, 0, 5),
+                                                          direction=(0, 0, 1)))
+
+    def test_prepare(self):
+        w = World()
+        s = Sphere()
+        s.material.pattern = Stripe(transform=Matrix.scaling_transform(x=2, y=2, z=2))
+        w.add_object(s)
+        w.add_object(Plane())
+        s.transform.set_item(row=0, column=3, value=4)
+        s.material.pattern.transform.set_item(row=1, column=1, value=4)
+        w.prepare()
+        self.assertEqual(s.__dict__['_inverse_transform_values'][3], -4)
+        self.assertEqual(s.material.pattern.__dict__['_inverse_transform_values'][5], 0.25)
+
+    def test_nearest_hit_matches_intersect(self):
+        spheres = [Sphere(transform=Matrix.translation_transform(x=x, y=0, z=y) *
+                                    Matrix.scaling_transform(x=0.4, y=0.4, z=0.4))
+                   for x in range(-2, 3) for y in range(-2, 3)]
+        for use_bvh in (False, True):
+            w = World(objects=[Plane()] + spheres,
+                      light_source=self._light_source,
+                      use_bvh=use_bvh)
+            for x in range(-6, 7):
+                origin = (x / 2, 0.2, -5)
+                direction = (0, -0.05, 1)
+                hit = w.intersect(ray=Ray(origin=Point(*origin),
+                                          direction=Vector(*direction))).hit()
+                nearest = w.nearest_hit(origin=origin, direction=direction)
+                self.assertEqual(nearest, (hit.time, hit.shape))
+
+    def test_is_shadowed_packet(self):
+        positions = [Point(x=0, y=10, z=0),
+                     Point(x=10, y=-10, z=10),
+                     Point(x=-20, y=20, z=-20),
+                     Point(x=-2, y=2, z=-2)]
+        self.assertEqual(self._default_world.is_shadowed_packet(positions=positions),
+                         [False, True, False, False])
+
+    def test_intersect_with_bvh(self):
+        w = World(objects=[self._s1, self._s2, Plane()],
+                  light_source=self._light_source,
+                  use_bvh=True)
+        self.assertEqual(len(w.bvh.shapes), 2)
+        r = Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        i = w.intersect(ray=r)
+        self.assertEqual(i.count, 4)
+        self.assertTrue(Utilities.equal(i[0].time, 4))
+        self.assertTrue(Utilities.equal(i[3].time, 6))
+
+    def test_color_at_packet_with_bvh_matches_without(self):
+        spheres = [Sphere(transform=Matrix.translation_transform(x=x, y=0, z=y) *
+                                    Matrix.scaling_transform(x=0.4, y=0.4, z=0.4))
+                   for x in range(-2, 3) for y in range(-2, 3)]
+        objects = spheres + [Plane(transform=Matrix.translation_transform(x=0,
+                                                                         y=-1,
+                                                                         z=0))]
+        plain = World(objects=objects, light_source=self._light_source)
+        accelerated = World(objects=objects,
+                            light_source=self._light_source,
+                            use_bvh=True)
+        origins = [(x * 0.5, 2, -6) for x in range(-6, 7)]
+        directions = [(0, -0.4, 0.9165151389911680) for _ in origins]
+        expected = plain.color_at_packet(origins=origins, directions=directions)
+        actual = accelerated.color_at_packet(origins=origins, directions=directions)
+        self.assertEqual(actual, expected)
+
+    def test_add_object_rebuilds_bvh(self):
+        w = World(objects=[self._s1], light_source=self._light_source,
+                  use_bvh=True)
+        s = Sphere(transform=Matrix.translation_transform(x=5, y=0, z=0))
+        w.add_object(s)
+        self.assertIn(s, w.objects)
+        r = Ray(origin=Point(x=5, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        self.assertEqual(w.intersect(ray=r).count, 2)
+
+    def test_refit_bvh(self):
+        w = World(objects=[self._s1], light_source=self._light_source,
+                  use_bvh=True)
+        self._s1.transform = Matrix.translation_transform(x=5, y=0, z=0)
+        w.refit_bvh()
+        r = Ray(origin=Point(x=5, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        self.assertEqual(w.intersect(ray=r).count, 2)
+
+    def test_is_occluded(self):
+        self.assertTrue(self._default_world.is_occluded(origin=(0, 0, -5),
+                                                        direction=(0, 0, 1),
+                                                        distance=10))
+        self.assertFalse(self._default_world.is_occluded(origin=(0, 0, -5),
+                                                         direction=(0, 0, 1),
+                                                         distance=3))
+        self.assertFalse(self._default_world.is_occluded(origin=(0, 0, -5),
+                                                         direction=(0, 0, -1),
+                                                         distance=10))
+
+    def test_no_shadow_from_object_that_does_not_cast_shadows(self):
+        p = Point(x=10, y=-10, z=10)
+        self._s1.casts_shadow = False
+        self._s2.casts_shadow = False
+        self.assertFalse(self._default_world.is_shadowed(position=p))
+        self.assertEqual(self._default_world.is_shadowed_packet(positions=[p]),
+                         [False])
+
+    def test_shadow_from_object_that_casts_shadows_with_bvh(self):
+        p = Point(x=10, y=-10, z=10)
+        self._default_world.build_bvh()
+        self.assertTrue(self._default_world.is_shadowed(position=p))
+        self._s1.casts_shadow = False
+        self.assertTrue(self._default_world.is_shadowed(position=p))
+
+    def test_lights(self):
+        second = PointLight(position=Point(x=10, y=10, z=-10))
+        w = World(objects=[self._s1], lights=[self._light_source, second])
+        self.assertEqual(w.lights, [self._light_source, second])
+        self.assertIs(w.light_source, self._light_source)
+        w.light_source = second
+        self.assertEqual(w.lights, [second])
+        w.add_light(self._light_source)
+        self.assertEqual(w.lights, [second, self._light_source])
+        with self.assertRaises(ValueError):
+            World(light_source=second, lights=[second])
+        with self.assertRaises(ValueError):
+            World(light_threshold=-1)
+
+    def test_multiple_lights_sum(self):
+        second = PointLight(position=Point(x=10, y=5, z=-10),
+                            intensity=Color(red=0.5, green=0.2, blue=0.1))
+        objects = [self._s1, self._s2]
+        both = World(objects=objects, lights=[self._light_source, second])
+        rays = [Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1)),
+                Ray(origin=Point(x=0.6, y=0.3, z=-5), direction=Vector(x=0, y=0, z=1))]
+        for r in rays:
+            expected = World(objects=objects, light_source=self._light_source).color_at(ray=r) + \
+                World(objects=objects, light_source=second).color_at(ray=r)
+            self.assertEqual(both.color_at(ray=r), expected)
+
+        colors = both.color_at_packet(
+            origins=[(r.origin.x, r.origin.y, r.origin.z) for r in rays],
+            directions=[(r.direction.x, r.direction.y, r.direction.z) for r in rays])
+        self.assertEqual(colors, [both.color_at(ray=r) for r in rays])
+
+    def test_no_lights_is_black(self):
+        w = World(objects=[self._s1])
+        r = Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        self.assertEqual(w.color_at(ray=r), Color(red=0, green=0, blue=0))
+
+    def test_light_out_of_range_is_culled(self):
+        far = PointLight(position=Point(x=-10, y=10, z=-10), range=5)
+        w = World(objects=[self._s1], lights=[self._light_source, far])
+        r = Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        calls = []
+        original = w.is_shadowed
+        w.is_shadowed = lambda position, light=None: calls.append(light) or \
+            original(position, light=light)
+        self.assertEqual(w.color_at(ray=r),
+                         World(objects=[self._s1],
+                               light_source=self._light_source).color_at(ray=r))
+        self.assertEqual(calls, [self._light_source])
+
+    def test_light_below_threshold_is_culled(self):
+        dim = PointLight(position=Point(x=10, y=10, z=-10),
+                         intensity=Color(red=0.01, green=0.01, blue=0.01))
+        w = World(objects=[self._s1], lights=[self._light_source, dim],
+                  light_threshold=0.05)
+        r = Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        self.assertEqual(w.color_at(ray=r),
+                         World(objects=[self._s1],
+                               light_source=self._light_source).color_at(ray=r))
+
+    def test_no_shadow_ray_for_light_behind_surface(self):
+        behind = PointLight(position=Point(x=0, y=0, z=10))
+        w = World(objects=[self._s1], light_source=behind)
+        r = Ray(origin=Point(x=0, y=0, z=-5), direction=Vector(x=0, y=0, z=1))
+        w.is_shadowed = lambda position, light=None: self.fail("shadow ray cast")
+        w.is_shadowed_packet = lambda positions, light=None: self.fail("shadow ray cast")
+        self.assertEqual(w.color_at(ray=r), Color(red=0.08, green=0.1, blue=0.06))
+        self.assertEqual(w.color_at_packet(origins=[(0, 0, -5)], directions=[(0, 0, 1)]),
+                         [Color(red=0.08, green=0.1, blue=0.06)])
+
 
 if __name__ == '__main__':
     unittest.main()
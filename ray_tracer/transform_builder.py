@@ -0,0 +1,221 @@
+import math
+
+from matrix import Matrix, Matrix4
+from util import Utilities
+
+
+class TransformBuilder:
+    """
+    Builds a transform out of elementary steps (translations, scalings,
+    rotations, and shears) along with its inverse.  The inverse of each kind of
+    step is known (e.g., translating by -x undoes translating by x), so the
+    inverse of the whole transform is composed from the inverses of its steps
+    in the opposite order, i.e., inverse(C * B * A) = inverse(A) * inverse(B) *
+    inverse(C), and no general matrix inversion is needed.  The transpose of
+    the inverse, which is used to transform normals, is computed once and
+    cached as well.
+
+    Steps are added in the order they are applied, exactly like the Matrix
+    methods with the same names, e.g.:
+
+        TransformBuilder().scale(x=0.5, y=0.5, z=0.5).translate(x=1, y=0, z=0)
+
+    scales and then translates, just like
+    Matrix.identity().scale(x=0.5, y=0.5, z=0.5).translate(x=1, y=0, z=0).
+
+    A builder can be assigned anywhere a transform matrix can (e.g., to a
+    shape's, pattern's, or camera's transform), in which case the composed
+    inverse and its transpose are used rather than being computed from the
+    transform.
+    """
+    def __init__(self):
+        # The transform and its inverse are kept as lists of their 16 values
+        # in row-major order.  Each elementary step only touches the rows (of
+        # the transform) or columns (of the inverse) that it changes, rather
+        # than multiplying whole matrices.
+        self._forward = [1.0, 0.0, 0.0, 0.0,
+                         0.0, 1.0, 0.0, 0.0,
+                         0.0, 0.0, 1.0, 0.0,
+                         0.0, 0.0, 0.0, 1.0]
+        self._inverse = list(self._forward)
+        self._is_identity = True
+        self._matrices = None
+
+    def _changed(self):
+        self._is_identity = False
+        self._matrices = None
+
+        return self
+
+    def _build(self):
+        if self._matrices is None:
+            inverse = Matrix4(values=self._inverse)
+            self._matrices = (Matrix4(values=self._forward), inverse, inverse.transpose())
+
+        return self._matrices
+
+    @property
+    def transform(self):
+        return self._build()[0]
+
+    @property
+    def inverse_transform(self):
+        return self._build()[1]
+
+    @property
+    def inverse_transform_transpose(self):
+        return self._build()[2]
+
+    def translate(self, x=0, y=0, z=0):
+        # The translation is applied after the transform so far, so it is
+        # multiplied on the left of the transform, adding x, y, and z times the
+        # bottom row to the top three rows.  Its inverse, translating by -x,
+        # -y, and -z, is multiplied on the right of the inverse, which only
+        # changes the last column.  Like the Matrix4 operations, the updates
+        # are written out rather than looped over.
+        forward = self._forward
+        b0, b1, b2, b3 = forward[12:]
+        forward[0:12] = [forward[0] + x * b0, forward[1] + x * b1,
+                         forward[2] + x * b2, forward[3] + x * b3,
+                         forward[4] + y * b0, forward[5] + y * b1,
+                         forward[6] + y * b2, forward[7] + y * b3,
+                         forward[8] + z * b0, forward[9] + z * b1,
+                         forward[10] + z * b2, forward[11] + z * b3]
+
+        inverse = self._inverse
+        inverse[3] -= inverse[0] * x + inverse[1] * y + inverse[2] * z
+        inverse[7] -= inverse[4] * x + inverse[5] * y + inverse[6] * z
+        inverse[11] -= inverse[8] * x + inverse[9] * y + inverse[10] * z
+        inverse[15] -= inverse[12] * x + inverse[13] * y + inverse[14] * z
+
+        return self._changed()
+
+    def scale(self, x=1, y=1, z=1):
+        if Utilities.equal(x, 0) or Utilities.equal(y, 0) or Utilities.equal(z, 0):
+            raise ArithmeticError("Matrix is not invertible")
+
+        # Scaling on the left scales the rows of the transform and scaling by
+        # the reciprocals on the right scales the columns of the inverse.
+        f = self._forward
+        f[0:12] = [f[0] * x, f[1] * x, f[2] * x, f[3] * x,
+                   f[4] * y, f[5] * y, f[6] * y, f[7] * y,
+                   f[8] * z, f[9] * z, f[10] * z, f[11] * z]
+
+        x = 1 / x
+        y = 1 / y
+        z = 1 / z
+        i = self._inverse
+        self._inverse = [i[0] * x, i[1] * y, i[2] * z, i[3],
+                         i[4] * x, i[5] * y, i[6] * z, i[7],
+                         i[8] * x, i[9] * y, i[10] * z, i[11],
+                         i[12] * x, i[13] * y, i[14] * z, i[15]]
+
+        return self._changed()
+
+    def _rotate(self, first, second, radians):
+        # A rotation mixes two of the axes, first and second, i.e., on the left
+        # of the transform it mixes two rows:
+        #
+        #   first row  = cos(r) * first row - sin(r) * second row
+        #   second row = sin(r) * first row + cos(r) * second row
+        #
+        # and its inverse (the rotation by -r) on the right of the inverse
+        # mixes the same two columns the same way.
+        cosine = math.cos(radians)
+        sine = math.sin(radians)
+
+        forward = self._forward
+        first_row = first * 4
+        second_row = second * 4
+        a0, a1, a2, a3 = forward[first_row:first_row + 4]
+        b0, b1, b2, b3 = forward[second_row:second_row + 4]
+        forward[first_row:first_row + 4] = [cosine * a0 - sine * b0,
+                                            cosine * a1 - sine * b1,
+                                            cosine * a2 - sine * b2,
+                                            cosine * a3 - sine * b3]
+        forward[second_row:second_row + 4] = [sine * a0 + cosine * b0,
+                                              sine * a1 + cosine * b1,
+                                              sine * a2 + cosine * b2,
+                                              sine * a3 + cosine * b3]
+
+        inverse = self._inverse
+        a0, a1, a2, a3 = inverse[first::4]
+        b0, b1, b2, b3 = inverse[second::4]
+        inverse[first::4] = [cosine * a0 - sine * b0,
+                             cosine * a1 - sine * b1,
+                             cosine * a2 - sine * b2,
+                             cosine * a3 - sine * b3]
+        inverse[second::4] = [sine * a0 + cosine * b0,
+                              sine * a1 + cosine * b1,
+                              sine * a2 + cosine * b2,
+                              sine * a3 + cosine * b3]
+
+        return self._changed()
+
+    def rotate_x(self, radians=0):
+        return self._rotate(first=1, second=2, radians=radians)
+
+    def rotate_y(self, radians=0):
+        # Rotating around y mixes z into x (rather than x into z), so the axes
+        # are in the opposite order from the other rotations.
+        return self._rotate(first=2, second=0, radians=radians)
+
+    def rotate_z(self, radians=0):
+        return self._rotate(first=0, second=1, radians=radians)
+
+    def shear(self,
+              x_moved_in_proportion_to_y=0,
+              x_moved_in_proportion_to_z=0,
+              y_moved_in_proportion_to_x=0,
+              y_moved_in_proportion_to_z=0,
+              z_moved_in_proportion_to_x=0,
+              z_moved_in_proportion_to_y=0):
+        matrix = Matrix.shearing_transform(
+            x_moved_in_proportion_to_y=x_moved_in_proportion_to_y,
+            x_moved_in_proportion_to_z=x_moved_in_proportion_to_z,
+            y_moved_in_proportion_to_x=y_moved_in_proportion_to_x,
+            y_moved_in_proportion_to_z=y_moved_in_proportion_to_z,
+            z_moved_in_proportion_to_x=z_moved_in_proportion_to_x,
+            z_moved_in_proportion_to_y=z_moved_in_proportion_to_y)
+
+        # The inverse of a shear is not a shear, but a shear is affine, so its
+        # inverse only takes inverting its 3x3 linear part.
+        return self._multiply(matrix=matrix, inverse=matrix.inverse())
+
+    def matrix(self, matrix, inverse=None):
+        """
+        Add an arbitrary transform as a step.
+
+        :param matrix: Matrix, the 4x4 transform
+        :param inverse: Matrix, the inverse of the transform, if it is already
+            known.  Otherwise it is computed from the transform.
+        :return: TransformBuilder, this builder
+        """
+        if matrix.rows != 4 or matrix.columns != 4:
+            raise ValueError("A transform must be a 4x4 matrix")
+
+        if not isinstance(matrix, Matrix4):
+            matrix = Matrix4(values=matrix.values)
+        if inverse is None:
+            inverse = matrix.inverse()
+
+        return self._multiply(matrix=matrix, inverse=inverse)
+
+    def _multiply(self, matrix, inverse):
+        if not isinstance(inverse, Matrix4):
+            inverse = Matrix4(values=inverse.values)
+
+        if self._is_identity:
+            # There is nothing to compose the step with, so the step's own
+            # matrices are the transform and its inverse, as they are.
+            self._forward = list(matrix.values)
+            self._inverse = list(inverse.values)
+            self._changed()
+            self._matrices = (matrix, inverse, inverse.transpose())
+
+            return self
+
+        self._forward = list((matrix * Matrix4(values=self._forward)).values)
+        self._inverse = list((Matrix4(values=self._inverse) * inverse).values)
+
+        return self._changed()
@@ -0,0 +1,150 @@
+from matrix import Matrix
+from transform_builder import TransformBuilder
+from util import Utilities
+
+
+def _check_affine(matrix):
+    # The inverse of an affine transform is affine as well, so checking the
+    # transform is enough.  The bottom row of a transform built from the
+    # transform factories is exactly (0, 0, 0, 1), so the comparison within
+    # epsilon is only needed when the exact comparison fails.
+    values = matrix.values
+    if len(values) != 16:
+        raise ValueError("A transform must be an affine 4x4 matrix")
+    bottom_row = values[12:]
+    if bottom_row != (0.0, 0.0, 0.0, 1.0) and \
+            not all(Utilities.equal(value, expected)
+                    for value, expected in zip(bottom_row, (0, 0, 0, 1))):
+        raise ValueError("A transform must be an affine 4x4 matrix")
+
+
+class Transformable:
+    """
+    A base class for objects (shapes, patterns, cameras) that have a transform
+    and repeatedly need its inverse and the transpose of its inverse.  The
+    derived values are computed when the transform is assigned and cached, so
+    that they are not recomputed for every ray.
+
+    The cache is also invalidated if the transform matrix is changed in place
+    (e.g., with Matrix.set_item), which is detected using the matrix's version.
+
+    A TransformBuilder can be assigned as the transform, in which case the
+    inverse it composed from the inverses of its steps is used instead of
+    inverting the transform.
+
+    Transforms must be affine, i.e., their bottom row must be (0, 0, 0, 1).
+    The inner loops that transform rays only apply the top three rows of the
+    inverse, so a projective transform would be silently applied incorrectly
+    and is rejected with a ValueError instead.
+    """
+    @property
+    def transform(self):
+        return self._transform
+
+    @transform.setter
+    def transform(self, value):
+        # The transform is checked (by _update_transform_cache) before
+        # anything is changed, so that a rejected transform leaves the object
+        # as it was.
+        if isinstance(value, TransformBuilder):
+            self._update_transform_cache(
+                inverse_transform=value.inverse_transform,
+                inverse_transform_transpose=value.inverse_transform_transpose,
+                transform=value.transform)
+        elif value:
+            self._update_transform_cache(transform=value)
+        else:
+            # The identity transform is affine and is its own inverse, so
+            # there is nothing to check or invert.
+            self._set_transform_cache(transform=Matrix.identity(),
+                                      inverse_transform=Matrix.identity())
+
+    @property
+    def inverse_transform(self):
+        if self._transform_version != self._transform.version:
+            self._update_transform_cache()
+
+        return self._inverse_transform
+
+    @property
+    def inverse_transform_transpose(self):
+        if self._transform_version != self._transform.version:
+            self._update_transform_cache()
+        if self._inverse_transform_transpose is None:
+            self._inverse_transform_transpose = self._inverse_transform.transpose()
+
+        return self._inverse_transform_transpose
+
+    @property
+    def inverse_transform_values(self):
+        # The top three rows of the inverse transform, as a flat tuple of 12
+        # values in row-major order, for inner loops that transform raw (x, y,
+        # z) components.  The bottom row of an affine transform is always
+        # (0, 0, 0, 1), and only affine transforms are accepted, so it is not
+        # needed.
+        if self._transform_version != self._transform.version:
+            self._update_transform_cache()
+
+        return self._inverse_transform_values
+
+    def prepare(self):
+        """
+        Bring the cached values derived from the transform up to date if the
+        transform was changed in place, so that reading them afterwards never
+        changes the object (e.g., while several threads are rendering it).
+        """
+        if self._transform_version != self._transform.version:
+            self._update_transform_cache()
+        if self._inverse_transform_transpose is None:
+            self._inverse_transform_transpose = self._inverse_transform.transpose()
+
+    def _update_transform_cache(self, inverse_transform=None,
+                                inverse_transform_transpose=None,
+                                transform=None):
+        """
+        Check the transform and recompute the values derived from it.
+
+        :param inverse_transform: Matrix, the inverse of the transform, if it
+            is already known.  Otherwise it is computed.
+        :param inverse_transform_transpose: Matrix, the transpose of the
+            inverse, if it is already known.  Otherwise it is computed.
+        :param transform: Matrix, a new transform to replace the current one,
+            or None to recompute the values for the current transform (e.g.,
+            after it was changed in place).  The new transform only replaces
+            the current one once it has been checked and inverted.
+        """
+        if transform is None:
+            transform = self._transform
+        _check_affine(matrix=transform)
+        if inverse_transform is None:
+            inverse_transform = transform.inverse()
+        if inverse_transform_transpose is None:
+            inverse_transform_transpose = inverse_transform.transpose()
+
+        self._set_transform_cache(
+            transform=transform,
+            inverse_transform=inverse_transform,
+            inverse_transform_transpose=inverse_transform_transpose)
+
+    def _set_transform_cache(self, transform, inverse_transform,
+                             inverse_transform_transpose=None):
+        """
+        Replace the transform and the values derived from it without checking
+        the transform or computing its inverse.  This is the trusted path for
+        transforms that are known to be affine and whose inverse is already
+        known, e.g., those read back from a compiled scene, which were checked
+        when the scene was compiled.  Derived classes that cache additional
+        values derived from the transform should override this method and call
+        the base class method, passing the arguments on.
+
+        :param transform: Matrix4, the new transform
+        :param inverse_transform: Matrix4, the inverse of the new transform
+        :param inverse_transform_transpose: Matrix4, the transpose of the
+            inverse, if it is already known.  Otherwise it is computed when it
+            is first needed.
+        """
+        self._transform = transform
+        self._inverse_transform = inverse_transform
+        self._inverse_transform_transpose = inverse_transform_transpose
+        self._inverse_transform_values = inverse_transform.values[:12]
+        self._transform_version = transform.version
@@ -4,55 +4,40 @@ from util import Utilities
 
 
 class Tuple:
-    def __init__(self, x=0.0, y=0.0, z=0.0, w=0.0):
-        self._x = float(x)
-        self._y = float(y)
-        self._z = float(z)
-        self._w = float(w)
-
-    @property
-    def x(self):
-        return self._x
-
-    @x.setter
-    def x(self, value):
-        self._x = value
-
-    @property
-    def y(self):
-        return self._y
-
-    @y.setter
-    def y(self, value):
-        self._y = value
+    # Millions of tuples are created while rendering, so the components are
+    # stored in slots, rather than a per-instance dictionary, and are plain
+    # attributes rather than properties.
+    __slots__ = ('x', 'y', 'z', 'w')
 
-    @property
-    def z(self):
-        return self._z
-
-    @z.setter
-    def z(self, value):
-        self._z = value
-
-    @property
-    def w(self):
-        return self._w
-
-    @w.setter
-    def w(self, value):
-        self._w = value
+    def __init__(self, x=0.0, y=0.0, z=0.0, w=0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+        self.w = float(w)
+
+    @staticmethod
+    def _make(x, y, z, w):
+        # Create a tuple from components that are already floats without going
+        # through __init__.  Only used by the unchecked methods below.
+        result = Tuple.__new__(Tuple)
+        result.x = x
+        result.y = y
+        result.z = z
+        result.w = w
+
+        return result
 
     def is_point(self):
-        return Utilities.equal(self._w, 1.0)
+        return abs(self.w - 1.0) < Utilities.EPSILON
 
     def is_vector(self):
-        return Utilities.equal(self._w, 0.0)
+        return abs(self.w) < Utilities.EPSILON
 
     def __eq__(self, other):
-        return Utilities.equal(self._x, other.x) and \
-               Utilities.equal(self._y, other.y) and \
-               Utilities.equal(self._z, other.z) and \
-               Utilities.equal(self._w, other.w)
+        return Utilities.equal(self.x, other.x) and \
+               Utilities.equal(self.y, other.y) and \
+               Utilities.equal(self.z, other.z) and \
+               Utilities.equal(self.w, other.w)
 
     def __ne__(self, other):
         return not self == other
@@ -62,38 +47,38 @@ class Tuple:
         if self.is_point() and other.is_point():
             raise TypeError("Cannot add two points")
 
-        return Tuple(self._x + other.x,
-                     self._y + other.y,
-                     self._z + other.z,
-                     self._w + other.w)
+        return Tuple(self.x + other.x,
+                     self.y + other.y,
+                     self.z + other.z,
+                     self.w + other.w)
 
     def __sub__(self, other):
         # It does not make sense to subtract a point from a vector
         if self.is_vector() and other.is_point():
             raise TypeError("Cannot subtract a point from a vector")
 
-        return Tuple(self._x - other.x,
-                     self._y - other.y,
-                     self._z - other.z,
-                     self._w - other.w)
+        return Tuple(self.x - other.x,
+                     self.y - other.y,
+                     self.z - other.z,
+                     self.w - other.w)
 
     def __neg__(self):
-        return Tuple(-self._x, -self._y, -self._z, -self._w)
+        return Tuple(-self.x, -self.y, -self.z, -self.w)
 
     def __mul__(self, scalar):
-        return Tuple(self._x * scalar,
-                     self._y * scalar,
-                     self._z * scalar,
-                     self._w * scalar)
+        return Tuple(self.x * scalar,
+                     self.y * scalar,
+                     self.z * scalar,
+                     self.w * scalar)
 
     def __truediv__(self, scalar):
-        return Tuple(self._x / scalar,
-                     self._y / scalar,
-                     self._z / scalar,
-                     self._w / scalar)
+        return Tuple(self.x / scalar,
+                     self.y / scalar,
+                     self.z / scalar,
+                     self.w / scalar)
 
     def __str__(self):
-        return "x={}, y={}, z={}, w={}".format(self._x, self._y, self._z, self._w)
+        return "x={}, y={}, z={}, w={}".format(self.x, self.y, self.z, self.w)
 
     def magnitude(self):
         if not self.is_vector():
@@ -114,14 +99,14 @@ class Tuple:
     def dot_product(self, rhs):
         if not self.is_vector() or not rhs.is_vector():
             raise NotImplementedError("Dot product requires two vectors")
-        return (self._x * rhs._x) + (self._y * rhs._y) + (self._z * rhs._z)
+        return (self.x * rhs.x) + (self.y * rhs.y) + (self.z * rhs.z)
 
     def cross_product(self, rhs):
         if not self.is_vector() or not rhs.is_vector():
             raise NotImplementedError("Cross product requires two vectors")
-        return Tuple(x=self._y * rhs._z - self._z * rhs._y,
-                     y=self._z * rhs._x - self._x * rhs._z,
-                     z=self._x * rhs._y - self._y * rhs._x,
+        return Tuple(x=self.y * rhs.z - self.z * rhs.y,
+                     y=self.z * rhs.x - self.x * rhs.z,
+                     z=self.x * rhs.y - self.y * rhs.x,
                      w=0.0)
 
     def reflect(self, normal):
@@ -129,3 +114,46 @@ class Tuple:
             raise NotImplementedError("Only vectors can be reflected")
 
         return self - normal * 2 * self.dot_product(normal)
+
+    # The following methods compute exactly the same results as the operators
+    # and methods above, but skip the point/vector checks and the conversion
+    # of components to floats.  They are meant for the renderer's inner loops,
+    # where the operands are known to be valid.
+
+    def add_unchecked(self, other):
+        return Tuple._make(self.x + other.x,
+                           self.y + other.y,
+                           self.z + other.z,
+                           self.w + other.w)
+
+    def subtract_unchecked(self, other):
+        return Tuple._make(self.x - other.x,
+                           self.y - other.y,
+                           self.z - other.z,
+                           self.w - other.w)
+
+    def negate_unchecked(self):
+        return Tuple._make(-self.x, -self.y, -self.z, -self.w)
+
+    def multiply_unchecked(self, scalar):
+        return Tuple._make(self.x * scalar,
+                           self.y * scalar,
+                           self.z * scalar,
+                           self.w * scalar)
+
+    def dot_product_unchecked(self, rhs):
+        return (self.x * rhs.x) + (self.y * rhs.y) + (self.z * rhs.z)
+
+    def normalize_unchecked(self):
+        magnitude = math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+        return Tuple._make(self.x / magnitude,
+                           self.y / magnitude,
+                           self.z / magnitude,
+                           0.0)
+
+    def reflect_unchecked(self, normal):
+        dot_product = self.dot_product_unchecked(normal)
+        return Tuple._make(self.x - normal.x * 2 * dot_product,
+                           self.y - normal.y * 2 * dot_product,
+                           self.z - normal.z * 2 * dot_product,
+                           self.w - normal.w * 2 * dot_product)
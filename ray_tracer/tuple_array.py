@@ -0,0 +1,135 @@
+from array import array
+
+from tuple import Tuple
+from util import Utilities
+
+
+class TupleArray:
+    """
+    A sequence of tuples (points and/or vectors) stored as a structure of
+    arrays: one flat array of doubles for each of the x, y, z, and w
+    components.  A large batch of tuples (e.g., the origins or directions of
+    a packet of rays) takes a fraction of the memory of the same number of
+    Tuple objects, and whole batches can be transformed at once with
+    Matrix.transform_array (or by multiplying a matrix by the array) without
+    creating an object per tuple.
+
+    Indexing or iterating over the array creates Tuple objects for the
+    elements as they are needed.  Slicing the array creates a new TupleArray
+    holding copies of the selected tuples.
+    """
+    def __init__(self, x=None, y=None, z=None, w=None):
+        """
+        Initialize a TupleArray object from the components of its tuples.
+
+        :param x: A sequence of the x components of the tuples
+        :param y: A sequence of the y components of the tuples
+        :param z: A sequence of the z components of the tuples
+        :param w: A sequence of the w components of the tuples
+        """
+        self._x = array('d', x if x is not None else ())
+        self._y = array('d', y if y is not None else ())
+        self._z = array('d', z if z is not None else ())
+        self._w = array('d', w if w is not None else ())
+
+        if not len(self._x) == len(self._y) == len(self._z) == len(self._w):
+            raise ValueError("Every component must have the same number of values")
+
+    @staticmethod
+    def from_tuples(tuples):
+        """
+        Create a TupleArray object holding copies of a number of tuples.
+
+        :param tuples: A sequence of Tuple objects (e.g., points and vectors)
+        :return: TupleArray, the tuples in the same order
+        """
+        return TupleArray(x=[value.x for value in tuples],
+                          y=[value.y for value in tuples],
+                          z=[value.z for value in tuples],
+                          w=[value.w for value in tuples])
+
+    @staticmethod
+    def points(components):
+        """
+        Create a TupleArray object of points from their raw components, e.g.,
+        the origins of a packet of rays.
+
+        :param components: A sequence of (x, y, z) tuples
+        :return: TupleArray, the points in the same order
+        """
+        return TupleArray(x=[x for x, _, _ in components],
+                          y=[y for _, y, _ in components],
+                          z=[z for _, _, z in components],
+                          w=array('d', [1.0]) * len(components))
+
+    @staticmethod
+    def vectors(components):
+        """
+        Create a TupleArray object of vectors from their raw components, e.g.,
+        the directions of a packet of rays.
+
+        :param components: A sequence of (x, y, z) tuples
+        :return: TupleArray, the vectors in the same order
+        """
+        return TupleArray(x=[x for x, _, _ in components],
+                          y=[y for _, y, _ in components],
+                          z=[z for _, _, z in components],
+                          w=array('d', [0.0]) * len(components))
+
+    # The components are exposed as the arrays themselves so that batch
+    # operations can work on them directly.  Changing an element of one of
+    # them changes the corresponding tuple.
+
+    @property
+    def x(self):
+        return self._x
+
+    @property
+    def y(self):
+        return self._y
+
+    @property
+    def z(self):
+        return self._z
+
+    @property
+    def w(self):
+        return self._w
+
+    def __len__(self):
+        return len(self._x)
+
+    def __getitem__(self, index):
+        # A slice selects a sub-array, like slicing a list, and an integer
+        # selects a single tuple.  Anything else is rejected by the arrays with
+        # a TypeError.
+        if isinstance(index, slice):
+            return TupleArray(x=self._x[index], y=self._y[index],
+                              z=self._z[index], w=self._w[index])
+
+        return Tuple._make(self._x[index], self._y[index], self._z[index], self._w[index])
+
+    def __iter__(self):
+        for x, y, z, w in zip(self._x, self._y, self._z, self._w):
+            yield Tuple._make(x, y, z, w)
+
+    def __eq__(self, other):
+        if not isinstance(other, TupleArray) or len(self) != len(other):
+            return False
+
+        return all(Utilities.equal(value, other_value)
+                   for components, other_components in ((self._x, other._x),
+                                                        (self._y, other._y),
+                                                        (self._z, other._z),
+                                                        (self._w, other._w))
+                   for value, other_value in zip(components, other_components))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def components(self):
+        """
+        :return: A list of the (x, y, z) components of every tuple, the form
+            that packets of rays use
+        """
+        return list(zip(self._x, self._y, self._z))
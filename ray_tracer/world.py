@@ -1,31 +1,215 @@
+import itertools
+import math
+
+from bvh import BoundingVolumeHierarchy
 from color import Color
 from intersections import Computations, Intersections
-from ray import Ray
 
 
 class World:
-    def __init__(self, objects=None, light_source=None):
+    def __init__(self, objects=None, light_source=None, use_bvh=False,
+                 lights=None, light_threshold=0.0):
+        """
+        Initialize a World object.
+
+        :param objects: The list of shapes in the world
+        :param light_source: The light source for the world, for worlds with a
+            single light.  Cannot be combined with lights.
+        :param use_bvh: If True, build a bounding volume hierarchy over the
+            objects so that rays are only tested against the objects they
+            might intersect.
+        :param lights: The list of light sources for the world.  Cannot be
+            combined with light_source.
+        :param light_threshold: Float, lights that contribute no more than this
+            to any color component of a point being shaded are ignored for
+            that point, i.e., neither their shadow rays are cast nor their
+            lighting computed.
+        """
+        if light_source is not None and lights is not None:
+            raise ValueError("Provide either a light source or a list of "
+                             "lights, not both")
+
         self._objects = objects if objects else []
-        self._light_source = light_source
+        self._lights = list(lights) if lights else []
+        if light_source is not None:
+            self._lights.append(light_source)
+        self.light_threshold = light_threshold
+        self._bvh = None
+        self._bvh_leaf_size = 2
+        self._unbounded_objects = []
+
+        if use_bvh:
+            self.build_bvh()
 
     @property
     def objects(self):
         return self._objects
 
+    @property
+    def lights(self):
+        return self._lights
+
     @property
     def light_source(self):
-        return self._light_source
+        # For worlds with a single light, which is the first (and only) light
+        # in the list of lights.
+        return self._lights[0] if self._lights else None
 
     @light_source.setter
     def light_source(self, value):
-        self._light_source = value
+        self._lights = [value] if value is not None else []
+
+    @property
+    def light_threshold(self):
+        return self._light_threshold
+
+    @light_threshold.setter
+    def light_threshold(self, value):
+        if value < 0:
+            raise ValueError("Light threshold must not be negative")
+
+        self._light_threshold = value
+
+    def add_light(self, light):
+        """
+        Add a light source to the world.
+
+        :param light: The light source to add
+        """
+        self._lights.append(light)
+
+    def _lights_for(self, position, normal):
+        # Generate the lights that need to be considered when shading a point,
+        # along with whether the point faces the light.  A light whose
+        # contribution at the point is negligible is skipped entirely.  When
+        # the point faces away from a light, only the light's ambient
+        # contribution matters, which does not depend on whether the point is
+        # in a shadow, so no shadow ray needs to be cast.  This computes the
+        # light vector exactly as Material.lighting does so that the two
+        # always agree on which side of the surface the light is on.
+        for light in self._lights:
+            if self._light_threshold and \
+                    light.contribution(position=position) <= self._light_threshold:
+                continue
+            if light.range is not None and light.attenuation(position=position) == 0:
+                continue
+
+            light_vector = \
+                light.position.subtract_unchecked(position).normalize_unchecked()
+            yield light, light_vector.dot_product_unchecked(normal) >= 0
+
+    @property
+    def bvh(self):
+        return self._bvh
+
+    def add_object(self, the_object):
+        """
+        Add an object to the world.  If the world is using a bounding volume
+        hierarchy, it is rebuilt to include the new object.
+
+        :param the_object: The shape to add to the world
+        """
+        self._objects.append(the_object)
+
+        if self._bvh is not None:
+            self.build_bvh(leaf_size=self._bvh_leaf_size)
+
+    def build_bvh(self, leaf_size=2):
+        """
+        Build (or rebuild) the bounding volume hierarchy over the objects in the
+        world.  Objects with infinite bounds, like planes, cannot be usefully
+        placed in the hierarchy and are kept in a separate list that every ray
+        is tested against.  This must be called again if objects are added to
+        or removed from the objects list directly.
+
+        :param leaf_size: The maximum number of objects in a leaf of the
+            hierarchy
+        """
+        bounded_objects = []
+        self._unbounded_objects = []
+        for the_object in self._objects:
+            if the_object.world_bounds().is_infinite:
+                self._unbounded_objects.append(the_object)
+            else:
+                bounded_objects.append(the_object)
+
+        self._bvh = BoundingVolumeHierarchy(shapes=bounded_objects,
+                                            leaf_size=leaf_size)
+        self._bvh_leaf_size = leaf_size
+
+    def refit_bvh(self):
+        """
+        Update the bounding volume hierarchy after objects' transforms have
+        changed.  This keeps the structure of the hierarchy and only recomputes
+        the bounds, so it is much cheaper than rebuilding.  Does nothing if the
+        world is not using a bounding volume hierarchy.
+        """
+        if self._bvh is not None:
+            self._bvh.refit()
+
+    def clear_bvh(self):
+        """
+        Stop using a bounding volume hierarchy, i.e., go back to testing every
+        ray against every object.
+        """
+        self._bvh = None
+        self._unbounded_objects = []
+
+    def prepare(self):
+        """
+        Bring every cached value that rendering reads up to date, i.e., the
+        values derived from the transforms of the objects and of their
+        materials' patterns.  After this, rendering only reads the world and
+        never changes it, so several threads can render it at once.  The
+        bounding volume hierarchy is not refit; that is still up to whoever
+        moves the objects.
+        """
+        for the_object in self._objects:
+            the_object.prepare()
+            if the_object.material.pattern is not None:
+                the_object.material.pattern.prepare()
+
+    def _objects_along(self, origin, direction, minimum_time=-math.inf,
+                       maximum_time=math.inf):
+        # Without a bounding volume hierarchy every object has to be tested.
+        # With one, only the unbounded objects and the objects whose bounds
+        # the ray passes through have to be tested.
+        if self._bvh is None:
+            return self._objects
+
+        return itertools.chain(self._unbounded_objects,
+                               self._bvh.candidates(origin=origin,
+                                                    direction=direction,
+                                                    minimum_time=minimum_time,
+                                                    maximum_time=maximum_time))
+
+    def _packet_objects(self, origins, directions, minimum_time=-math.inf,
+                        maximum_times=None):
+        # The packet equivalent of _objects_along.  Generates each object that
+        # needs to be tested along with the indices of the rays in the packet
+        # that need to be tested against it.
+        every_ray = range(len(origins))
+        if self._bvh is None:
+            for the_object in self._objects:
+                yield the_object, every_ray
+            return
+
+        for the_object in self._unbounded_objects:
+            yield the_object, every_ray
+
+        yield from self._bvh.packet_candidates(origins=origins,
+                                               directions=directions,
+                                               minimum_time=minimum_time,
+                                               maximum_times=maximum_times)
 
     def intersect(self, ray):
         total_intersections = []
 
-        # Walk through all of the objects in the world and find the
-        # intersections
-        for the_object in self._objects:
+        # Walk through all of the objects in the world (that the ray might
+        # intersect) and find the intersections
+        origin = (ray.origin.x, ray.origin.y, ray.origin.z)
+        direction = (ray.direction.x, ray.direction.y, ray.direction.z)
+        for the_object in self._objects_along(origin=origin, direction=direction):
             intersections = the_object.intersect(ray=ray)
             for index in range(intersections.count):
                 total_intersections.append(intersections[index])
@@ -36,59 +220,373 @@ class World:
         return Intersections(*total_intersections)
 
     def shade_hit(self, computations=Computations()):
-        # Determine if the point is shadowed.  To prevent a point on the object
-        # from being shadowed by its own point (because of inaccuracies in
-        # floating point arithmetic), use the point that is just sightly over
-        # the point to prevent false positives.
-        is_shadowed = self.is_shadowed(computations.over_position)
-
-        return computations.shape.material.lighting(shape=computations.shape,
-                                                    light=self._light_source,
-                                                    position=computations.position,
-                                                    eye=computations.eye,
-                                                    normal=computations.normal,
-                                                    in_shadow=is_shadowed)
+        # The color is the sum of the contributions of each of the lights.
+        color = None
+        for light, faces_light in self._lights_for(position=computations.position,
+                                                   normal=computations.normal):
+            # Determine if the point is shadowed.  To prevent a point on the
+            # object from being shadowed by its own point (because of
+            # inaccuracies in floating point arithmetic), use the point that is
+            # just sightly over the point to prevent false positives.
+            is_shadowed = not faces_light or \
+                self.is_shadowed(computations.over_position, light=light)
 
-    def color_at(self, ray):
-        # Determine the intersections for the ray and the objects in the world
-        intersections = self.intersect(ray=ray)
+            contribution = computations.shape.material.lighting(
+                shape=computations.shape,
+                light=light,
+                position=computations.position,
+                eye=computations.eye,
+                normal=computations.normal,
+                in_shadow=is_shadowed)
+            color = contribution if color is None else color + contribution
+
+        return color if color is not None else Color(red=0, green=0, blue=0)
+
+    def nearest_hit(self, origin, direction):
+        """
+        Determine the hit, i.e., the nearest non-negative intersection, for a
+        ray.  This is the same hit that intersect followed by
+        Intersections.hit finds, but the objects are tested against the
+        nearest time found so far instead of collecting and sorting every
+        intersection, and with a bounding volume hierarchy, objects whose
+        boxes the ray only enters beyond that time are not tested at all.
+
+        :param origin: The (x, y, z) origin of the ray
+        :param direction: The (x, y, z) direction of the ray
+        :return: A (time, shape) tuple for the hit, or None if the ray does not
+            hit anything
+        """
+        nearest = None
+        maximum_time = math.inf
+
+        # The unbounded objects come first, as they do in intersect, so that
+        # ties go to the same object.  Their hit also lets the hierarchy skip
+        # everything behind it.
+        for the_object in self._objects if self._bvh is None else self._unbounded_objects:
+            time = the_object.hit_time(origin=origin,
+                                       direction=direction,
+                                       maximum_time=maximum_time)
+            if time is not None:
+                nearest = (time, the_object)
+                maximum_time = time
 
-        # If there is not a hit (either all misses or an intersection would
-        # be behind the ray), then return black color
-        intersection = intersections.hit()
-        if not intersection:
+        if self._bvh is not None:
+            hit = self._bvh.nearest_hit(origin=origin,
+                                        direction=direction,
+                                        maximum_time=maximum_time)
+            if hit is not None:
+                nearest = hit
+
+        return nearest
+
+    def color_at(self, ray):
+        # Determine the hit for the ray.  If there is not one (either all
+        # misses or an intersection would be behind the ray), then return
+        # black color
+        origin = (ray.origin.x, ray.origin.y, ray.origin.z)
+        direction = (ray.direction.x, ray.direction.y, ray.direction.z)
+        hit = self.nearest_hit(origin=origin, direction=direction)
+        if hit is None:
             return Color(red=0, green=0, blue=0)
 
         # Otherwise, prepare the computations for the ray and return the color
-        computations = intersection.prepare_computations(ray=ray)
+        time, shape = hit
+        computations = Computations.for_hit(time=time,
+                                            shape=shape,
+                                            origin=origin,
+                                            direction=direction)
         color = self.shade_hit(computations=computations)
 
         return color
 
-    def is_shadowed(self, position):
+    def is_shadowed(self, position, light=None):
         """
         Determine if the point defined by position is in the shadow of an object
         in the world, i.e., the ray from the point to the light source
         intersects an object in the world before reaching the light source.
 
         :param position: The point to test for being in a shadow
+        :param light: The light source to test against.  If None, the world's
+            (first) light source.
 
         :return: Boolean, True if the point is in a shadow, False otherwise
         """
+        if light is None:
+            light = self.light_source
+
         # Create a vector from the point to the light source and determine the
         # distance to light source
-        vector = self._light_source.position - position
+        vector = light.position - position
         distance = vector.magnitude()
 
         # Normalize the vector and then determine if it intersects any objects
+        # between the point and the light source.
         direction = vector.normalize()
-        ray = Ray(origin=position, direction=direction)
-        intersections = self.intersect(ray=ray)
-
-        # Get the first hit from the intersections and see if the distance from
-        # the point to the first hit is less than the distance from the point to
-        # the light source.  Because we ensure that hit returns the first non-
-        # negative hit, we don't have to worry about a hit that is behind the
-        # light source.  If so, then the point is in the shadow.
-        hit = intersections.hit()
-        return hit and hit.time < distance
+        return self.is_occluded(origin=(position.x, position.y, position.z),
+                                direction=(direction.x, direction.y, direction.z),
+                                distance=distance)
+
+    def is_occluded(self, origin, direction, distance):
+        """
+        Determine if any object that casts shadows intersects a ray between its
+        origin and a distance along it.  Unlike intersect, this stops at the
+        first such intersection found instead of collecting and sorting every
+        intersection.
+
+        :param origin: The (x, y, z) origin of the ray
+        :param direction: The (x, y, z) normalized direction of the ray
+        :param distance: The distance along the ray beyond which intersections
+            are ignored
+
+        :return: Boolean, True if the ray is blocked before reaching the
+            distance, False otherwise
+        """
+        # We only need to know if there is any non-negative intersection that
+        # is closer than the distance.  It doesn't matter which object it is
+        # or if it is the nearest one, so the first one found settles it.
+        for the_object in self._objects_along(origin=origin,
+                                              direction=direction,
+                                              minimum_time=0,
+                                              maximum_time=distance):
+            if not the_object.casts_shadow:
+                continue
+
+            times = the_object.intersect_packet(origins=(origin,),
+                                                directions=(direction,))[0]
+            for time in times:
+                if 0 <= time < distance:
+                    return True
+
+        return False
+
+    def hit_packet(self, origins, directions, observer=None):
+        """
+        Determine the hit, i.e., the nearest non-negative intersection, for
+        every ray in a packet of rays.
+
+        :param origins: A sequence of (x, y, z) tuples, the origins of the rays
+            in the packet.
+        :param directions: A sequence of (x, y, z) tuples, the directions of
+            the rays in the packet.
+        :param observer: PacketObserver, if not None, told about the packet
+        :return: A list, parallel to origins and directions, where each entry
+            is either a (time, shape) tuple for the hit or None if the ray does
+            not hit anything.
+        """
+        if observer is not None:
+            observer.hit_packet_started(origins=origins, directions=directions)
+
+        hits = [None] * len(origins)
+
+        # Intersect the whole packet with each object in turn and keep the
+        # nearest non-negative time for each ray.  Ties go to the object that
+        # was intersected first, which is the same hit that sorting all of the
+        # intersections and calling Intersections.hit() picks.
+        for the_object, indices in self._packet_objects(origins=origins,
+                                                        directions=directions,
+                                                        minimum_time=0):
+            if len(indices) == len(origins):
+                packet_times = the_object.intersect_packet(origins=origins,
+                                                           directions=directions)
+            else:
+                packet_times = the_object.intersect_packet(
+                    origins=[origins[index] for index in indices],
+                    directions=[directions[index] for index in indices])
+
+            for index, times in zip(indices, packet_times):
+                for time in times:
+                    if time >= 0 and (hits[index] is None or time < hits[index][0]):
+                        hits[index] = (time, the_object)
+
+        if observer is not None:
+            observer.hit_packet_finished(origins=origins,
+                                         directions=directions,
+                                         hits=hits)
+
+        return hits
+
+    def is_shadowed_packet(self, positions, light=None, observer=None):
+        """
+        Determine, for each of a packet of points, if the point is in the
+        shadow of an object in the world.
+
+        :param positions: A sequence of points to test for being in a shadow
+        :param light: The light source to test against.  If None, the world's
+            (first) light source.
+        :param observer: PacketObserver, if not None, told about the packet
+
+        :return: A list of Booleans, parallel to positions, with True for each
+            point that is in a shadow and False otherwise
+        """
+        if light is None:
+            light = self.light_source
+
+        if observer is not None:
+            observer.shadow_packet_started(positions=positions, light=light)
+
+        light_x = light.position.x
+        light_y = light.position.y
+        light_z = light.position.z
+
+        # Build the packet of shadow rays from each point toward the light
+        # source, remembering the distance to the light source for each
+        origins = []
+        directions = []
+        distances = []
+        for position in positions:
+            vector_x = light_x - position.x
+            vector_y = light_y - position.y
+            vector_z = light_z - position.z
+            distance = math.sqrt(vector_x * vector_x +
+                                 vector_y * vector_y +
+                                 vector_z * vector_z)
+
+            origins.append((position.x, position.y, position.z))
+            directions.append((vector_x / distance,
+                               vector_y / distance,
+                               vector_z / distance))
+            distances.append(distance)
+
+        # A point is in the shadow if any object is intersected between the
+        # point and the light source.  Once a ray is known to be blocked, there
+        # is no reason to test it against the remaining objects.
+        shadowed = [False] * len(origins)
+        for the_object, indices in self._packet_objects(origins=origins,
+                                                        directions=directions,
+                                                        minimum_time=0,
+                                                        maximum_times=distances):
+            if not the_object.casts_shadow:
+                continue
+
+            pending = [index for index in indices if not shadowed[index]]
+            if not pending:
+                continue
+
+            packet_times = the_object.intersect_packet(
+                origins=[origins[index] for index in pending],
+                directions=[directions[index] for index in pending])
+            for index, times in zip(pending, packet_times):
+                if any(0 <= time < distances[index] for time in times):
+                    shadowed[index] = True
+
+        if observer is not None:
+            observer.shadow_packet_finished(positions=positions,
+                                            light=light,
+                                            shadowed=shadowed)
+
+        return shadowed
+
+    def color_at_packet(self, origins, directions, observer=None):
+        """
+        Determine the color for every ray in a packet of rays.  The result for
+        each ray is the same as calling color_at for that ray, but the packet
+        is intersected and shadow-tested in bulk.
+
+        :param origins: A sequence of (x, y, z) tuples, the origins of the rays
+            in the packet.
+        :param directions: A sequence of (x, y, z) tuples, the directions of
+            the rays in the packet.
+        :param observer: PacketObserver, if not None, told about the packet
+            and about the hit and shadow packets it leads to
+        :return: A list of Color objects, parallel to origins and directions
+        """
+        if observer is not None:
+            observer.color_packet_started(origins=origins, directions=directions)
+
+        colors = [Color(red=0, green=0, blue=0) for _ in range(len(origins))]
+
+        # Prepare the computations for every ray that hit something.  Rays
+        # that miss everything are left black.
+        hit_indices = []
+        hit_computations = []
+        for index, hit in enumerate(self.hit_packet(origins=origins,
+                                                    directions=directions,
+                                                    observer=observer)):
+            if hit is None:
+                continue
+
+            time, shape = hit
+            hit_indices.append(index)
+            hit_computations.append(Computations.for_hit(time=time,
+                                                         shape=shape,
+                                                         origin=origins[index],
+                                                         direction=directions[index]))
+
+        for index, color in zip(hit_indices,
+                                self.shade_packet(hit_computations=hit_computations,
+                                                  observer=observer)):
+            colors[index] = color
+
+        if observer is not None:
+            observer.color_packet_finished(origins=origins,
+                                           directions=directions,
+                                           colors=colors)
+
+        return colors
+
+    def shade_packet(self, hit_computations, observer=None, shadows=None):
+        """
+        Determine the color for every one of a packet of hits.  The result for
+        each hit is the same as calling shade_hit for it, but the shadow rays
+        for the whole packet are cast in bulk, one packet per light.
+
+        :param hit_computations: A sequence of Computations, one for each hit
+        :param observer: PacketObserver, if not None, told about the shadow
+            packets
+        :param shadows: If not None, a function that is used instead of
+            casting shadow rays.  It is called with a light and a list of the
+            indices (into hit_computations) of the hits that face the light
+            and must return a list, parallel to the indices, with True for
+            each hit that is in the light's shadow and False otherwise, e.g.,
+            from shadows that were already determined.
+        :return: A list of Color objects, parallel to hit_computations
+        """
+        # Find the lights to consider for each hit and, for each light, cast
+        # the shadow rays for all of the hits that face it as a single packet.
+        hit_lights = [list(self._lights_for(position=computations.position,
+                                            normal=computations.normal))
+                      for computations in hit_computations]
+        shadowed = [[not faces_light for _, faces_light in lights]
+                    for lights in hit_lights]
+        pending = {id(light): [] for light in self._lights}
+        for hit, lights in enumerate(hit_lights):
+            for slot, (light, faces_light) in enumerate(lights):
+                if faces_light:
+                    pending[id(light)].append((hit, slot))
+
+        for light in self._lights:
+            light_pending = pending[id(light)]
+            if not light_pending:
+                continue
+
+            if shadows is not None:
+                light_shadowed = shadows(light, [hit for hit, _ in light_pending])
+            else:
+                light_shadowed = self.is_shadowed_packet(
+                    positions=[hit_computations[hit].over_position
+                               for hit, _ in light_pending],
+                    light=light,
+                    observer=observer)
+            for (hit, slot), is_shadowed in zip(light_pending, light_shadowed):
+                shadowed[hit][slot] = is_shadowed
+
+        # Now shade each hit with the sum of the contributions of its lights
+        colors = []
+        for computations, lights, hit_shadowed in zip(hit_computations,
+                                                      hit_lights,
+                                                      shadowed):
+            color = None
+            for (light, _), is_shadowed in zip(lights, hit_shadowed):
+                contribution = computations.shape.material.lighting(
+                    shape=computations.shape,
+                    light=light,
+                    position=computations.position,
+                    eye=computations.eye,
+                    normal=computations.normal,
+                    in_shadow=is_shadowed)
+                color = contribution if color is None else color + contribution
+
+            colors.append(color if color is not None
+                          else Color(red=0, green=0, blue=0))
+
+        return colors